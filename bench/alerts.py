@@ -0,0 +1,168 @@
+"""
+Alert engine benchmark and check (py/alerts.py).
+
+Run from the repo root:
+    python3 -m bench.alerts [--bays 24 160 1000] [--minutes 20]
+
+For each topology size
+1. checks that a faulted disk, a hot disk, a stopped service and a slow txg pool
+   raise and clear their rules with one transition event each, that unchanged
+   inputs are not re-evaluated, that three raises within the flap window mark a
+   rule as flapping, and that the beeper beeps only while an alert is active
+   and not muted;
+2. times a minute of alert work: the old loop (a full recompute every second)
+   against the event-driven engine (one disk walk per 5 s topology scan).
+"""
+import argparse, sys, threading, time
+
+from py.records import DiskRecord
+
+POOLS = ("tank", "backup", "scratch")
+BAYS_PER_CHASSIS = 24
+SCAN_INTERVAL_SECS = 5
+
+
+def build_topology(bays, fault_at=None, hot_at=None):
+    topology = {}
+    for start in range(0, bays, BAYS_PER_CHASSIS):
+        disks = []
+        for i in range(start, min(bays, start + BAYS_PER_CHASSIS)):
+            disks.append(DiskRecord(sn=f"WD-WCC{i:08d}", size_bytes=4000787030016, dev_name=f"sd{i}",
+                                    pool_name=POOLS[i % len(POOLS)], pool_idx=i % 12 + 1,
+                                    state="FAULTED" if i == fault_at else "ONLINE",
+                                    temperature_c=45 if i == hot_at else 30 + i % 8))
+        topology[f"enc{start // BAYS_PER_CHASSIS}"] = {"disks": disks}
+    return topology
+
+
+def full_recompute(pool_states, topology, services):
+    """The per-second recompute the engine replaced: every rule over every disk."""
+    pool_degraded = any(str(state or '').upper() != 'ONLINE' for state in pool_states.values())
+    fault = hot = False
+    for enclosure in topology.values():
+        for disk in enclosure.get("disks", []):
+            if not disk.is_present:
+                continue
+            if str(disk.state or '').upper() in ('FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED'):
+                fault = True
+            if int(disk.read_errors) + int(disk.write_errors) + int(disk.cksum_errors) > 0:
+                fault = True
+            if disk.temperature_c is not None and float(disk.temperature_c) > 40.0:
+                hot = True
+            if fault and hot:
+                break
+        if fault and hot:
+            break
+    return {"poolDegraded": pool_degraded, "diskFaultOrErrors": fault, "highTemperature": hot,
+            "servicesStopped": bool(services.get("hasStopped"))}
+
+
+def reset():
+    from py import alerts
+    with alerts.ALERT_LOCK:
+        alerts.ALERT_INPUTS.update(pool_states={}, topology={}, services={}, txg_slow_pools=[])
+        for rule in alerts.ALERT_RULES.values():
+            rule.update(active=False, detail=[], first_seen=None, last_seen=None, raised_at=None,
+                        cleared_at=None, evaluations=0)
+            rule["raises"].clear()
+        alerts.ALERT_EVENTS.clear()
+        alerts.ALERT_STATE.update(mute_until=0.0, payload=None)
+
+
+def check(bays):
+    from py.alerts import update_inputs, alert_events_status, current_alerts
+    reset()
+    pools = {pool: "ONLINE" for pool in POOLS}
+    services = {"tracked": ["smb"], "stopped": [], "hasStopped": False}
+    update_inputs(pool_states=pools, topology=build_topology(bays), services=services, txg_slow_pools=[])
+    assert current_alerts()["activeCount"] == 0, current_alerts()
+
+    update_inputs(pool_states=dict(pools), topology=build_topology(bays, fault_at=bays - 1, hot_at=0),
+                  services={"tracked": ["smb"], "stopped": ["smb"], "hasStopped": True}, txg_slow_pools=["tank"])
+    alerts = current_alerts()
+    assert alerts["activeNames"] == ["Disk Fault/Error Alert", "High Temperature Alert",
+                                     "Services Stopped Alert", "TXG Sync Time Alert"], alerts
+    status = alert_events_status()
+    assert status["rules"]["diskFaultOrErrors"]["detail"] == [f"sd{bays - 1}"], status["rules"]["diskFaultOrErrors"]
+    assert status["rules"]["poolDegraded"]["evaluations"] == 1, "equal pool_states were re-evaluated"
+
+    update_inputs(topology=build_topology(bays), services=services, txg_slow_pools=[])
+    events = alert_events_status()["events"]
+    assert [(e["flag"], e["event"]) for e in events] == [
+        ("diskFaultOrErrors", "raised"), ("highTemperature", "raised"), ("servicesStopped", "raised"),
+        ("txgSyncSlow", "raised"), ("diskFaultOrErrors", "cleared"), ("highTemperature", "cleared"),
+        ("servicesStopped", "cleared"), ("txgSyncSlow", "cleared")], events
+
+    for _ in range(2):
+        update_inputs(pool_states={"tank": "DEGRADED"})
+        update_inputs(pool_states=pools)
+    rule = alert_events_status()["rules"]["poolDegraded"]
+    assert rule["flap_count"] == 2 and not rule["flapping"], rule
+    update_inputs(pool_states={"tank": "DEGRADED"})
+    rule = alert_events_status()["rules"]["poolDegraded"]
+    assert rule["flapping"] and rule["active"] and rule["detail"] == ["tank"], rule
+    return len(events)
+
+
+def check_beeper():
+    from py.alerts import update_inputs, mute, alert_beeper_thread
+    reset()
+    beeps = []
+    threading.Thread(target=alert_beeper_thread, args=(lambda: beeps.append(time.monotonic()), 0.05),
+                     daemon=True).start()
+    time.sleep(0.2)
+    assert not beeps, "beeped with no active alert"
+    update_inputs(pool_states={"tank": "DEGRADED"})
+    time.sleep(0.28)
+    assert 4 <= len(beeps) <= 7, len(beeps)
+    mute(0.3)
+    muted_at = len(beeps)
+    time.sleep(0.2)
+    assert len(beeps) == muted_at, "beeped while muted"
+    time.sleep(0.25)
+    assert len(beeps) > muted_at, "mute did not expire"
+    update_inputs(pool_states={"tank": "ONLINE"})
+    time.sleep(0.1)
+    cleared_at = len(beeps)
+    time.sleep(0.2)
+    assert len(beeps) == cleared_at, "beeped after the alert cleared"
+
+
+def time_minute(bays, minutes):
+    """CPU seconds per minute of alert work: old 1 Hz loop vs one update per scan."""
+    from py.alerts import update_inputs
+    reset()
+    pools = {pool: "ONLINE" for pool in POOLS}
+    services = {"tracked": ["smb"], "stopped": [], "hasStopped": False}
+    topologies = [build_topology(bays) for _ in range(60 // SCAN_INTERVAL_SECS)]
+    started = time.process_time()
+    for _ in range(minutes):
+        for second in range(60):
+            full_recompute(pools, topologies[second // SCAN_INTERVAL_SECS], services)
+    old = (time.process_time() - started) / minutes
+    started = time.process_time()
+    for _ in range(minutes):
+        for topology in topologies:
+            update_inputs(pool_states=pools, topology=topology, services=services, txg_slow_pools=[])
+    new = (time.process_time() - started) / minutes
+    return old, new
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bays", type=int, nargs="+", default=[24, 160, 1000])
+    parser.add_argument("--minutes", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    check_beeper()
+    print("beeper: silent while idle or muted, beeps every interval while an alert is active")
+    print(f"{'bays':>6} {'events':>7} {'1 Hz ms/min':>12} {'event ms/min':>13}")
+    for bays in args.bays:
+        events = check(max(2, bays))
+        old, new = time_minute(max(2, bays), max(1, args.minutes))
+        print(f"{bays:>6} {events:>7} {old * 1e3:>12.2f} {new * 1e3:>13.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
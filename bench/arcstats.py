@@ -0,0 +1,145 @@
+"""
+arcstats parsing benchmark and check (py/arcstats.py).
+
+Run from the repo root:
+    python3 -m bench.arcstats [--reads 2000]
+
+Writes two readings of an OpenZFS 2.2 style /proc/spl/kstat/zfs/arcstats
+(RECORDED_ROWS, 120+ rows) to a temp file and
+1. checks ArcstatsReader against a plain split-every-line parse and the sample
+   math (hit ratios, MRU/MFU split, L2ARC) against hand-computed values;
+2. times both parsers per read and measures their allocation peak (tracemalloc).
+"""
+import argparse, os, shutil, sys, tempfile, time, tracemalloc
+
+# Rows in kstat order; FIELDS are filled from the readings, the rest get a counter value.
+RECORDED_ROWS = """
+hits iohits misses demand_data_hits demand_data_iohits demand_data_misses demand_metadata_hits
+demand_metadata_iohits demand_metadata_misses prefetch_data_hits prefetch_data_iohits prefetch_data_misses
+prefetch_metadata_hits prefetch_metadata_iohits prefetch_metadata_misses mru_hits mru_ghost_hits mfu_hits
+mfu_ghost_hits uncached_hits deleted mutex_miss access_skip evict_skip evict_not_enough evict_l2_cached
+evict_l2_eligible evict_l2_eligible_mfu evict_l2_eligible_mru evict_l2_ineligible evict_l2_skip hash_elements
+hash_elements_max hash_collisions hash_chains hash_chain_max meta p pd pm c c_min c_max size compressed_size
+uncompressed_size overhead_size hdr_size data_size metadata_size dbuf_size dnode_size bonus_size
+anon_size anon_data anon_metadata anon_evictable_data anon_evictable_metadata mru_size mru_data mru_metadata
+mru_evictable_data mru_evictable_metadata mru_ghost_size mru_ghost_data mru_ghost_metadata
+mru_ghost_evictable_data mru_ghost_evictable_metadata mfu_size mfu_data mfu_metadata mfu_evictable_data
+mfu_evictable_metadata mfu_ghost_size mfu_ghost_data mfu_ghost_metadata mfu_ghost_evictable_data
+mfu_ghost_evictable_metadata uncached_size uncached_data uncached_metadata uncached_evictable_data
+uncached_evictable_metadata l2_hits l2_misses l2_prefetch_asize l2_mru_asize l2_mfu_asize l2_bufc_data_asize
+l2_bufc_metadata_asize l2_feeds l2_rw_clash l2_read_bytes l2_write_bytes l2_writes_sent l2_writes_done
+l2_writes_error l2_writes_lock_retry l2_evict_lock_retry l2_evict_reading l2_evict_l1cached l2_free_on_write
+l2_abort_lowmem l2_cksum_bad l2_io_error l2_size l2_asize l2_hdr_size l2_log_blk_writes l2_log_blk_avg_asize
+l2_log_blk_asize l2_log_blk_count l2_data_to_meta_ratio l2_rebuild_success l2_rebuild_unsupported
+l2_rebuild_io_errors l2_rebuild_dh_errors l2_rebuild_cksum_lb_errors l2_rebuild_lowmem l2_rebuild_size
+l2_rebuild_asize l2_rebuild_bufs l2_rebuild_bufs_precached l2_rebuild_log_blks memory_throttle_count
+memory_direct_count memory_indirect_count memory_all_bytes memory_free_bytes memory_available_bytes
+arc_no_grow arc_tempreserve arc_loaned_bytes arc_prune arc_meta_used arc_dnode_limit async_upgrade_sync
+predictive_prefetch demand_hit_predictive_prefetch demand_iohit_predictive_prefetch prescient_prefetch
+demand_hit_prescient_prefetch demand_iohit_prescient_prefetch arc_need_free arc_sys_free arc_raw_size
+cached_only_in_progress abd_chunk_waste_size
+""".split()
+
+FIRST = {
+    "hits": 9_000_000, "misses": 1_000_000,
+    "demand_data_hits": 4_000_000, "demand_data_misses": 400_000,
+    "demand_metadata_hits": 3_000_000, "demand_metadata_misses": 100_000,
+    "prefetch_data_hits": 1_500_000, "prefetch_data_misses": 450_000,
+    "prefetch_metadata_hits": 500_000, "prefetch_metadata_misses": 50_000,
+    "mru_hits": 3_000_000, "mfu_hits": 6_000_000, "mru_ghost_hits": 10_000, "mfu_ghost_hits": 5_000,
+    "size": 48 << 30, "c": 50 << 30, "c_max": 64 << 30, "mru_size": 12 << 30, "mfu_size": 36 << 30,
+    "l2_hits": 200_000, "l2_misses": 800_000, "l2_size": 400 << 30, "l2_read_bytes": 90 << 30,
+}
+# One second later: 9000 hits / 1000 misses, 3000 MRU + 6000 MFU hits, 250 L2 hits / 750 misses.
+SECOND = dict(FIRST, **{
+    "hits": 9_009_000, "misses": 1_001_000,
+    "demand_data_hits": 4_005_000, "demand_data_misses": 400_500,
+    "demand_metadata_hits": 3_003_000, "demand_metadata_misses": 100_000,
+    "prefetch_data_hits": 1_500_800, "prefetch_data_misses": 450_500,
+    "prefetch_metadata_hits": 500_200, "prefetch_metadata_misses": 50_000,
+    "mru_hits": 3_003_000, "mfu_hits": 6_006_000, "mru_ghost_hits": 10_300, "mfu_ghost_hits": 5_100,
+    "size": 49 << 30, "mru_size": 14 << 30, "mfu_size": 35 << 30,
+    "l2_hits": 200_250, "l2_misses": 800_750, "l2_read_bytes": (90 << 30) + (32 << 20),
+})
+EXPECTED = {
+    "hit_ratio": 90.0, "demand_hit_ratio": 94.12, "prefetch_hit_ratio": 66.67,
+    "accesses_per_sec": 10000.0, "ghost_hits_per_sec": 400.0,
+    "size_bytes": float(49 << 30), "target_bytes": float(50 << 30),
+    "mru_pct": 28.57, "mfu_pct": 71.43, "mfu_hit_pct": 66.67,
+    "l2_hit_ratio": 25.0, "l2_size_bytes": float(400 << 30), "l2_read_bytes_per_sec": float(32 << 20),
+}
+
+
+def render(values):
+    lines = ["13 1 0x01 147 39984 4170337541 2367021981843711", "name                            type data"]
+    for index, name in enumerate(RECORDED_ROWS):
+        lines.append(f"{name:<32} 4    {values.get(name, 1000 + index * 7919)}")
+    return "\n".join(lines) + "\n"
+
+
+def naive_parse(path):
+    """The obvious parser: read, split every line, convert every value."""
+    with open(path, 'r') as fh:
+        rows = fh.read().splitlines()[2:]
+    stats = {}
+    for row in rows:
+        name, _, value = row.split()
+        stats[name] = int(value)
+    return stats
+
+
+def check(path):
+    from py.arcstats import ArcstatsReader, FIELDS, compute_sample
+    reader = ArcstatsReader(path)
+    with open(path, 'w') as fh:
+        fh.write(render(FIRST))
+    first = reader.read()
+    full = naive_parse(path)
+    assert first == {name: full[name] for name in FIELDS}, "reader disagrees with the split parse"
+    with open(path, 'w') as fh:
+        fh.write(render(SECOND))
+    second = reader.read()
+    reader.close()
+    sample = compute_sample(first, second, 1.0)
+    assert sample == EXPECTED, {k: (sample[k], EXPECTED[k]) for k in EXPECTED if sample[k] != EXPECTED[k]}
+    assert compute_sample(second, first, 1.0) is None, "counter reset must drop the sample"
+    return len(full)
+
+
+def measure(parse, reads):
+    parse()
+    started = time.perf_counter()
+    for _ in range(reads):
+        parse()
+    per_read_us = (time.perf_counter() - started) * 1e6 / reads
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return per_read_us, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    from py.arcstats import ArcstatsReader
+    root = tempfile.mkdtemp(prefix="dashboard-arcstats-")
+    try:
+        path = os.path.join(root, "arcstats")
+        rows = check(path)
+        print(f"arcstats: {rows} rows, reader and sample math match")
+        reader = ArcstatsReader(path)
+        print(f"{'parser':>14} {'us/read':>9} {'peak KiB':>9}")
+        for label, parse in (("split lines", lambda: naive_parse(path)), ("ArcstatsReader", reader.read)):
+            per_read, peak = measure(parse, max(1, args.reads))
+            print(f"{label:>14} {per_read:>9.1f} {peak / 1024.0:>9.1f}")
+        reader.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Per-dataset I/O benchmark and ranking check (py/dataset_io.py).
+
+Run from the repo root:
+    python3 -m bench.dataset_io [--datasets 20 200 2000] [--repeat 20]
+
+For each dataset count, builds a kstat tree (two pools, objset-0x.. files in
+the OpenZFS format) in a temp dir and
+1. replays a minute of 5 s samples where dataset i writes i MiB/s and reads
+   half that, and checks GET /dataset-io's top 5 against the expected order
+   and rates;
+2. times one sampling pass (preading the counters of every known objset)
+   against reading and splitting every file, per dataset.
+"""
+import argparse, os, shutil, sys, tempfile, time
+
+POOLS = ("tank", "fast")
+MIB = 1 << 20
+STEP_SECS = 5
+
+
+def render(dataset, nread, nwritten, reads, writes):
+    rows = [("dataset_name", 7, dataset), ("writes", 4, writes), ("nwritten", 4, nwritten),
+            ("reads", 4, reads), ("nread", 4, nread), ("nunlinks", 4, 0), ("nunlinked", 4, 0)]
+    lines = ["49 1 0x01 7 2160 5214737528 5223283052", "name                            type data"]
+    lines += [f"{name:<32} {kind:<4} {value}" for name, kind, value in rows]
+    return "\n".join(lines) + "\n"
+
+
+def build_tree(root, count):
+    """count objset files spread over POOLS; returns [(path, dataset)] with dataset i at index i."""
+    objsets = []
+    for index in range(count):
+        pool = POOLS[index % len(POOLS)]
+        directory = os.path.join(root, pool)
+        os.makedirs(directory, exist_ok=True)
+        objsets.append((os.path.join(directory, f"objset-0x{index + 0x36:x}"), f"{pool}/ds{index}"))
+    write_counters(objsets, 0)
+    return objsets
+
+
+def write_counters(objsets, step):
+    for index, (path, dataset) in enumerate(objsets):
+        written = index * MIB * STEP_SECS * step
+        with open(path, 'w') as fh:
+            fh.write(render(dataset, written // 2, written, index * 5 * step, index * 10 * step))
+
+
+def sample(objsets, buf, with_name):
+    from py.dataset_io import read_objset
+    datasets = {}
+    for path, dataset in objsets:
+        counters, name = read_objset(path, buf, with_name)
+        key = f"{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
+        datasets[key] = [key.split('/', 1)[0], name or dataset, *counters]
+    return datasets
+
+
+def naive_pass(objsets):
+    """Read and split every file completely, as a line-oriented parser would."""
+    out = {}
+    for path, _ in objsets:
+        with open(path, 'r') as fh:
+            stats = dict((row.split()[0], row.split()[2]) for row in fh.read().splitlines()[2:])
+        out[path] = [stats["dataset_name"]] + [int(stats[k]) for k in ("nread", "nwritten", "reads", "writes")]
+    return out
+
+
+def check_ranking(root, objsets):
+    from py.dataset_io import discover_objsets, record_sample, dataset_io_status, DATASET_HISTORY, BUFFER_SIZE
+    found = discover_objsets(root)
+    assert len(found) == len(objsets), f"discovered {len(found)} of {len(objsets)} objsets"
+    DATASET_HISTORY.clear()
+    buf = bytearray(BUFFER_SIZE)
+    start = time.time()
+    for step in range(13):          # one minute at 5 s
+        write_counters(objsets, step)
+        record_sample({"ts": start + step * float(STEP_SECS), "datasets": sample(objsets, buf, step == 0)})
+    status = dataset_io_status(5)
+    top = status["datasets"]
+    expected = [objsets[i][1] for i in range(len(objsets) - 1, len(objsets) - 6, -1)]
+    assert [item["dataset"] for item in top] == expected, [item["dataset"] for item in top]
+    leader, index = top[0], len(objsets) - 1
+    assert leader["write_bytes_per_sec"] == index * MIB and leader["read_bytes_per_sec"] == index * MIB / 2, leader
+    assert leader["write_ops_per_sec"] == index * 2 and leader["window_secs"] == 60.0, leader
+    assert leader["last"]["write_bytes_per_sec"] == index * MIB, leader
+    return len(top)
+
+
+def time_pass(objsets, repeat):
+    from py.dataset_io import BUFFER_SIZE
+    buf = bytearray(BUFFER_SIZE)
+    timings = {}
+    for label, run in (("split files", lambda: naive_pass(objsets)),
+                       ("counters only", lambda: sample(objsets, buf, False))):
+        run()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        timings[label] = (time.perf_counter() - started) * 1e6 / repeat / len(objsets)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--datasets", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'datasets':>9} {'top-5':>6} {'split us/ds':>12} {'counters us/ds':>15}")
+    for count in args.datasets:
+        root = tempfile.mkdtemp(prefix=f"dashboard-objsets-{count}-")
+        try:
+            objsets = build_tree(root, max(6, count))
+            ranked = check_ranking(root, objsets)
+            timings = time_pass(objsets, max(1, args.repeat))
+            print(f"{len(objsets):>9} {ranked:>6} {timings['split files']:>12.1f} {timings['counters only']:>15.1f}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
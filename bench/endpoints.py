@@ -0,0 +1,107 @@
+"""
+Keep-alive check of the server's JSON endpoints through the real FastHandler.
+
+Run from the repo root:
+    python3 -m bench.endpoints [--rounds 3]
+
+Serves FastHandler in this process (on a temporary copy of config.json, no
+collector threads) and sends every endpoint in ENDPOINTS, --rounds times, over
+ONE persistent HTTP/1.1 connection. Each response must be the expected status
+with a body that parses, and after the last one nothing else may be waiting on
+the socket: a handler that sends its response and then falls through to the
+static-file fallback appends a second (404) response, which the next request
+on the connection would read instead of its own. (/style-config and
+/livereload-status write unframed bodies and close the connection by design,
+so they are not part of the set.)
+"""
+import argparse, http.client, json, os, shutil, socket, socketserver, sys, tempfile, threading, time
+
+# (path, expected status, JSON body)
+ENDPOINTS = (
+    ("/data", 200, True),
+    ("/pool-activity", 200, True),
+    ("/metrics", 200, False),
+    ("/debug/timings", 200, True),
+    ("/debug/profile", 200, True),
+    ("/scan-progress", 200, True),
+    ("/pool-iostat", 200, True),
+    ("/arc-stats", 200, True),
+    ("/dataset-io?top=3", 200, True),
+    ("/txg-stats", 200, True),
+    ("/alert-events", 200, True),
+    ("/federation/data", 200, True),
+    ("/federation/pool-activity", 200, True),
+)
+
+
+def _serve(config_path):
+    import py.config
+    py.config.CONFIG_FILE = config_path
+    py.config.STYLE_CONFIG_FILE = config_path
+    from py.server import FastHandler
+
+    class QuietHandler(FastHandler):
+        def log_message(self, format, *args):
+            pass
+
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def check_keepalive(port, rounds):
+    """Every endpoint over one connection; returns {path: mean ms}."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    spent = {}
+    try:
+        for _ in range(rounds):
+            for path, status, is_json in ENDPOINTS:
+                started = time.perf_counter()
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                response = conn.getresponse()
+                body = response.read()
+                spent[path] = spent.get(path, 0.0) + time.perf_counter() - started
+                assert response.status == status, f"{path}: HTTP {response.status} (a previous handler sent twice?)"
+                assert not response.will_close, f"{path}: server closed the keep-alive connection"
+                if is_json:
+                    json.loads(body)
+        # Nothing may follow the last response on the socket.
+        conn.sock.settimeout(0.3)
+        try:
+            stray = conn.sock.recv(4096)
+        except socket.timeout:
+            stray = b""
+        assert not stray, f"stray bytes after the last response: {stray[:80]!r}"
+    finally:
+        conn.close()
+    return {path: spent[path] * 1000.0 / rounds for path in spent}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from py.config import CONFIG_FILE
+    workdir = tempfile.mkdtemp(prefix="dashboard-endpoints-")
+    try:
+        config_path = os.path.join(workdir, "config.json")
+        shutil.copyfile(CONFIG_FILE, config_path)
+        httpd = _serve(config_path)
+        try:
+            timings = check_keepalive(httpd.server_address[1], max(1, args.rounds))
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"{'endpoint':<28} {'ms':>7}")
+    for path, _, _ in ENDPOINTS:
+        print(f"{path:<28} {timings[path]:>7.2f}")
+    print(f"{len(ENDPOINTS)} endpoints x {max(1, args.rounds)} rounds on one keep-alive connection, no stray responses")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
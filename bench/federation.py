@@ -0,0 +1,202 @@
+"""
+Federation stand-in peers: exercises py/federation.py against real FastHandler peers.
+
+Run from the repo root:
+    python3 -m bench.federation [--duration 5] [--interval-ms 200]
+
+Starts two peer dashboards (FastHandler on 127.0.0.1 in child processes, each
+with its own hostname and a temporary copy of config.json; no collector
+threads, so their /data and /pool-activity bodies stay the same) and runs the
+aggregator's federation_monitor_thread against them in this process. It checks
+1. ETag reuse: after the first 200 every /data and /pool-activity poll is a 304,
+   and federated_data() still carries each peer's payload;
+2. keep-alive retry: a PeerConnection whose peer restarted (the pooled socket
+   is dead) gets its answer on the one retry instead of raising;
+3. backoff: while a peer is down its failures grow with doubling delays (far
+   fewer attempts than polls), it is reported "stale" with its last payload,
+   and it comes back to "ok" once the peer is restarted.
+"""
+import argparse, http.client, json, os, shutil, socket, subprocess, sys, tempfile, threading, time
+
+HOSTNAMES = ("peer-a", "peer-b")
+
+
+def _peer(port, hostname, config_path):
+    """Child process: FastHandler on port, counting responses per path and status at /bench-counts."""
+    import socketserver
+    import py.config
+    py.config.CONFIG_FILE = config_path
+    py.config.STYLE_CONFIG_FILE = config_path
+    from py.server import FastHandler, GLOBAL_DATA
+    GLOBAL_DATA["hostname"] = hostname
+    counts, lock = {}, threading.Lock()
+
+    class CountingHandler(FastHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_response(self, code, message=None):
+            key = f"{self.path.split('?')[0]} {code}"
+            with lock:
+                counts[key] = counts.get(key, 0) + 1
+            super().send_response(code, message)
+
+        def do_GET(self):
+            if self.path == '/bench-counts':
+                with lock:
+                    payload = dict(counts)
+                self._send_json(payload)
+                return
+            super().do_GET()
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    with socketserver.ThreadingTCPServer(("127.0.0.1", port), CountingHandler) as httpd:
+        httpd.serve_forever()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_peer(port, hostname, config_path):
+    proc = subprocess.Popen([sys.executable, "-m", "bench.federation", "--peer", str(port), hostname, config_path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"peer {hostname} exited:\n{proc.stderr.read()}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"peer {hostname} did not start")
+
+
+def _stop_peer(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _counts(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", "/bench-counts")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def _hosts():
+    from py.federation import federated_data
+    return federated_data({"hostname": "aggregator"})["hosts"]
+
+
+def _wait_for(predicate, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def check_etags(ports, duration):
+    time.sleep(duration)
+    rows = []
+    hosts = _hosts()
+    for hostname, port in zip(HOSTNAMES, ports):
+        host = hosts.get(hostname)
+        assert host and host["status"] == "ok" and host["data"]["hostname"] == hostname, host
+        counts = _counts(port)
+        for path in ("/data", "/pool-activity"):
+            full, cached = counts.get(f"{path} 200", 0), counts.get(f"{path} 304", 0)
+            assert full == 1 and cached >= 2, f"{hostname} {path}: {full} x 200, {cached} x 304"
+            rows.append((hostname, path, full, cached))
+    return rows
+
+
+def check_retry(port, hostname, config_path, proc):
+    """Restart the peer under a live keep-alive connection: the next GET must succeed via the retry."""
+    from py.federation import PeerConnection
+    conn = PeerConnection(f"http://127.0.0.1:{port}", 2.0)
+    payload, changed = conn.get_json("/data")
+    assert changed and payload["hostname"] == hostname
+    _stop_peer(proc)
+    proc = _start_peer(port, hostname, config_path)
+    payload, changed = conn.get_json("/data")
+    assert payload["hostname"] == hostname, payload
+    conn.close()
+    return proc
+
+
+def check_backoff(port, hostname, config_path, proc, interval, window):
+    from py.federation import FEDERATION_LOCK, FEDERATION_PEERS
+    _stop_peer(proc)
+    assert _wait_for(lambda: _hosts()[hostname]["status"] == "stale", 5), _hosts()[hostname]
+    time.sleep(window)
+    with FEDERATION_LOCK:
+        failures = FEDERATION_PEERS[f"http://127.0.0.1:{port}"]["failures"]
+    polls = int(window / interval)
+    assert 1 <= failures < polls / 2, f"{failures} attempts in {window}s against a down peer (polls: {polls})"
+    assert _hosts()[hostname]["data"]["hostname"] == hostname, "stale peer lost its last payload"
+    proc = _start_peer(port, hostname, config_path)
+    started = time.time()
+    assert _wait_for(lambda: _hosts()[hostname]["status"] == "ok", 35), _hosts()[hostname]
+    return proc, failures, polls, time.time() - started
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == "--peer":
+        _peer(int(sys.argv[2]), sys.argv[3], sys.argv[4])
+        return 0
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of polling per check")
+    parser.add_argument("--interval-ms", type=int, default=200, help="federation data/pool-activity interval")
+    args = parser.parse_args(argv)
+
+    from py.config import CONFIG_FILE
+    from py.federation import federation_monitor_thread
+    workdir = tempfile.mkdtemp(prefix="dashboard-federation-")
+    procs = {}
+    try:
+        config_path = os.path.join(workdir, "config.json")
+        shutil.copyfile(CONFIG_FILE, config_path)
+        ports = [_free_port() for _ in HOSTNAMES]
+        for hostname, port in zip(HOSTNAMES, ports):
+            procs[hostname] = _start_peer(port, hostname, config_path)
+
+        interval = max(1, args.interval_ms)
+        config = {"federation": {"enabled": True, "timeout_ms": 500, "data_interval_ms": interval,
+                                 "pool_activity_interval_ms": interval,
+                                 "peers": [f"127.0.0.1:{port}" for port in ports]}}
+        threading.Thread(target=federation_monitor_thread, args=(lambda: config,), daemon=True).start()
+
+        print(f"{'peer':<8} {'path':<15} {'200s':>5} {'304s':>5}")
+        for hostname, path, full, cached in check_etags(ports, args.duration):
+            print(f"{hostname:<8} {path:<15} {full:>5} {cached:>5}")
+
+        procs[HOSTNAMES[0]] = check_retry(ports[0], HOSTNAMES[0], config_path, procs[HOSTNAMES[0]])
+        print("retry: a restarted peer is answered on the keep-alive retry")
+
+        procs[HOSTNAMES[1]], failures, polls, recovered = check_backoff(
+            ports[1], HOSTNAMES[1], config_path, procs[HOSTNAMES[1]], interval / 1000.0, args.duration)
+        print(f"backoff: {failures} attempts in {args.duration:.0f}s against a down peer (vs {polls} polls), "
+              f"back to ok {recovered:.1f}s after restart")
+    finally:
+        for proc in procs.values():
+            _stop_peer(proc)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+"""
+Fixture trees for the scan-pipeline benchmarks.
+
+build_fixture_tree(root, bays) lays out a host the collectors can scan through
+DASHBOARD_HOST_ROOT:
+
+    root/dev/disk/by-path|by-id|by-partuuid   symlinks to root/dev/sdX(N)
+    root/sys/block, sys/class/{sas_host,sas_phy,enclosure,hwmon}, sys/bus/pci/devices
+    root/proc/diskstats
+    root/bin/{midclt,smartctl,sas2ircu,lsblk,zpool}  replay stubs
+    root/cmd/<key>                                    canned command output
+
+Command output is shaped after real midclt/smartctl/sas2ircu/lsblk/zpool
+output from a SAS2008 HBA with 24-slot SAS2X36 expander backplanes. The replay
+stub is a bash script, so every collector call still pays a real fork+exec.
+"""
+import json, os, re, stat
+
+HBA_PCI = "0000:03:00.0"
+SLOTS_PER_ENCLOSURE = 24
+DISKS_PER_VDEV = 8
+POOLS = ("tank", "backup")
+
+STUB_SCRIPT = r"""#!/bin/bash
+# Replays canned output from $DASHBOARD_BENCH_CMD_DIR. The lookup key is the tool
+# name plus its arguments; absolute paths that exist are replaced by the basename
+# of their resolved target so per-device calls find per-device output.
+key="${0##*/}"
+for arg in "$@"; do
+    case "$arg" in
+        /*) [ -e "$arg" ] && { target=$(readlink -f -- "$arg"); arg="${target##*/}"; } ;;
+    esac
+    key="${key}_${arg}"
+done
+key="${key//[^A-Za-z0-9_.]/_}"
+file="$DASHBOARD_BENCH_CMD_DIR/$key"
+# Optional per-call latency (seconds) to stand in for real tool runtimes.
+[ -n "$DASHBOARD_BENCH_CMD_DELAY" ] && sleep "$DASHBOARD_BENCH_CMD_DELAY"
+[ -f "$file" ] || exit 1
+exec cat "$file"
+"""
+
+STUB_TOOLS = ("midclt", "smartctl", "sas2ircu", "storcli", "lsblk", "zpool")
+
+
+def command_key(tool, args, root=None):
+    """Python twin of the stub's key derivation."""
+    parts = [tool]
+    for arg in args:
+        if arg.startswith('/') and os.path.exists(arg):
+            arg = os.path.basename(os.path.realpath(arg))
+        parts.append(arg)
+    return re.sub(r'[^A-Za-z0-9_.]', '_', "_".join(parts))
+
+
+def _dev_name(i):
+    # sda..sdz, sdaa..sdzz, ... (kernel naming order)
+    name = ""
+    i += 1
+    while i > 0:
+        i, rem = divmod(i - 1, 26)
+        name = chr(97 + rem) + name
+    return "sd" + name
+
+
+def _write(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fh:
+        fh.write(content)
+
+
+def _symlink(target, link):
+    os.makedirs(os.path.dirname(link), exist_ok=True)
+    os.symlink(os.path.relpath(target, os.path.dirname(link)), link)
+
+
+def _disk_spec(i):
+    serial = f"WD-WCC7K{i:06d}"
+    return {
+        "idx": i,
+        "dev": _dev_name(i),
+        "serial": serial,
+        "model": "WDC WD40EFRX-68N32N0",
+        "wwn": f"0x50014ee2{i:08x}",
+        "partuuid": f"6a1b2c3d-{i:04x}-4e5f-8a9b-{i:012x}",
+        "guid": str(10000000000000000000 + i * 7919),
+        "size": 4000787030016,
+        "enclosure": 2 + i // SLOTS_PER_ENCLOSURE,
+        "slot": i % SLOTS_PER_ENCLOSURE,
+        "temp": 30 + (i * 7) % 14,
+    }
+
+
+def _smartctl_json(disk):
+    attrs = []
+    for attr_id, name, raw in ((1, "Raw_Read_Error_Rate", 0), (3, "Spin_Up_Time", 6941),
+                               (4, "Start_Stop_Count", 112), (5, "Reallocated_Sector_Ct", 0),
+                               (7, "Seek_Error_Rate", 0), (9, "Power_On_Hours", 31544),
+                               (10, "Spin_Retry_Count", 0), (11, "Calibration_Retry_Count", 0),
+                               (12, "Power_Cycle_Count", 110), (192, "Power-Off_Retract_Count", 61),
+                               (193, "Load_Cycle_Count", 1442), (194, "Temperature_Celsius", disk["temp"]),
+                               (196, "Reallocated_Event_Count", 0), (197, "Current_Pending_Sector", 0),
+                               (198, "Offline_Uncorrectable", 0), (199, "UDMA_CRC_Error_Count", 0),
+                               (200, "Multi_Zone_Error_Rate", 0)):
+        attrs.append({
+            "id": attr_id, "name": name, "value": 200, "worst": 200, "thresh": 0,
+            "when_failed": "", "flags": {"value": 50, "string": "-O--CK ", "prefailure": False,
+                                         "updated_online": True, "performance": False,
+                                         "error_rate": False, "event_count": True, "auto_keep": True},
+            "raw": {"value": raw, "string": str(raw)}
+        })
+    return json.dumps({
+        "json_format_version": [1, 0],
+        "smartctl": {"version": [7, 4], "argv": ["smartctl", "-a", "-j", f"/dev/{disk['dev']}"], "exit_status": 0},
+        "device": {"name": f"/dev/{disk['dev']}", "info_name": f"/dev/{disk['dev']} [SAT]", "type": "sat", "protocol": "ATA"},
+        "model_family": "Western Digital Red",
+        "model_name": disk["model"],
+        "serial_number": disk["serial"].replace("-", ""),
+        "wwn": {"naa": 5, "oui": 5358, "id": int(disk["wwn"][-8:], 16)},
+        "firmware_version": "82.00A82",
+        "user_capacity": {"blocks": 7814037168, "bytes": disk["size"]},
+        "logical_block_size": 512, "physical_block_size": 4096,
+        "rotation_rate": 5400,
+        "smart_status": {"passed": True},
+        "ata_smart_attributes": {"revision": 16, "table": attrs},
+        "power_on_time": {"hours": 31544},
+        "power_cycle_count": 110,
+        "temperature": {"current": disk["temp"]}
+    }, indent=2)
+
+
+def _smartctl_scan_open_json(disks):
+    return json.dumps({
+        "json_format_version": [1, 0],
+        "smartctl": {"version": [7, 4], "argv": ["smartctl", "--scan-open", "-j"], "exit_status": 0},
+        "devices": [
+            {"name": f"/dev/{d['dev']}", "info_name": f"/dev/{d['dev']} [SAT]", "type": "sat", "protocol": "ATA"}
+            for d in disks
+        ]
+    }, indent=2)
+
+
+def _pool_query_json(disks):
+    pools = []
+    for p_idx, pool_name in enumerate(POOLS):
+        members = [d for d in disks if d["idx"] % len(POOLS) == p_idx]
+        vdevs = []
+        for v in range(0, len(members), DISKS_PER_VDEV):
+            children = [{
+                "type": "DISK", "path": f"/dev/disk/by-partuuid/{d['partuuid']}", "guid": d["guid"],
+                "status": "ONLINE", "name": d["partuuid"], "disk": d["dev"], "children": [],
+                "stats": {"timestamp": 1, "read_errors": 0, "write_errors": 0, "checksum_errors": 0,
+                          "ops": [0, 1204, 5012, 0, 0, 0, 0], "bytes": [0, 4915200, 81920000, 0, 0, 0, 0],
+                          "size": 0, "allocated": 0, "fragmentation": 0, "self_healed": 0,
+                          "configured_ashift": 12, "logical_ashift": 9, "physical_ashift": 12}
+            } for d in members[v:v + DISKS_PER_VDEV]]
+            vdevs.append({"type": "RAIDZ2", "path": None, "guid": str(900 + v), "status": "ONLINE",
+                          "name": f"raidz2-{v // DISKS_PER_VDEV}", "children": children,
+                          "stats": {"read_errors": 0, "write_errors": 0, "checksum_errors": 0}})
+        pools.append({
+            "id": p_idx + 1, "name": pool_name, "guid": str(7000 + p_idx), "path": f"/mnt/{pool_name}",
+            "status": "ONLINE", "healthy": True, "warning": False, "status_code": None,
+            "scan": {"function": "SCRUB", "state": "FINISHED", "start_time": {"$date": 1760000000000},
+                     "end_time": {"$date": 1760030000000}, "percentage": 100.0, "bytes_to_process": 0,
+                     "bytes_processed": 0, "bytes_issued": 0, "pause": None, "errors": 0,
+                     "total_secs_left": None},
+            "topology": {"data": vdevs, "log": [], "cache": [], "spare": [], "special": [], "dedup": []}
+        })
+    return json.dumps(pools)
+
+
+def _service_query_json():
+    return json.dumps([
+        {"id": i, "service": name, "enable": True, "state": "RUNNING", "pids": [1000 + i]}
+        for i, name in enumerate(("cifs", "nfs", "ssh", "smartd"), start=1)
+    ])
+
+
+def _sas2ircu_list():
+    return """LSI Corporation SAS2 IR Configuration Utility.
+Version 20.00.00.00 (2014.09.18)
+Copyright (c) 2008-2014 LSI Corporation. All rights reserved.
+
+
+         Adapter      Vendor  Device                       SubSys  SubSys
+ Index    Type          ID      ID    Pci Address          Ven ID  Dev ID
+ -----  ------------  ------  ------  -----------------    ------  ------
+   0     SAS2008     1000h    72h   03h:00h:00h:00h      1000h   3020h
+SAS2IRCU: Utility Completed Successfully.
+"""
+
+
+def _sas2ircu_display(disks):
+    enclosures = sorted({d["enclosure"] for d in disks})
+    out = ["LSI Corporation SAS2 IR Configuration Utility.",
+           "Version 20.00.00.00 (2014.09.18)",
+           "Copyright (c) 2008-2014 LSI Corporation. All rights reserved.", "",
+           "Read configuration has been initiated for controller 0",
+           "-" * 72, "Controller information", "-" * 72,
+           "  Controller type                         : SAS2008",
+           "  BIOS version                            : 7.39.02.00",
+           "  Firmware version                        : 20.00.07.00",
+           "  Channel description                     : 1 Serial Attached SCSI",
+           "  Initiator ID                            : 0",
+           "  Maximum physical devices                : 255",
+           "  Concurrent commands supported           : 3432",
+           "  Slot                                    : 1",
+           "  Segment                                 : 0",
+           "  Bus                                     : 3",
+           "  Device                                  : 0",
+           "  Function                                : 0",
+           "  RAID Support                            : No",
+           "-" * 72, "IR Volume information", "-" * 72,
+           "-" * 72, "Physical device information", "-" * 72,
+           "Initiator at ID #0", ""]
+    for d in disks:
+        out += ["Device is a Hard disk",
+                f"  Enclosure #                             : {d['enclosure']}",
+                f"  Slot #                                  : {d['slot']}",
+                f"  SAS Address                             : 5003048-0-{d['enclosure']:04x}-{d['slot']:04x}",
+                "  State                                   : Ready (RDY)",
+                "  Size (in MB)/(in sectors)               : 3815447/7814037167",
+                "  Manufacturer                            : ATA",
+                f"  Model Number                            : {d['model'][:16]}",
+                "  Firmware Revision                       : 0A82",
+                f"  Serial No                               : {d['serial'].replace('-', '')}",
+                f"  GUID                                    : 50014ee2{d['idx']:08x}",
+                "  Protocol                                : SATA",
+                "  Drive Type                              : SATA_HDD", ""]
+    for enc in enclosures:
+        out += ["Device is a Enclosure services device",
+                f"  Enclosure #                             : {enc}",
+                f"  Slot #                                  : {SLOTS_PER_ENCLOSURE}",
+                f"  SAS Address                             : 5003048-0-{enc:04x}-003d",
+                "  State                                   : Standby (SBY)",
+                "  Manufacturer                            : LSI CORP",
+                "  Model Number                            : SAS2X36",
+                "  Firmware Revision                       : 0717",
+                f"  Serial No                               : x3655723{enc}",
+                "  GUID                                    : N/A",
+                "  Protocol                                : SAS",
+                "  Device Type                             : Enclosure services device", ""]
+    out += ["-" * 72, "Enclosure information", "-" * 72,
+            "  Enclosure#                              : 1",
+            "  Logical ID                              : 500605b0:01234560",
+            "  Numslots                                : 8",
+            "  StartSlot                               : 0"]
+    for enc in enclosures:
+        out += [f"  Enclosure#                              : {enc}",
+                f"  Logical ID                              : 50030480:0{enc:07x}",
+                f"  Numslots                                : {SLOTS_PER_ENCLOSURE + 14}",
+                "  StartSlot                               : 0"]
+    out += ["-" * 72, "SAS2IRCU: Command DISPLAY Completed Successfully.",
+            "SAS2IRCU: Utility Completed Successfully.", ""]
+    return "\n".join(out)
+
+
+def _storcli_show_json(disks):
+    enclosures = [{"EID": enc, "State": "OK", "Slots": SLOTS_PER_ENCLOSURE,
+                   "PD": sum(1 for d in disks if d["enclosure"] == enc), "ProdID": "SAS2X36"}
+                  for enc in sorted({d["enclosure"] for d in disks})]
+    enclosures.append({"EID": 252, "State": "OK", "Slots": 8, "PD": 0, "ProdID": "SGPIO"})
+    bus, dev, func = re.match(r'^[0-9a-f]{4}:([0-9a-f]{2}):([0-9a-f]{2})\.([0-9a-f])$', HBA_PCI).groups()
+    return json.dumps({"Controllers": [{
+        "Command Status": {"CLI Version": "007.2707.0000.0000", "Controller": 0, "Status": "Success"},
+        "Response Data": {
+            "Basics": {"Controller": 0, "Model": "HBA 9500-16i", "PCI Address": f"00:{bus}:{dev}:0{func}"},
+            "Enclosure LIST": enclosures
+        }
+    }]})
+
+
+def _storcli_drives_json(disks):
+    data = {}
+    for d in disks:
+        path = f"/c0/e{d['enclosure']}/s{d['slot']}"
+        data[f"Drive {path}"] = [{
+            "EID:Slt": f"{d['enclosure']}:{d['slot']}", "DID": d["idx"], "State": "JBOD", "DG": "-",
+            "Size": "3.638 TB", "Intf": "SATA", "Med": "HDD", "SED": "N", "PI": "N", "SeSz": "512B",
+            "Model": d["model"], "Sp": "U", "Type": "-"
+        }]
+        data[f"Drive {path} - Detailed Information"] = {
+            f"Drive {path} State": {"Shield Counter": 0, "Media Error Count": 0,
+                                    "Drive Temperature": f" {d['temp']}C ({d['temp'] * 9 / 5 + 32:.2f} F)"},
+            f"Drive {path} Device attributes": {
+                "SN": d["serial"], "WWN": d["wwn"][2:].upper(),
+                "Raw size": f"3.638 TB [0x{d['size'] // 512:x} Sectors]"
+            }
+        }
+    return json.dumps({"Controllers": [{
+        "Command Status": {"CLI Version": "007.2707.0000.0000", "Controller": 0, "Status": "Success"},
+        "Response Data": data
+    }]})
+
+
+def _zpool_status(disks):
+    out = []
+    for p_idx, pool_name in enumerate(POOLS):
+        members = [d for d in disks if d["idx"] % len(POOLS) == p_idx]
+        out += [f"  pool: {pool_name}", " state: ONLINE",
+                "  scan: scrub repaired 0B in 08:20:00 with 0 errors on Sun Oct 12 08:20:00 2026",
+                "config:", "", "\tNAME                                      STATE     READ WRITE CKSUM",
+                f"\t{pool_name}                                      ONLINE       0     0     0"]
+        for v in range(0, len(members), DISKS_PER_VDEV):
+            out.append(f"\t  raidz2-{v // DISKS_PER_VDEV}                                ONLINE       0     0     0")
+            for d in members[v:v + DISKS_PER_VDEV]:
+                out.append(f"\t    {d['partuuid']}  ONLINE       0     0     0")
+        out += ["", "errors: No known data errors", ""]
+    return "\n".join(out)
+
+
+IOSTAT_INTERVALS = 4
+
+
+def _zpool_iostat(disks, intervals=IOSTAT_INTERVALS):
+    """`zpool iostat -vlHp 1` for `intervals` blocks (OpenZFS 2.2 column set, latencies in ns)."""
+    out = []
+    for tick in range(intervals):
+        for p_idx, pool_name in enumerate(POOLS):
+            members = [d for d in disks if d["idx"] % len(POOLS) == p_idx]
+            vdevs = [members[v:v + DISKS_PER_VDEV] for v in range(0, len(members), DISKS_PER_VDEV)]
+
+            def row(name, alloc, ops, scale):
+                r_ops, w_ops = ops * (tick + 1), ops * 2
+                fields = [name, alloc, alloc if alloc == "-" else str(int(alloc) * 3), str(r_ops), str(w_ops),
+                          str(r_ops * 131072), str(w_ops * 65536)]
+                fields += [str(scale * n) for n in (4100000, 900000, 3800000, 700000, 12000, 25000, 150000, 80000)]
+                fields += ["-", "-", "-"]           # scrub, trim, rebuild wait
+                return "\t".join(fields)
+
+            out.append(row(pool_name, str(len(members) * 1000204886016), 10 * len(members), 1))
+            for v, group in enumerate(vdevs):
+                out.append(row(f"raidz2-{v}", str(len(group) * 1000204886016), 10 * len(group), 1))
+                out += [row(d["partuuid"], "-", 10, 1 + d["idx"] % 3) for d in group]
+    return "\n".join(out) + "\n"
+
+
+def _diskstats(disks):
+    lines = []
+    for d in disks:
+        n = d["idx"]
+        lines.append(f"   8 {n * 16:6d} {d['dev']} 1{n:05d} 12 2{n:07d} 8814 4{n:05d} 31 6{n:07d} 99123 0 55023 108201 0 0 0 0 1201 512")
+        lines.append(f"   8 {n * 16 + 1:6d} {d['dev']}1 1{n:05d} 12 2{n:07d} 8814 4{n:05d} 31 6{n:07d} 99123 0 55023 108201 0 0 0 0 0 0")
+    return "\n".join(lines) + "\n"
+
+
+def build_fixture_tree(root, bays, with_ircu=True, with_ses=False, with_storcli=False, with_hwmon=False):
+    """Create the fixture host under root. Returns the environment overrides to apply.
+    with_ses links every disk into its /sys/class/enclosure slot (SES-mapped backplanes);
+    with_storcli adds a storcli that reports the same HBA and drives;
+    with_hwmon registers a drivetemp hwmon sensor for every disk."""
+    disks = [_disk_spec(i) for i in range(bays)]
+    dev = os.path.join(root, "dev")
+    sys_root = os.path.join(root, "sys")
+    cmd = os.path.join(root, "cmd")
+    pci_dev = os.path.join(sys_root, "devices", "pci0000:00", "0000:00:01.0", HBA_PCI)
+    host_dir = os.path.join(pci_dev, "host0")
+
+    # PCI function: LSI SAS2008, class 0x010700 (SAS controller)
+    pci_sysfs = os.path.join(sys_root, "bus", "pci", "devices", HBA_PCI)
+    _write(os.path.join(pci_sysfs, "vendor"), "0x1000\n")
+    _write(os.path.join(pci_sysfs, "device"), "0x0072\n")
+    _write(os.path.join(pci_sysfs, "class"), "0x010700\n")
+
+    os.makedirs(host_dir, exist_ok=True)
+    _symlink(host_dir, os.path.join(sys_root, "class", "sas_host", "host0", "device"))
+    for phy in range(8):
+        phy_dir = os.path.join(host_dir, f"phy-0:{phy}")
+        os.makedirs(phy_dir, exist_ok=True)
+        _symlink(phy_dir, os.path.join(sys_root, "class", "sas_phy", f"phy-0:{phy}", "device"))
+
+    for enc in sorted({d["enclosure"] for d in disks}):
+        enc_dev = os.path.join(host_dir, f"port-0:{enc}", f"expander-0:{enc}", f"0:0:{enc}:0")
+        os.makedirs(enc_dev, exist_ok=True)
+        enc_dir = os.path.join(sys_root, "class", "enclosure", f"0:0:{enc}:0")
+        _symlink(enc_dev, os.path.join(enc_dir, "device"))
+        _write(os.path.join(enc_dir, "id"), f"0x500304800000{enc:04x}\n")
+        for slot in range(SLOTS_PER_ENCLOSURE):
+            _write(os.path.join(enc_dir, f"Slot{slot:02d}", "status"), "OK\n")
+            if with_ses:
+                _write(os.path.join(enc_dir, f"Slot{slot:02d}", "slot"), f"{slot}\n")
+                _write(os.path.join(enc_dir, f"Slot{slot:02d}", "type"), "array device\n")
+                _write(os.path.join(enc_dir, f"Slot{slot:02d}", "locate"), "0\n")
+                _write(os.path.join(enc_dir, f"Slot{slot:02d}", "fault"), "0\n")
+
+    for d in disks:
+        node = os.path.join(dev, d["dev"])
+        part = node + "1"
+        _write(node)
+        _write(part)
+        block = os.path.join(sys_root, "block", d["dev"])
+        _write(os.path.join(block, d["dev"] + "1", "partition"), "1\n")
+        _write(os.path.join(block, "device", "wwid"), f"naa.{d['wwn'][2:]}\n")
+        if with_ses:
+            # SCSI device under the expander port, linked from the enclosure slot element.
+            scsi_dev = os.path.join(host_dir, f"port-0:{d['enclosure']}", f"expander-0:{d['enclosure']}",
+                                    f"port-0:{d['enclosure']}:{d['slot']}", f"0:0:{100 + d['idx']}:0")
+            os.makedirs(os.path.join(scsi_dev, "block", d["dev"]), exist_ok=True)
+            _write(os.path.join(scsi_dev, "model"), d["model"][:16] + "\n")
+            with open(os.path.join(scsi_dev, "vpd_pg80"), "wb") as fh:
+                fh.write(bytes([0, 0x80, 0, len(d["serial"])]) + d["serial"].encode())
+            _symlink(scsi_dev, os.path.join(sys_root, "class", "enclosure", f"0:0:{d['enclosure']}:0",
+                                            f"Slot{d['slot']:02d}", "device"))
+            _write(os.path.join(block, "size"), f"{d['size'] // 512}\n")
+        if with_hwmon:
+            # drivetemp: /sys/class/hwmon/hwmonN -> <scsi device>/hwmon/hwmonN, device -> ../..
+            if not with_ses:
+                scsi_dev = os.path.join(host_dir, f"target0:0:{d['idx']}", f"0:0:{100 + d['idx']}:0")
+                os.makedirs(os.path.join(scsi_dev, "block", d["dev"]), exist_ok=True)
+            hwmon_dir = os.path.join(scsi_dev, "hwmon", f"hwmon{d['idx']}")
+            _write(os.path.join(hwmon_dir, "name"), "drivetemp\n")
+            _write(os.path.join(hwmon_dir, "temp1_input"), f"{d['temp'] * 1000}\n")
+            _symlink(scsi_dev, os.path.join(hwmon_dir, "device"))
+            _symlink(hwmon_dir, os.path.join(sys_root, "class", "hwmon", f"hwmon{d['idx']}"))
+
+        _symlink(node, os.path.join(dev, "disk", "by-path", f"pci-{HBA_PCI}-sas-phy{d['idx']}-lun-0"))
+        _symlink(part, os.path.join(dev, "disk", "by-path", f"pci-{HBA_PCI}-sas-phy{d['idx']}-lun-0-part1"))
+        by_id = f"ata-{d['model'].replace(' ', '_')}_{d['serial']}"
+        _symlink(node, os.path.join(dev, "disk", "by-id", by_id))
+        _symlink(part, os.path.join(dev, "disk", "by-id", by_id + "-part1"))
+        _symlink(node, os.path.join(dev, "disk", "by-id", f"wwn-{d['wwn']}"))
+        _symlink(part, os.path.join(dev, "disk", "by-partuuid", d["partuuid"]))
+
+        by_id_path = os.path.join(dev, "disk", "by-id", by_id)
+        _write(os.path.join(cmd, command_key("smartctl", ["-a", "-j", by_id_path])), _smartctl_json(d))
+        _write(os.path.join(cmd, command_key("smartctl", ["-a", "-j", "-d", "sat", node])), _smartctl_json(d))
+        by_path = os.path.join(dev, "disk", "by-path", f"pci-{HBA_PCI}-sas-phy{d['idx']}-lun-0")
+        _write(os.path.join(cmd, command_key("lsblk", ["-dbno", "SERIAL,SIZE", by_path])),
+               f"{d['serial']} {d['size']}\n")
+
+    _write(os.path.join(root, "proc", "diskstats"), _diskstats(disks))
+
+    _write(os.path.join(cmd, command_key("smartctl", ["--scan-open", "-j"])), _smartctl_scan_open_json(disks))
+    _write(os.path.join(cmd, command_key("midclt", ["call", "pool.query"])), _pool_query_json(disks))
+    _write(os.path.join(cmd, command_key("midclt", ["call", "service.query"])), _service_query_json())
+    _write(os.path.join(cmd, command_key("zpool", ["status", "-v", "-p"])), _zpool_status(disks))
+    _write(os.path.join(cmd, command_key("zpool", ["iostat", "-vlHp", "1"])), _zpool_iostat(disks))
+    _write(os.path.join(cmd, command_key("lsblk", ["-dno", "NAME,SERIAL"])),
+           "".join(f"{d['dev']} {d['serial']}\n" for d in disks))
+    _write(os.path.join(cmd, command_key("lsblk", ["-pno", "KNAME,LABEL,FSTYPE"])),
+           "".join(f"/dev/{d['dev']}1 {POOLS[d['idx'] % len(POOLS)]} zfs_member\n" for d in disks))
+    if with_storcli:
+        _write(os.path.join(cmd, command_key("storcli", ["/call", "show", "J"])), _storcli_show_json(disks))
+        _write(os.path.join(cmd, command_key("storcli", ["/call/eall/sall", "show", "all", "J"])),
+               _storcli_drives_json(disks))
+    if with_ircu:
+        _write(os.path.join(cmd, command_key("sas2ircu", ["LIST"])), _sas2ircu_list())
+        _write(os.path.join(cmd, command_key("sas2ircu", ["0", "DISPLAY"])), _sas2ircu_display(disks))
+
+    bin_dir = os.path.join(root, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    stub = os.path.join(bin_dir, "_replay")
+    _write(stub, STUB_SCRIPT)
+    os.chmod(stub, os.stat(stub).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    for tool in STUB_TOOLS:
+        if (tool == "sas2ircu" and not with_ircu) or (tool == "storcli" and not with_storcli):
+            continue
+        os.symlink("_replay", os.path.join(bin_dir, tool))
+
+    return {
+        "DASHBOARD_HOST_ROOT": root,
+        "DASHBOARD_BENCH_CMD_DIR": cmd,
+        "DASHBOARD_SCAN_HISTORY": os.path.join(root, "scan_history.json"),
+        "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+    }
@@ -0,0 +1,356 @@
+"""
+HTTP load test: N emulated dashboard browsers against the real FastHandler.
+
+Run from the repo root:
+    python3 -m bench.loadtest [--browsers 1 10 50] [--duration 20]
+    python3 -m bench.loadtest --browsers 100 --sim '{"controllers": 4, "bays_per_enclosure": 90}'
+    python3 -m bench.loadtest --process-split       # collectors in their own process
+
+The server runs in a child process with the same threads service.py starts
+(io, topology, alert, pool activity) and the simulator backend
+(DASHBOARD_SIMULATOR), so no real hardware is touched. It reads a temporary
+copy of config.json, so the repo copy is never rewritten.
+
+Each browser follows the frontend's request mix over its own keep-alive
+connections:
+    /data?t=...             every runtime.data_fetch_interval_ms (js/data.js)
+    /pool-activity?t=...    every 50 ms (ActivityMonitor.js)
+    /livereload-status      every 1200 ms (livereload.js)
+    /style-config + static  on page load, then again every --reload-secs
+Browsers are spread over --procs client processes so the client's GIL is not
+the bottleneck. Reports throughput, latency percentiles per endpoint and the
+server's CPU and RSS sampled from /proc/<pid>/stat.
+"""
+import argparse, http.client, json, multiprocessing, os, shutil, socket, subprocess, sys, tempfile, threading, time
+
+PAGE_ASSETS = ("/", "/style.css", "/Menu.css", "/ActivityMonitor.css", "/livereload.js",
+               "/ActivityMonitor.js", "/DecorationTexture.js", "/MenuSystem.js", "/app.js")
+DEFAULT_SIM = {"controllers": 1, "enclosures_per_controller": 1, "bays_per_enclosure": 90}
+
+
+# ── server side ──────────────────────────────────────────────────────────────
+
+def _serve(port, config_path):
+    """Child process: service.py's threads + ThreadingTCPServer on port."""
+    import socketserver
+    import py.config
+    py.config.CONFIG_FILE = config_path
+    py.config.STYLE_CONFIG_FILE = config_path
+    from py.server import FastHandler, start_collector_threads
+
+    class QuietHandler(FastHandler):
+        def log_message(self, format, *args):
+            pass
+
+    start_collector_threads(port)
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    with socketserver.ThreadingTCPServer(("127.0.0.1", port), QuietHandler) as httpd:
+        httpd.serve_forever()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _proc_sample(pid):
+    """(cpu_seconds, rss_bytes) for pid from /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat", "r") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    # fields[0] is state (field 3); utime/stime are fields 14/15, rss is field 24.
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+class ServerMonitor(threading.Thread):
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.samples = []   # (wall, cpu_seconds, rss)
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            try:
+                cpu, rss = _proc_sample(self.pid)
+                self.samples.append((time.time(), cpu, rss))
+            except OSError:
+                return
+            self._halt.wait(self.interval)
+
+    def window(self, start, end):
+        rows = [s for s in self.samples if start <= s[0] <= end]
+        if len(rows) < 2:
+            return {"cpu_pct_avg": None, "cpu_pct_max": None, "rss_mib_avg": None, "rss_mib_max": None}
+        cpu_pcts = [(b[1] - a[1]) / (b[0] - a[0]) * 100.0 for a, b in zip(rows, rows[1:]) if b[0] > a[0]]
+        total = (rows[-1][1] - rows[0][1]) / (rows[-1][0] - rows[0][0]) * 100.0
+        rss = [r[2] / (1024 * 1024) for r in rows]
+        return {"cpu_pct_avg": round(total, 1), "cpu_pct_max": round(max(cpu_pcts), 1),
+                "rss_mib_avg": round(sum(rss) / len(rss), 1), "rss_mib_max": round(max(rss), 1)}
+
+    def stop(self):
+        self._halt.set()
+
+
+# ── client side ──────────────────────────────────────────────────────────────
+
+class _Channel:
+    """One keep-alive connection, like one of a browser's sockets to the host."""
+
+    def __init__(self, port, timeout):
+        self.port, self.timeout = port, timeout
+        self.conn = None
+
+    def get(self, path):
+        """Return (status, body_bytes). Reconnects once if the server closed the socket."""
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout)
+            try:
+                self.conn.request("GET", path, headers={"Cache-Control": "no-store"})
+                response = self.conn.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self.conn.close()
+                    self.conn = None
+                return response.status, len(body)
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        return 0, 0
+
+
+def _browser(port, settings, deadline, results, lock):
+    """Runs one emulated browser until deadline; appends (endpoint, ms, ok, bytes) to results."""
+    timeout = 5.0
+    local = []
+
+    def _hit(channel, endpoint, path):
+        started = time.perf_counter()
+        try:
+            status, size = channel.get(path)
+            ok = status == 200
+        except Exception:
+            ok, size = False, 0
+            channel.conn = None
+        local.append((endpoint, (time.perf_counter() - started) * 1000.0, ok, size))
+
+    def _loop(endpoint, interval, path_fn, channel):
+        next_at = time.time()
+        while True:
+            now = time.time()
+            if now >= deadline:
+                return
+            if now < next_at:
+                time.sleep(min(next_at, deadline) - now)
+                continue
+            _hit(channel, endpoint, path_fn())
+            # setInterval semantics: keep the cadence, skip ticks we fell behind on.
+            next_at = max(next_at + interval, time.time())
+
+    def _page_load(channel):
+        for asset in PAGE_ASSETS:
+            _hit(channel, "static", asset)
+        _hit(channel, "/style-config", "/style-config")
+
+    misc = _Channel(port, timeout)
+    _page_load(misc)
+
+    def _misc_loop():
+        next_reload = time.time() + settings["reload_secs"]
+        next_live = time.time()
+        while time.time() < deadline:
+            now = time.time()
+            if now >= next_reload:
+                _page_load(misc)
+                next_reload = now + settings["reload_secs"]
+            if now >= next_live:
+                _hit(misc, "/livereload-status", f"/livereload-status?t={int(now * 1000)}")
+                next_live = now + 1.2
+            time.sleep(max(0.0, min(next_live, next_reload, deadline) - time.time()))
+
+    threads = [
+        threading.Thread(target=_loop, args=("/data", settings["data_interval"],
+                                             lambda: f"/data?t={int(time.time() * 1000)}", _Channel(port, timeout))),
+        threading.Thread(target=_loop, args=("/pool-activity", 0.05,
+                                             lambda: f"/pool-activity?t={int(time.time() * 1000)}", _Channel(port, timeout))),
+        threading.Thread(target=_misc_loop)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with lock:
+        results.extend(local)
+
+
+def _client_proc(port, browsers, settings, start_at, deadline, queue):
+    results, lock = [], threading.Lock()
+    time.sleep(max(0.0, start_at - time.time()))
+    threads = []
+    for i in range(browsers):
+        t = threading.Thread(target=_browser, args=(port, settings, deadline, results, lock), daemon=True)
+        t.start()
+        threads.append(t)
+        # Stagger page loads across the first second like real tabs opening.
+        time.sleep(min(0.02, 1.0 / max(browsers, 1)))
+    for t in threads:
+        t.join()
+    queue.put(results)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _summarise(rows, elapsed):
+    by_endpoint = {}
+    for endpoint, ms, ok, size in rows:
+        entry = by_endpoint.setdefault(endpoint, {"lat": [], "errors": 0, "bytes": 0})
+        entry["lat"].append(ms)
+        entry["bytes"] += size
+        if not ok:
+            entry["errors"] += 1
+    summary = {}
+    for endpoint, entry in sorted(by_endpoint.items()) + [("all", {
+        "lat": [r[1] for r in rows], "errors": sum(1 for r in rows if not r[2]), "bytes": sum(r[3] for r in rows)
+    })]:
+        lat = sorted(entry["lat"])
+        summary[endpoint] = {
+            "requests": len(lat),
+            "errors": entry["errors"],
+            "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+            "mib_per_s": round(entry["bytes"] / elapsed / (1024 * 1024), 2) if elapsed else 0.0,
+            "p50_ms": round(_percentile(lat, 50), 2) if lat else None,
+            "p95_ms": round(_percentile(lat, 95), 2) if lat else None,
+            "p99_ms": round(_percentile(lat, 99), 2) if lat else None
+        }
+    return summary
+
+
+def _wait_ready(port, timeout=60.0):
+    """Wait until /data carries a populated topology (first simulator scan done)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/data")
+            payload = json.loads(conn.getresponse().read())
+            conn.close()
+            if payload.get("topology"):
+                return True
+        except Exception:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def run_level(port, pid, browsers, args, settings):
+    procs = max(1, min(args.procs, browsers))
+    queue = multiprocessing.Queue()
+    start_at = time.time() + 0.5
+    deadline = start_at + args.duration
+    workers = []
+    for i in range(procs):
+        share = browsers // procs + (1 if i < browsers % procs else 0)
+        p = multiprocessing.Process(target=_client_proc, args=(port, share, settings, start_at, deadline, queue))
+        p.start()
+        workers.append(p)
+
+    monitor = ServerMonitor(pid)
+    monitor.start()
+    rows = []
+    for _ in workers:
+        rows.extend(queue.get())
+    for p in workers:
+        p.join()
+    monitor.stop()
+    # Skip the first second (page loads) for server resource numbers.
+    server = monitor.window(start_at + 1.0, deadline)
+    return {"browsers": browsers, "endpoints": _summarise(rows, args.duration), "server": server}
+
+
+def _print_level(level):
+    server = level["server"]
+    print(f"\n{level['browsers']} browser(s): server CPU avg {server['cpu_pct_avg']}% "
+          f"max {server['cpu_pct_max']}%, RSS avg {server['rss_mib_avg']} MiB max {server['rss_mib_max']} MiB")
+    print(f"  {'endpoint':<20} {'req':>8} {'err':>6} {'req/s':>9} {'MiB/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, row in level["endpoints"].items():
+        print(f"  {endpoint:<20} {row['requests']:>8} {row['errors']:>6} {row['rps']:>9.1f} {row['mib_per_s']:>7.2f} "
+              f"{row['p50_ms'] or 0:>8.2f} {row['p95_ms'] or 0:>8.2f} {row['p99_ms'] or 0:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--browsers", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per load level")
+    parser.add_argument("--procs", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="client processes")
+    parser.add_argument("--reload-secs", type=float, default=60.0, help="page reload interval per browser")
+    parser.add_argument("--sim", default=json.dumps(DEFAULT_SIM), help="simulator settings (JSON)")
+    parser.add_argument("--process-split", action="store_true",
+                        help="run collectors in a separate process (DASHBOARD_PROCESS_SPLIT=1); "
+                             "server CPU then excludes the collector process")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args.serve, args.config)
+        return 0
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix="dashboard-loadtest-")
+    config_path = os.path.join(workdir, "config.json")
+    shutil.copy(os.path.join(repo_root, "config.json"), config_path)
+    with open(config_path, "r") as fh:
+        config = json.load(fh)
+    data_interval_ms = (config.get("ui", {}).get("runtime", {}) or {}).get("data_fetch_interval_ms", 200)
+    settings = {"data_interval": max(0.01, float(data_interval_ms) / 1000.0), "reload_secs": args.reload_secs}
+
+    port = _free_port()
+    env = dict(os.environ, DASHBOARD_SIMULATOR=args.sim, DASHBOARD_PROCESS_SPLIT="1" if args.process_split else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "bench.loadtest", "--serve", str(port), "--config", config_path],
+        cwd=repo_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not _wait_ready(port):
+            raise SystemExit("server did not become ready")
+        print(f"server pid {server.pid} on port {port}; /data every {data_interval_ms} ms, "
+              f"{args.duration:g}s per level, {args.procs} client process(es)")
+        levels = []
+        for browsers in args.browsers:
+            level = run_level(port, server.pid, browsers, args, settings)
+            _print_level(level)
+            levels.append(level)
+        if args.output:
+            with open(args.output, "w") as fh:
+                json.dump({"meta": {"ts": round(time.time(), 3), "sim": json.loads(args.sim),
+                                    "duration": args.duration, "data_fetch_interval_ms": data_interval_ms,
+                                    "process_split": args.process_split},
+                           "levels": levels}, fh, indent=2)
+            print(f"wrote {args.output}")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
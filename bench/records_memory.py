@@ -0,0 +1,103 @@
+"""
+Memory benchmark: per-disk dict bays vs slotted DiskRecord bays.
+
+Run from the repo root:
+    python3 -m bench.records_memory [--bays 24 160 1000]
+
+Strings are rebuilt per disk (as they are when parsed from midclt/lsblk output)
+so the dict baseline does not get interning for free.
+"""
+import argparse, gc, json, tracemalloc
+
+from py.records import DiskRecord, EMPTY_BAY, serialize_topology
+
+POOLS = ("tank", "backup", "scratch")
+BAYS_PER_CHASSIS = 24
+
+
+def _fresh(text):
+    # New str object each call, like a value decoded from subprocess JSON.
+    return "".join(list(text))
+
+
+def _disk_fields(i):
+    return {
+        "sn": f"WD-WCC{i:08d}",
+        "size_bytes": 4000787030016,
+        "dev_name": f"sd{chr(97 + i % 26)}{chr(97 + (i // 26) % 26)}",
+        "pool_name": _fresh(POOLS[i % len(POOLS)]),
+        "pool_idx": i % 12 + 1,
+        "state": _fresh("ONLINE"),
+        "temperature_c": 30 + i % 15,
+        "read_errors": 0,
+        "write_errors": 0,
+        "cksum_errors": 0,
+    }
+
+
+def build_dict_topology(bays):
+    topology = {}
+    for start in range(0, bays, BAYS_PER_CHASSIS):
+        disks = []
+        for i in range(start, min(start + BAYS_PER_CHASSIS, bays)):
+            if i % 8 == 7:
+                disks.append({"status": "EMPTY"})
+                continue
+            disk = {"status": _fresh("PRESENT")}
+            disk.update(_disk_fields(i))
+            disks.append(disk)
+        topology[f"0000-03-00-0-e{start // BAYS_PER_CHASSIS}"] = {"settings": {"max_bays": len(disks)}, "disks": disks}
+    return topology
+
+
+def build_record_topology(bays):
+    topology = {}
+    for start in range(0, bays, BAYS_PER_CHASSIS):
+        disks = []
+        for i in range(start, min(start + BAYS_PER_CHASSIS, bays)):
+            if i % 8 == 7:
+                disks.append(EMPTY_BAY)
+                continue
+            disks.append(DiskRecord(**_disk_fields(i)))
+        topology[f"0000-03-00-0-e{start // BAYS_PER_CHASSIS}"] = {"settings": {"max_bays": len(disks)}, "disks": disks}
+    return topology
+
+
+def _measure(fn):
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def _serialize_dicts(topology):
+    # Mirrors the pre-DiskRecord /data path: one dict copy per disk per request.
+    return json.dumps({
+        pci: {"settings": data["settings"], "disks": [{**d, "active": False} for d in data["disks"]]}
+        for pci, data in topology.items()
+    })
+
+
+def run(bay_counts):
+    rows = []
+    for bays in bay_counts:
+        dict_topo, dict_bytes, _ = _measure(lambda: build_dict_topology(bays))
+        rec_topo, rec_bytes, _ = _measure(lambda: build_record_topology(bays))
+        _, _, dict_ser_peak = _measure(lambda: _serialize_dicts(dict_topo))
+        _, _, rec_ser_peak = _measure(lambda: json.dumps(serialize_topology(rec_topo)))
+        rows.append((bays, dict_bytes, rec_bytes, dict_ser_peak, rec_ser_peak))
+        del dict_topo, rec_topo
+
+    print(f"{'bays':>6} {'dict KiB':>10} {'record KiB':>11} {'saved':>7} {'/data dict KiB':>15} {'/data record KiB':>17}")
+    for bays, d, r, ds, rs in rows:
+        saved = (1 - r / d) * 100 if d else 0.0
+        print(f"{bays:>6} {d / 1024:>10.1f} {r / 1024:>11.1f} {saved:>6.1f}% {ds / 1024:>15.1f} {rs / 1024:>17.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bays", type=int, nargs="+", default=[24, 160, 1000])
+    run(parser.parse_args().bays)
@@ -0,0 +1,203 @@
+"""
+Scan-pipeline benchmark against synthetic fixture hosts (bench/fixtures.py).
+
+Run from the repo root:
+    python3 -m bench.scan_pipeline [--bays 12 60 160 400] [--repeat 5]
+    python3 -m bench.scan_pipeline --output after.json --compare before.json
+    python3 -m bench.scan_pipeline --no-ircu      # by-path fallback (lsblk per disk)
+    python3 -m bench.scan_pipeline --ses          # slots from /sys/class/enclosure (no tools)
+    python3 -m bench.scan_pipeline --no-ircu --storcli
+                                                  # slots from one cached storcli JSON query
+    python3 -m bench.scan_pipeline --hwmon        # temperatures from drivetemp sensors
+    python3 -m bench.scan_pipeline --engine asyncio --delay-ms 50
+                                                  # concurrent commands, 50 ms per tool call
+
+Each bay count runs in its own child process with DASHBOARD_HOST_ROOT and PATH
+pointing at a fresh fixture tree, so /dev, /sys, /proc and every midclt /
+smartctl / sas2ircu / lsblk / zpool call hit the fixtures instead of the host.
+Per-stage medians are printed as a table and written as JSON. "assembly" is
+build_chassis_topology minus its repeats of the tool calls the "ircu" stage
+already counts (LIST/DISPLAY, lsblk serials); by-path lsblk calls stay in it; "total" is one full scan_topology pass.
+"""
+import argparse, json, os, platform, shutil, statistics, subprocess, sys, tempfile, time
+
+from bench.fixtures import build_fixture_tree, HBA_PCI
+
+STAGES = ("identity", "smart", "zfs", "controllers", "ircu", "assembly", "serialize", "total")
+DEFAULT_OUTPUT = os.path.join("bench", "results", "scan_pipeline.json")
+
+
+def _time(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _command_seconds():
+    """Wall time of every runner command call so far (py/timings.py samples)."""
+    from py.timings import TIMINGS, TIMINGS_LOCK
+    with TIMINGS_LOCK:
+        return {name: (stats["count"], list(stats["samples"])) for name, stats in TIMINGS["command"].items()}
+
+
+def _commands_since(before):
+    """{name: seconds} of the command calls made since the before = _command_seconds() snapshot."""
+    spent = {}
+    for name, (count, samples) in _command_seconds().items():
+        new_calls = count - before.get(name, (0, []))[0]
+        if new_calls > 0:
+            spent[name] = sum(samples[-new_calls:])
+    return spent
+
+
+def _worker(repeat, engine):
+    """Runs inside the child process; prints {stage: [seconds, ...]} as JSON."""
+    import contextlib
+    from zfs_logic import _fetch_disk_temperatures_via_api
+    from py.collector import collect_zfs, build_chassis_topology, scan_topology
+    from py.identity import DeviceIdentityIndex
+    from py.records import serialize_topology
+    from py.topology import get_controller_capacity, is_virtual_storage_controller, get_ircu_slot_topology
+
+    config = {"collector": {"engine": engine}}
+    samples = {stage: [] for stage in STAGES}
+    bays_found = 0
+    with contextlib.redirect_stdout(sys.stderr):
+        for _ in range(repeat):
+            identity, t = _time(DeviceIdentityIndex.build)
+            samples["identity"].append(t)
+            temp_map, t = _time(_fetch_disk_temperatures_via_api)
+            samples["smart"].append(t)
+            (zfs_map, _), t = _time(collect_zfs, identity, temp_map)
+            samples["zfs"].append(t)
+
+            started = time.perf_counter()
+            if not is_virtual_storage_controller(HBA_PCI):
+                get_controller_capacity(HBA_PCI, config)
+            samples["controllers"].append(time.perf_counter() - started)
+
+            before = _command_seconds()
+            _, t = _time(get_ircu_slot_topology, HBA_PCI, zfs_map, config, temp_map, identity)
+            samples["ircu"].append(t)
+            ircu_commands = _commands_since(before)
+            before = _command_seconds()
+            topology, t = _time(build_chassis_topology, config, zfs_map, temp_map, identity)
+            repeated = sum(seconds for name, seconds in _commands_since(before).items() if name in ircu_commands)
+            samples["assembly"].append(max(0.0, t - repeated))
+            _, t = _time(lambda: json.dumps(serialize_topology(topology)))
+            samples["serialize"].append(t)
+            bays_found = sum(1 for chassis in topology.values() for d in chassis["disks"] if d.is_present)
+
+            snapshot, t = _time(scan_topology, config)
+            samples["total"].append(t)
+
+    json.dump({"samples": samples, "bays_found": bays_found}, sys.stdout)
+
+
+def _run_size(bays, repeat, with_ircu, engine="sequential", delay_ms=0, with_ses=False, with_storcli=False,
+              with_hwmon=False):
+    root = tempfile.mkdtemp(prefix=f"dashboard-bench-{bays}-")
+    try:
+        env = dict(os.environ)
+        env.update(build_fixture_tree(root, bays, with_ircu=with_ircu, with_ses=with_ses, with_storcli=with_storcli,
+                                      with_hwmon=with_hwmon))
+        if delay_ms:
+            env["DASHBOARD_BENCH_CMD_DELAY"] = f"{delay_ms / 1000.0:.3f}"
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.scan_pipeline", "--worker", "--repeat", str(repeat), "--engine", engine],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"worker for {bays} bays failed:\n{proc.stderr}")
+        return json.loads(proc.stdout)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _summarise(samples):
+    return {
+        stage: {
+            "median_ms": round(statistics.median(values) * 1000.0, 3),
+            "min_ms": round(min(values) * 1000.0, 3),
+            "max_ms": round(max(values) * 1000.0, 3)
+        }
+        for stage, values in samples.items() if values
+    }
+
+
+def _print_table(results, baseline=None):
+    header = f"{'bays':>6} " + " ".join(f"{stage:>12}" for stage in STAGES)
+    print("median ms per stage" + (" (delta vs baseline)" if baseline else ""))
+    print(header)
+    for bays, entry in results.items():
+        cells = []
+        for stage in STAGES:
+            value = entry["stages"].get(stage, {}).get("median_ms")
+            if value is None:
+                cells.append(f"{'-':>12}")
+                continue
+            cell = f"{value:.1f}"
+            base = ((baseline or {}).get(bays, {}).get("stages", {}).get(stage) or {}).get("median_ms")
+            if base:
+                cell += f" {(value - base) / base * 100:+.0f}%"
+            cells.append(f"{cell:>12}")
+        print(f"{bays:>6} " + " ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bays", type=int, nargs="+", default=[12, 60, 160, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-ircu", action="store_true", help="omit sas2ircu so chassis fall back to by-path")
+    parser.add_argument("--ses", action="store_true", help="link disks into their SES enclosure slots")
+    parser.add_argument("--storcli", action="store_true", help="add a storcli reporting the same drives")
+    parser.add_argument("--hwmon", action="store_true", help="give every disk a drivetemp hwmon sensor")
+    parser.add_argument("--engine", choices=("sequential", "asyncio"), default="sequential",
+                        help="collector.engine for the total (scan_topology) stage")
+    parser.add_argument("--delay-ms", type=int, default=0, help="added latency per replayed tool call")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="write results JSON here")
+    parser.add_argument("--compare", metavar="JSON", help="previous results file to diff against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker(max(1, args.repeat), args.engine)
+        return 0
+
+    results = {}
+    for bays in args.bays:
+        run = _run_size(bays, max(1, args.repeat), not args.no_ircu, args.engine, args.delay_ms, args.ses, args.storcli,
+                        args.hwmon)
+        results[str(bays)] = {"bays_found": run["bays_found"], "stages": _summarise(run["samples"])}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as fh:
+            baseline = json.load(fh).get("results")
+    _print_table(results, baseline)
+
+    report = {
+        "meta": {
+            "ts": round(time.time(), 3),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "ircu": not args.no_ircu,
+            "ses": args.ses,
+            "storcli": args.storcli,
+            "hwmon": args.hwmon,
+            "engine": args.engine,
+            "delay_ms": args.delay_ms
+        },
+        "results": results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Temperature-sweep benchmark: smartctl per disk vs kernel hwmon sensors.
+
+Run from the repo root:
+    python3 -m bench.temperature_sweep [--bays 12 60 160] [--repeat 5]
+    python3 -m bench.temperature_sweep --delay-ms 30   # 30 ms per smartctl call
+
+For each bay count the sweep (_fetch_disk_temperatures_via_api) runs twice in a
+child process against a fresh fixture tree (bench/fixtures.py): once with only
+the smartctl replay stub, once with a drivetemp hwmon sensor per disk. The
+table shows the median sweep and its cost per disk; both sources must produce
+the same temp_map.
+"""
+import argparse, json, os, platform, shutil, statistics, subprocess, sys, tempfile, time
+
+from bench.fixtures import build_fixture_tree
+
+SOURCES = ("smartctl", "hwmon")
+DEFAULT_OUTPUT = os.path.join("bench", "results", "temperature_sweep.json")
+
+
+def _worker(repeat):
+    """Runs inside the child process; prints the sweep samples and last temp_map as JSON."""
+    import contextlib
+    from zfs_logic import _fetch_disk_temperatures_via_api, smart_devices
+
+    samples = []
+    temps = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            temps = _fetch_disk_temperatures_via_api()
+            samples.append(time.perf_counter() - started)
+        disks = len(smart_devices())
+    json.dump({"samples": samples, "disks": disks, "temps": temps}, sys.stdout)
+
+
+def _run(bays, repeat, source, delay_ms):
+    root = tempfile.mkdtemp(prefix=f"dashboard-temps-{bays}-")
+    try:
+        env = dict(os.environ)
+        env.update(build_fixture_tree(root, bays, with_hwmon=source == "hwmon"))
+        if delay_ms:
+            env["DASHBOARD_BENCH_CMD_DELAY"] = f"{delay_ms / 1000.0:.3f}"
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.temperature_sweep", "--worker", "--repeat", str(repeat)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"worker for {bays} bays ({source}) failed:\n{proc.stderr}")
+        return json.loads(proc.stdout)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bays", type=int, nargs="+", default=[12, 60, 160])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--delay-ms", type=int, default=0, help="added latency per replayed smartctl call")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="write results JSON here")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker(max(1, args.repeat))
+        return 0
+
+    results = {}
+    print(f"{'bays':>6} {'source':>9} {'sweep ms':>10} {'ms/disk':>9} {'temps':>6}")
+    for bays in args.bays:
+        runs = {source: _run(bays, max(1, args.repeat), source, args.delay_ms) for source in SOURCES}
+        if runs["smartctl"]["temps"] != runs["hwmon"]["temps"]:
+            raise RuntimeError(f"{bays} bays: hwmon and smartctl temp_maps differ")
+        entry = {}
+        for source, run in runs.items():
+            median = statistics.median(run["samples"]) * 1000.0
+            per_disk = median / max(1, run["disks"])
+            entry[source] = {"median_ms": round(median, 3), "per_disk_ms": round(per_disk, 4),
+                             "temps": len(run["temps"])}
+            print(f"{bays:>6} {source:>9} {median:>10.1f} {per_disk:>9.3f} {len(run['temps']):>6}")
+        results[str(bays)] = entry
+
+    report = {
+        "meta": {
+            "ts": round(time.time(), 3),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "delay_ms": args.delay_ms
+        },
+        "results": results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+txgs kstat tailing benchmark and check (py/txg_stats.py).
+
+Run from the repo root:
+    python3 -m bench.txg_stats [--history 100 1000 10000] [--ticks 200]
+
+For each ring size (zfs_txg_history) a synthetic pool commits NEW_PER_TICK txgs
+per tick, with the newest ones still open/quiescing/syncing, and
+1. checks that tailing the ring tick by tick yields every committed txg exactly
+   once, in order (and that a ring which wrapped past the last seen txg is
+   counted as missed), and that a slow-sync minute raises slow_sync_pools();
+2. times the incremental tail against parsing the whole ring every tick.
+"""
+import argparse, sys, time
+
+NEW_PER_TICK = 3
+IN_FLIGHT = ("S", "W", "Q", "O")    # the newest txgs, oldest first
+MS = 1_000_000
+
+
+class Ring:
+    """A pool's txgs kstat: the last `history` txgs, the newest len(IN_FLIGHT) not yet committed."""
+
+    def __init__(self, history, sync_ms=400):
+        self.history = history
+        self.sync_ms = sync_ms
+        self.next_txg = 1000
+        self.rows = []
+        self.hr_now = time.clock_gettime_ns(time.CLOCK_MONOTONIC_RAW)
+
+    def advance(self, count):
+        for _ in range(count):
+            self.rows.append(self.next_txg)
+            self.next_txg += 1
+        del self.rows[:-self.history]
+        self.hr_now += count * 5000 * MS
+
+    def committed(self):
+        return self.rows[:len(self.rows) - len(IN_FLIGHT)]
+
+    def render(self):
+        lines = [f"18 0 0x01 {len(self.rows)} {len(self.rows) * 112} 5345346 536456546",
+                 f"{'txg':<16} {'birth':<16} {'state':<5} {'ndirty':<12} {'nread':<12} {'nwritten':<12} "
+                 f"{'reads':<8} {'writes':<8} {'otime':<12} {'qtime':<12} {'wtime':<12} {'stime':<12}"]
+        flight = {txg: state for txg, state in zip(self.rows[-len(IN_FLIGHT):], IN_FLIGHT)}
+        for age, txg in enumerate(reversed(self.rows)):
+            birth = self.hr_now - (age + 1) * 5000 * MS
+            state = flight.get(txg, "C")
+            done = state == "C"
+            lines.append(f"{txg:<16} {birth:<16} {state:<5} {txg * 4096:<12} {0:<12} {txg * 4096 if done else 0:<12} "
+                         f"{0:<8} {txg % 97 if done else 0:<8} {4900 * MS:<12} {2 * MS if done else 0:<12} "
+                         f"{MS if done else 0:<12} {self.sync_ms * MS if done else 0:<12}")
+        lines[2:] = reversed(lines[2:])
+        return ("\n".join(lines) + "\n").encode()
+
+    def clock(self):
+        return time.time(), self.hr_now
+
+
+def tail(ring, ticks, per_tick):
+    """Incremental tail over `ticks` ticks; returns (txgs seen, missed, seconds spent parsing)."""
+    from py.txg_stats import parse_new_txgs
+    seen, missed, spent, last = [], 0, 0.0, None
+    for _ in range(ticks):
+        ring.advance(per_tick)
+        data = ring.render()
+        started = time.perf_counter()
+        records, oldest = parse_new_txgs(data, len(data), last, ring.clock())
+        spent += time.perf_counter() - started
+        if last is not None and oldest is not None and oldest > last + 1:
+            missed += oldest - last - 1
+        if records:
+            last = records[-1][1]
+        seen.extend(record[1] for record in records)
+    return seen, missed, spent
+
+
+def full_parse(ring, ticks, per_tick):
+    from py.txg_stats import parse_new_txgs
+    spent = 0.0
+    for _ in range(ticks):
+        ring.advance(per_tick)
+        data = ring.render()
+        started = time.perf_counter()
+        parse_new_txgs(data, len(data), None, ring.clock())
+        spent += time.perf_counter() - started
+    return spent
+
+
+def check(history):
+    ring = Ring(history)
+    ring.advance(history - NEW_PER_TICK)    # the first tick fills the ring from txg 1000
+    seen, missed, _ = tail(ring, 50, NEW_PER_TICK)
+    expected = list(range(1000, ring.committed()[-1] + 1))
+    assert seen == expected, f"ring {history}: tail saw {len(seen)} txgs, expected {len(expected)}"
+    assert missed == 0, missed
+    # The ring wraps between two ticks: the lost txgs are reported, not invented.
+    wrapped = Ring(history)
+    wrapped.advance(history)
+    data = wrapped.render()
+    from py.txg_stats import parse_new_txgs
+    records, _ = parse_new_txgs(data, len(data), None, wrapped.clock())
+    last = records[-1][1]
+    wrapped.advance(history + 10)
+    data = wrapped.render()
+    records, oldest = parse_new_txgs(data, len(data), last, wrapped.clock())
+    assert oldest - last - 1 == 10 + len(IN_FLIGHT), (oldest, last)
+    return len(seen)
+
+
+def check_alert():
+    from py.txg_stats import parse_new_txgs, record_sample, slow_sync_pools, txg_status, TXG_HISTORY
+    TXG_HISTORY.clear()
+    pools = {}
+    for pool, sync_ms in (("fast", 300), ("nfs", 7500)):
+        ring = Ring(100, sync_ms)
+        ring.advance(12)            # one minute of 5 s txgs
+        data = ring.render()
+        pools[pool], _ = parse_new_txgs(data, len(data), None, ring.clock())
+    record_sample({"ts": time.time(), "pools": pools})
+    assert slow_sync_pools(5000) == ["nfs"], slow_sync_pools(5000)
+    assert slow_sync_pools(0) == []
+    window = txg_status()["pools"]["nfs"]["windows"]["60"]
+    assert window["sync_ms"]["p95"] == 7500 and window["quiesce_ms"]["max"] == 2, window
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    check_alert()
+    print("alert: p95 sync over threshold flags only the slow pool")
+    print(f"{'ring':>7} {'checked':>8} {'tail us/tick':>13} {'full us/tick':>13}")
+    for history in args.history:
+        checked = check(history)
+        ticks = max(1, args.ticks)
+        ring = Ring(history)
+        ring.advance(history)
+        _, _, tail_secs = tail(ring, ticks, NEW_PER_TICK)
+        ring = Ring(history)
+        ring.advance(history)
+        full_secs = full_parse(ring, ticks, NEW_PER_TICK)
+        print(f"{history:>7} {checked:>8} {tail_secs * 1e6 / ticks:>13.1f} {full_secs * 1e6 / ticks:>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+zpool iostat stream benchmark and parser check (py/zpool_iostat.py).
+
+Run from the repo root:
+    python3 -m bench.zpool_iostat [--bays 12 60 400] [--repeat 200]
+
+1. Parses RECORDED (two blocks of `zpool iostat -vlHp 1` from a pool with mirror,
+   single-disk, log, cache and special vdevs) and checks every row's kind, parent
+   and converted values.
+2. Times IostatStreamParser per block against fixture output (bench/fixtures.py)
+   for each bay count.
+3. Runs zpool_iostat_thread in a child process against the fixture's replayed
+   `zpool iostat -vlHp 1` and checks that every block after the first reaches
+   the history.
+4. Checks that the thread stays idle (near 0% CPU, config re-read every
+   IDLE_CHECK_SECS) with iostat_interval_secs = 0 after pools were noted.
+"""
+import argparse, json, os, shutil, subprocess, sys, tempfile, time
+
+from bench.fixtures import build_fixture_tree, _disk_spec, _zpool_iostat, POOLS, IOSTAT_INTERVALS
+
+RECORDED = "\n".join("\t".join(row.split()) for row in """
+tank 5497558138880 2199023255552 12 340 1572864 44564480 4123456 812345 3801234 701234 12345 23456 151234 81234 - - -
+mirror-0 2748779069440 1099511627776 6 170 786432 22282240 4000000 800000 3700000 690000 12000 23000 150000 80000 - - -
+sda1 - - 3 85 393216 11141120 4100000 810000 3750000 695000 12100 23100 151000 80500 - - -
+sdb1 - - 3 85 393216 11141120 3900000 790000 3650000 685000 11900 22900 149000 79500 - - -
+sdc1 2748779069440 1099511627776 6 170 786432 22282240 4200000 820000 3900000 710000 12500 23800 152000 82000 - - -
+logs - - - - - - - - - - - - - - - - -
+mirror-1 1073741824 8589934592 0 40 0 2621440 - 95000 - 90000 - 2000 - 3000 - - -
+nvme0n1p1 - - 0 20 0 1310720 - 94000 - 89000 - 2000 - 3000 - - -
+nvme1n1p1 - - 0 20 0 1310720 - 96000 - 91000 - 2000 - 3000 - - -
+cache - - - - - - - - - - - - - - - - -
+nvme2n1p1 107374182400 392842690560 25 3 3276800 393216 180000 250000 170000 240000 - - 9000 10000 - - -
+special - - - - - - - - - - - - - - - - -
+mirror-2 53687091200 160000000000 4 30 65536 491520 300000 600000 280000 550000 1000 2000 15000 40000 - - -
+sdd1 - - 2 15 32768 245760 300000 600000 280000 550000 1000 2000 15000 40000 - - -
+sde1 - - 2 15 32768 245760 300000 600000 280000 550000 1000 2000 15000 40000 - - -
+tank 5497558138880 2199023255552 14 360 1835008 47185920 4023456 802345 3701234 691234 12345 23456 141234 71234 - - -
+""".strip().splitlines()) + "\n"
+
+EXPECTED = {
+    "tank":      ("pool", None),
+    "mirror-0":  ("vdev", None),
+    "sda1":      ("disk", "mirror-0"),
+    "sdb1":      ("disk", "mirror-0"),
+    "sdc1":      ("disk", None),
+    "logs":      ("class", None),
+    "mirror-1":  ("vdev", "logs"),
+    "nvme0n1p1": ("disk", "mirror-1"),
+    "nvme1n1p1": ("disk", "mirror-1"),
+    "cache":     ("class", None),
+    "nvme2n1p1": ("disk", "cache"),
+    "special":   ("class", None),
+    "mirror-2":  ("vdev", "special"),
+    "sdd1":      ("disk", "mirror-2"),
+    "sde1":      ("disk", "mirror-2"),
+}
+
+
+def check_recorded():
+    from py.zpool_iostat import IostatStreamParser
+    parser = IostatStreamParser({"tank"})
+    samples = [sample for sample in map(parser.feed, RECORDED.splitlines()) if sample]
+    tail = parser.flush()
+    assert len(samples) == 1 and tail and len(tail["tank"]) == 1, "block boundaries"
+    rows = {name: (kind, parent, metrics) for name, kind, parent, metrics in samples[0]["tank"]}
+    assert list(rows) == list(EXPECTED), f"rows {list(rows)}"
+    for name, (kind, parent) in EXPECTED.items():
+        assert rows[name][:2] == (kind, parent), f"{name}: {rows[name][:2]} != {(kind, parent)}"
+    pool = rows["tank"][2]
+    assert (pool["ops_r"], pool["ops_w"], pool["bw_w"]) == (12.0, 340.0, 44564480.0), pool
+    assert (pool["total_wait_r_ms"], pool["asyncq_wait_w_ms"]) == (4.123, 0.081), pool
+    assert rows["logs"][2]["ops_w"] is None and rows["mirror-1"][2]["total_wait_r_ms"] is None
+    return len(rows)
+
+
+def _time_parser(bays, repeat):
+    from py.zpool_iostat import IostatStreamParser
+    disks = [_disk_spec(i) for i in range(bays)]
+    lines = _zpool_iostat(disks, intervals=repeat + 1).splitlines()
+    parser = IostatStreamParser(POOLS)
+    started = time.perf_counter()
+    blocks = sum(1 for line in lines if parser.feed(line))
+    elapsed = time.perf_counter() - started
+    rows_per_block = len(lines) / float(repeat + 1)
+    return {"blocks": blocks, "rows_per_block": rows_per_block,
+            "ms_per_block": round(elapsed * 1000.0 / max(1, blocks), 4)}
+
+
+def _worker():
+    """Child process: run the stream thread against the fixture stub and report the history."""
+    import contextlib, threading
+    from py.zpool_iostat import zpool_iostat_thread, note_pools, iostat_status
+    with contextlib.redirect_stdout(sys.stderr):
+        note_pools(POOLS)
+        config = {"collector": {"iostat_interval_secs": 1}}
+        threading.Thread(target=zpool_iostat_thread, args=(lambda: config,), daemon=True).start()
+        deadline = time.time() + 5
+        while time.time() < deadline and iostat_status()["samples"] < IOSTAT_INTERVALS - 1:
+            time.sleep(0.05)
+        status = iostat_status()
+    json.dump({
+        "samples": status["samples"],
+        "pools": {pool: {"vdevs": len(entry["vdevs"]), "history": len(entry["metrics"].get("ops_r", []))}
+                  for pool, entry in status["pools"].items()}
+    }, sys.stdout)
+
+
+def check_idle(seconds=1.0):
+    """Interval 0 with pools known: the thread must block, not re-read the config in a loop."""
+    import threading
+    from py.zpool_iostat import zpool_iostat_thread, note_pools
+    calls = []
+
+    def load_config():
+        calls.append(time.monotonic())
+        return {"collector": {"iostat_interval_secs": 0}}
+
+    note_pools(POOLS)
+    threading.Thread(target=zpool_iostat_thread, args=(load_config,), daemon=True).start()
+    time.sleep(0.1)
+    started_cpu, started = time.process_time(), time.monotonic()
+    time.sleep(seconds)
+    cpu_pct = (time.process_time() - started_cpu) * 100.0 / (time.monotonic() - started)
+    if cpu_pct > 5.0 or len(calls) > 3:
+        raise RuntimeError(f"idle iostat thread used {cpu_pct:.1f}% CPU and read the config {len(calls)} times")
+    return cpu_pct, len(calls)
+
+
+def _run_stream(bays):
+    root = tempfile.mkdtemp(prefix=f"dashboard-iostat-{bays}-")
+    try:
+        env = dict(os.environ)
+        env.update(build_fixture_tree(root, bays))
+        proc = subprocess.run([sys.executable, "-m", "bench.zpool_iostat", "--worker"],
+                              env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"stream worker for {bays} bays failed:\n{proc.stderr}")
+        return json.loads(proc.stdout)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bays", type=int, nargs="+", default=[12, 60, 400])
+    parser.add_argument("--repeat", type=int, default=200, help="blocks parsed per bay count")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker()
+        return 0
+
+    print(f"recorded output: {check_recorded()} rows parsed as expected")
+    cpu_pct, config_reads = check_idle()
+    print(f"idle (interval 0): {cpu_pct:.1f}% CPU, {config_reads} config reads in 1 s")
+    print(f"{'bays':>6} {'rows/block':>11} {'ms/block':>9} {'stream samples':>15}")
+    for bays in args.bays:
+        timing = _time_parser(bays, max(1, args.repeat))
+        stream = _run_stream(bays)
+        expected = IOSTAT_INTERVALS - 1
+        if stream["samples"] != expected:
+            raise RuntimeError(f"{bays} bays: {stream['samples']} stream samples, expected {expected}")
+        print(f"{bays:>6} {timing['rows_per_block']:>11.0f} {timing['ms_per_block']:>9.3f} {stream['samples']:>15}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Headless collector: runs the dashboard collectors without the web server and
+writes NDJSON snapshots to stdout.
+
+    python3 collect.py --once                       # one snapshot, then exit
+    python3 collect.py --interval 10                # stream a snapshot every 10s
+    python3 collect.py --once --sections diskstats  # skip ZFS/SMART/controllers
+
+Sections: topology (ZFS state + chassis/bay map; implies temps), temps,
+diskstats, services. Only the modules and commands a section needs run: a
+diskstats-only run never touches midclt/smartctl, and topology without
+services skips `midclt call service.query`.
+"""
+import argparse, contextlib, json, socket, sys, time
+
+SECTIONS = ("topology", "temps", "diskstats", "services")
+
+
+def _collect_once(sections, config, previous_diskstats, previous_ts):
+    now = time.time()
+    record = {"ts": round(now, 3), "hostname": socket.gethostname()}
+
+    if "topology" in sections:
+        from py.collector import scan_topology
+        from py.records import serialize_topology
+        snapshot = scan_topology(config, services="services" in sections)
+        record["topology"] = serialize_topology(snapshot["topology"])
+        record["pool_states"] = snapshot["pool_states"]
+        record["api_status"] = snapshot["api_status"]
+        if "services" in sections:
+            record["services"] = snapshot["services"]
+        if "temps" in sections:
+            record["temperatures"] = snapshot["temp_map"]
+    else:
+        if "temps" in sections:
+            from zfs_logic import _fetch_disk_temperatures_via_api
+            record["temperatures"] = _fetch_disk_temperatures_via_api()
+        if "services" in sections:
+            from py.collector import _read_enabled_services_status
+            record["services"] = _read_enabled_services_status()
+
+    diskstats = None
+    if "diskstats" in sections:
+        from py.diskstats import get_diskstats_for_pools
+        diskstats = get_diskstats_for_pools()
+        record["diskstats"] = diskstats
+        # Streaming mode: per-device byte rates since the previous snapshot.
+        if previous_diskstats and previous_ts:
+            elapsed = max(now - previous_ts, 1e-6)
+            record["diskstats_rate"] = {
+                dev: {
+                    "r_bps": round((stats["r"] - previous_diskstats[dev]["r"]) / elapsed, 2),
+                    "w_bps": round((stats["w"] - previous_diskstats[dev]["w"]) / elapsed, 2)
+                }
+                for dev, stats in diskstats.items() if dev in previous_diskstats
+            }
+
+    return record, diskstats, now
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emit dashboard collector snapshots as NDJSON.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="emit one snapshot and exit (default)")
+    mode.add_argument("--interval", type=float, metavar="SECS", help="stream a snapshot every SECS seconds")
+    parser.add_argument("--count", type=int, default=0, help="stop after N snapshots in streaming mode")
+    parser.add_argument("--sections", default=",".join(SECTIONS),
+                        help=f"comma-separated subset of: {', '.join(SECTIONS)}")
+    args = parser.parse_args(argv)
+
+    sections = {s.strip() for s in args.sections.split(",") if s.strip()}
+    unknown = sections - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+
+    config = {}
+    if "topology" in sections:
+        from py.config import load_config
+        with contextlib.redirect_stdout(sys.stderr):
+            config = load_config()
+
+    # Collectors print diagnostics; keep stdout clean NDJSON by sending those to stderr.
+    out = sys.stdout
+    emitted = 0
+    previous_diskstats, previous_ts = None, None
+    while True:
+        started = time.time()
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                record, previous_diskstats, previous_ts = _collect_once(sections, config, previous_diskstats, previous_ts)
+        except Exception as e:
+            record = {"ts": round(started, 3), "hostname": socket.gethostname(), "error": str(e)}
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        out.flush()
+        emitted += 1
+
+        if args.interval is None or (args.count and emitted >= args.count):
+            return 0
+        time.sleep(max(0.0, args.interval - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (KeyboardInterrupt, BrokenPipeError):
+        sys.exit(0)
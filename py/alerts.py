@@ -0,0 +1,231 @@
+import threading, time
+from collections import deque
+
+# Event-driven alert engine.
+#
+# Producers push their latest inputs with update_inputs(): the topology scanner
+# (pool_states, topology, services; in process-split mode split_sync_thread on
+# each new snapshot) and the txg sampler (txg_slow_pools). Only the rules that
+# read a changed input are re-evaluated; the disk walk runs once per scan, not
+# once a second. Each rule keeps its state (active, first/last seen, raised
+# and cleared times, raises within FLAP_WINDOW_SECS) and every transition is
+# appended to ALERT_EVENTS. GET /alert-events serves both.
+#
+# The beeper (alert_beeper_thread) waits on ALERT_COND: it sleeps until an alert
+# is raised, the mute expires or the next beep is due, never polling.
+
+BEEP_INTERVAL_SECS = 2.0
+FLAP_WINDOW_SECS = 600.0
+FLAP_THRESHOLD = 3                  # raises within the window that mark a rule as flapping
+EVENT_LIMIT = 200
+HIGH_TEMPERATURE_C = 40.0
+DISK_FAULT_STATES = ('FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED')
+
+# flag, banner name, input it reads; the order is the banner order.
+RULES = (
+    ("poolDegraded",      "Pool Health Alert",      "pool_states"),
+    ("diskFaultOrErrors", "Disk Fault/Error Alert", "topology"),
+    ("highTemperature",   "High Temperature Alert", "topology"),
+    ("servicesStopped",   "Services Stopped Alert", "services"),
+    ("txgSyncSlow",       "TXG Sync Time Alert",    "txg_slow_pools"),
+)
+
+ALERT_LOCK = threading.Lock()
+ALERT_COND = threading.Condition(ALERT_LOCK)
+ALERT_INPUTS = {"pool_states": {}, "topology": {}, "services": {}, "txg_slow_pools": []}
+ALERT_RULES = {
+    flag: {"name": name, "active": False, "detail": [], "first_seen": None, "last_seen": None,
+           "raised_at": None, "cleared_at": None, "raises": deque(), "evaluations": 0}
+    for flag, name, _ in RULES
+}
+ALERT_EVENTS = deque(maxlen=EVENT_LIMIT)
+ALERT_STATE = {"mute_until": 0.0, "version": 0, "payload": None}
+
+
+def _to_float_or_none(value):
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
+def _to_int_or_zero(value):
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+
+def _pool_rules(pool_states):
+    degraded = sorted(pool for pool, state in (pool_states or {}).items() if str(state or '').upper() != 'ONLINE')
+    return {"poolDegraded": degraded}
+
+
+def _disk_rules(topology):
+    faulted, hot = [], []
+    for enclosure in (topology or {}).values():
+        for disk in enclosure.get("disks", []):
+            if not disk.is_present:
+                continue
+            errors = (_to_int_or_zero(disk.read_errors) + _to_int_or_zero(disk.write_errors)
+                      + _to_int_or_zero(disk.cksum_errors))
+            if str(disk.state or '').upper() in DISK_FAULT_STATES or errors > 0:
+                faulted.append(disk.dev_name or disk.sn)
+            temperature_c = _to_float_or_none(disk.temperature_c)
+            if temperature_c is not None and temperature_c > HIGH_TEMPERATURE_C:
+                hot.append(disk.dev_name or disk.sn)
+    return {"diskFaultOrErrors": sorted(faulted), "highTemperature": sorted(hot)}
+
+
+def _service_rules(services):
+    services = services or {}
+    stopped = list(services.get("stopped") or [])
+    if services.get("hasStopped") and not stopped:
+        stopped = ["unknown"]
+    return {"servicesStopped": stopped}
+
+
+def _txg_rules(pools):
+    return {"txgSyncSlow": sorted(pools or [])}
+
+
+EVALUATORS = {"pool_states": _pool_rules, "topology": _disk_rules, "services": _service_rules,
+              "txg_slow_pools": _txg_rules}
+
+
+def _apply(flag, detail, now):
+    """Update one rule from its evaluation (lock held); returns (transition event or None, detail changed)."""
+    rule = ALERT_RULES[flag]
+    rule["evaluations"] += 1
+    active = bool(detail)
+    if active:
+        rule["last_seen"] = now
+        if rule["first_seen"] is None:
+            rule["first_seen"] = now
+    detail_changed = detail != rule["detail"]
+    rule["detail"] = detail
+    if active == rule["active"]:
+        return None, detail_changed
+    rule["active"] = active
+    raises = rule["raises"]
+    if active:
+        rule["raised_at"] = now
+        raises.append(now)
+    else:
+        rule["cleared_at"] = now
+    while raises and now - raises[0] > FLAP_WINDOW_SECS:
+        raises.popleft()
+    return {"ts": now, "flag": flag, "name": rule["name"], "event": "raised" if active else "cleared",
+            "detail": detail}, True
+
+
+def _build_payload():
+    """The /data "alerts" shape (lock held): one boolean per rule plus the banner names."""
+    payload, names = {}, []
+    for flag, name, _ in RULES:
+        active = ALERT_RULES[flag]["active"]
+        payload[flag] = active
+        if active:
+            names.append(name)
+    payload["txgSyncSlowPools"] = list(ALERT_RULES["txgSyncSlow"]["detail"])
+    payload["activeCount"] = len(names)
+    payload["activeNames"] = names
+    return payload
+
+
+def update_inputs(**inputs):
+    """Push new values for some inputs; re-evaluates only the rules reading an input that changed."""
+    now = time.time()
+    events, changed = [], False
+    with ALERT_COND:
+        for key, value in inputs.items():
+            if key not in EVALUATORS:
+                continue
+            previous = ALERT_INPUTS.get(key)
+            # A new topology object arrives with every scan; the smaller inputs are compared by value.
+            if value is previous or (key != "topology" and value == previous):
+                continue
+            ALERT_INPUTS[key] = value
+            for flag, detail in EVALUATORS[key](value).items():
+                event, rule_changed = _apply(flag, detail, now)
+                changed = changed or rule_changed
+                if event is not None:
+                    events.append(event)
+        if changed or ALERT_STATE["payload"] is None:
+            ALERT_STATE["payload"] = _build_payload()
+            ALERT_STATE["version"] += 1
+        payload = ALERT_STATE["payload"]
+        if events:
+            ALERT_EVENTS.extend(events)
+            ALERT_COND.notify_all()
+    for event in events:
+        print(f"Alert {event['event']}: {event['name']} {', '.join(map(str, event['detail']))}".rstrip())
+    return payload
+
+
+def current_alerts():
+    with ALERT_LOCK:
+        return dict(ALERT_STATE["payload"] or _build_payload())
+
+
+def mute_remaining_sec(now=None):
+    with ALERT_LOCK:
+        remaining = ALERT_STATE["mute_until"] - (time.time() if now is None else now)
+    return int(remaining + 0.999) if remaining > 0 else 0
+
+
+def mute(seconds):
+    """Silence the beeper for seconds (alerts stay active)."""
+    with ALERT_COND:
+        ALERT_STATE["mute_until"] = time.time() + seconds
+        ALERT_COND.notify_all()
+
+
+def _rule_status(flag, rule, now):
+    raises = [ts for ts in rule["raises"] if now - ts <= FLAP_WINDOW_SECS]
+    return {
+        "name": rule["name"],
+        "active": rule["active"],
+        "detail": list(rule["detail"]),
+        "first_seen": rule["first_seen"],
+        "last_seen": rule["last_seen"],
+        "raised_at": rule["raised_at"],
+        "cleared_at": rule["cleared_at"],
+        "flap_count": len(raises),
+        "flapping": len(raises) >= FLAP_THRESHOLD,
+        "evaluations": rule["evaluations"]
+    }
+
+
+def alert_events_status():
+    """Payload of GET /alert-events: per-rule state and the recent transition events (newest last)."""
+    now = time.time()
+    with ALERT_LOCK:
+        return {
+            "rules": {flag: _rule_status(flag, rule, now) for flag, rule in ALERT_RULES.items()},
+            "events": list(ALERT_EVENTS),
+            "flap_window_secs": FLAP_WINDOW_SECS
+        }
+
+
+def alert_beeper_thread(beep, interval=BEEP_INTERVAL_SECS):
+    """Call beep() every interval while an alert is active and not muted; otherwise block on ALERT_COND."""
+    last_beep = 0.0
+    while True:
+        with ALERT_COND:
+            while True:
+                now = time.time()
+                active = bool((ALERT_STATE["payload"] or {}).get("activeCount"))
+                muted_for = ALERT_STATE["mute_until"] - now
+                if not active:
+                    ALERT_COND.wait()
+                elif muted_for > 0:
+                    ALERT_COND.wait(muted_for)
+                elif now - last_beep < interval:
+                    ALERT_COND.wait(interval - (now - last_beep))
+                else:
+                    break
+        last_beep = time.time()
+        try:
+            beep()
+        except Exception as e: print(f"Alert beeper error: {e}")
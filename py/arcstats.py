@@ -0,0 +1,224 @@
+import os, threading, time
+from collections import deque
+from .paths import host_path
+from .demand import sampler_sleep
+from .governor import interval_scale
+
+# ARC / L2ARC statistics from /proc/spl/kstat/zfs/arcstats.
+#
+# arc_monitor_thread reads the kstat file every collector.arc_interval_secs and
+# turns two consecutive readings into one sample: hit ratios (all, demand,
+# prefetch, L2ARC) and rates from counter deltas, plus the current size, target
+# (c), MRU/MFU split and L2ARC size. Samples go into ARC_HISTORY, one
+# deque([0.0] * ARC_HISTORY_LIMIT) per series like the pool activity history,
+# served at GET /arc-stats. In process-split mode the collector publishes each
+# sample on the "arc" channel and the server keeps the history.
+#
+# The file has 100+ rows and is read at up to 1 Hz, so ArcstatsReader keeps it
+# open, preads into a reused buffer and finds just the rows in FIELDS in place;
+# the other rows are never split or decoded.
+
+ARCSTATS_PATH = '/proc/spl/kstat/zfs/arcstats'
+DEFAULT_INTERVAL_SECS = 1
+ARC_HISTORY_LIMIT = 120
+IDLE_CHECK_SECS = 30.0              # retry interval while the kstat file is missing or disabled
+INITIAL_BUFFER = 16384
+
+FIELDS = (
+    "hits", "misses",
+    "demand_data_hits", "demand_data_misses", "demand_metadata_hits", "demand_metadata_misses",
+    "prefetch_data_hits", "prefetch_data_misses", "prefetch_metadata_hits", "prefetch_metadata_misses",
+    "mru_hits", "mfu_hits", "mru_ghost_hits", "mfu_ghost_hits",
+    "size", "c", "c_max", "mru_size", "mfu_size",
+    "l2_hits", "l2_misses", "l2_size", "l2_read_bytes"
+)
+# kstat rows are "<name padded with spaces> <type> <value>"; the leading newline and
+# trailing space make each key match exactly one row ("c" never hits "c_max").
+_ROW_KEYS = tuple((b'\n' + name.encode() + b' ', name) for name in FIELDS)
+
+SERIES = (
+    "hit_ratio", "demand_hit_ratio", "prefetch_hit_ratio", "accesses_per_sec", "ghost_hits_per_sec",
+    "size_bytes", "target_bytes", "mru_pct", "mfu_pct", "mfu_hit_pct",
+    "l2_hit_ratio", "l2_size_bytes", "l2_read_bytes_per_sec"
+)
+RATIO_SERIES = ("hit_ratio", "demand_hit_ratio", "prefetch_hit_ratio", "mfu_hit_pct", "l2_hit_ratio")
+
+ARC_LOCK = threading.Lock()
+ARC_HISTORY = {series: deque([0.0] * ARC_HISTORY_LIMIT, maxlen=ARC_HISTORY_LIMIT) for series in SERIES}
+ARC_STATE = {
+    "available": False,
+    "interval_secs": DEFAULT_INTERVAL_SECS,
+    "samples": 0,
+    "last_sample_ts": None,
+    "c_max_bytes": None,
+    "l2_present": False,
+    "current": None,
+    "last_error": None
+}
+
+
+class ArcstatsReader:
+    """Keeps the kstat file open and re-reads it in place; read() -> {field: int} for FIELDS."""
+
+    def __init__(self, path=None):
+        self.path = path or host_path(ARCSTATS_PATH)
+        self.buf = bytearray(INITIAL_BUFFER)
+        self.fd = None
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+    def _fill(self):
+        """pread the whole file into self.buf; returns the length."""
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY)
+        length = 0
+        while True:
+            if length == len(self.buf):
+                self.buf = self.buf + bytearray(len(self.buf))
+            with memoryview(self.buf) as view:
+                count = os.preadv(self.fd, [view[length:]], length)
+            if count <= 0:
+                return length
+            length += count
+
+    def read(self):
+        try:
+            length = self._fill()
+        except OSError:
+            # The module was unloaded/reloaded: reopen on the next read.
+            self.close()
+            raise
+        buf, stats = self.buf, {}
+        for key, name in _ROW_KEYS:
+            start = buf.find(key, 0, length)
+            if start < 0:
+                continue            # older/newer OpenZFS without this row
+            end = buf.find(b'\n', start + 1, length)
+            fields = buf[start + len(key):end if end >= 0 else length].split()
+            if len(fields) == 2:
+                stats[name] = int(fields[1])
+        return stats
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return round(hits * 100.0 / total, 2) if total > 0 else None
+
+
+def _pct(part, other):
+    total = part + other
+    return round(part * 100.0 / total, 2) if total > 0 else None
+
+
+def compute_sample(previous, current, elapsed):
+    """Two readings elapsed seconds apart -> {series: value}; None for ratios without accesses,
+    or None overall when a counter went backwards (module reload)."""
+    get = current.get
+    delta = {}
+    for name in FIELDS:
+        if name in current and name in previous:
+            delta[name] = current[name] - previous[name]
+    counters = [value for name, value in delta.items() if name.endswith(('hits', 'misses', '_bytes'))]
+    if any(value < 0 for value in counters):
+        return None
+    d = delta.get
+    elapsed = max(elapsed, 1e-6)
+    demand_hits = d("demand_data_hits", 0) + d("demand_metadata_hits", 0)
+    demand_misses = d("demand_data_misses", 0) + d("demand_metadata_misses", 0)
+    prefetch_hits = d("prefetch_data_hits", 0) + d("prefetch_metadata_hits", 0)
+    prefetch_misses = d("prefetch_data_misses", 0) + d("prefetch_metadata_misses", 0)
+    return {
+        "hit_ratio":             _ratio(d("hits", 0), d("misses", 0)),
+        "demand_hit_ratio":      _ratio(demand_hits, demand_misses),
+        "prefetch_hit_ratio":    _ratio(prefetch_hits, prefetch_misses),
+        "accesses_per_sec":      round((d("hits", 0) + d("misses", 0)) / elapsed, 1),
+        "ghost_hits_per_sec":    round((d("mru_ghost_hits", 0) + d("mfu_ghost_hits", 0)) / elapsed, 1),
+        "size_bytes":            float(get("size", 0)),
+        "target_bytes":          float(get("c", 0)),
+        "mru_pct":               _pct(get("mru_size", 0), get("mfu_size", 0)),
+        "mfu_pct":               _pct(get("mfu_size", 0), get("mru_size", 0)),
+        "mfu_hit_pct":           _pct(d("mfu_hits", 0), d("mru_hits", 0)),
+        "l2_hit_ratio":          _ratio(d("l2_hits", 0), d("l2_misses", 0)),
+        "l2_size_bytes":         float(get("l2_size", 0)),
+        "l2_read_bytes_per_sec": round(d("l2_read_bytes", 0) / elapsed, 1)
+    }
+
+
+def record_sample(sample, ts=None):
+    """Append one published sample to ARC_HISTORY ("scale" copies when sampling was stretched).
+    A ratio without accesses in the interval repeats the previous value."""
+    with ARC_LOCK:
+        values = sample.get("values") or {}
+        scale = max(1, min(ARC_HISTORY_LIMIT, int(sample.get("scale", 1))))
+        current = {}
+        for series in SERIES:
+            history = ARC_HISTORY[series]
+            value = values.get(series)
+            if value is None:
+                value = history[-1] if series in RATIO_SERIES else 0.0
+            current[series] = value
+            history.extend([value] * scale)
+        ARC_STATE.update(
+            available=True, current=current, samples=ARC_STATE["samples"] + 1,
+            last_sample_ts=time.time() if ts is None else ts,
+            c_max_bytes=sample.get("c_max_bytes"), l2_present=bool(sample.get("l2_present"))
+        )
+
+
+def arc_status():
+    """Payload of GET /arc-stats: current values and per-series history."""
+    with ARC_LOCK:
+        return dict(ARC_STATE, history={series: list(values) for series, values in ARC_HISTORY.items()})
+
+
+def _interval(config):
+    try:
+        return max(0, float(((config or {}).get('collector') or {}).get('arc_interval_secs', DEFAULT_INTERVAL_SECS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECS
+
+
+def arc_monitor_thread(load_config, publish=None):
+    """Sample arcstats every collector.arc_interval_secs and feed the samples to publish (default record_sample)."""
+    publish = publish or record_sample
+    reader = ArcstatsReader()
+    last, last_ts = None, None
+    while True:
+        interval = _interval(load_config())
+        with ARC_LOCK:
+            ARC_STATE["interval_secs"] = interval
+        if interval <= 0:
+            reader.close()
+            last = None
+            time.sleep(IDLE_CHECK_SECS)
+            continue
+        try:
+            current = reader.read()
+            now = time.monotonic()
+        except OSError as e:
+            with ARC_LOCK:
+                ARC_STATE.update(available=False, last_error=str(e))
+            last = None
+            time.sleep(IDLE_CHECK_SECS)
+            continue
+        if last is not None:
+            elapsed = now - last_ts
+            values = compute_sample(last, current, elapsed)
+            if values is not None:
+                try:
+                    publish({
+                        "values": values,
+                        # Stretched sampling (governor / idle) stands in for the ticks it covered.
+                        "scale": max(1, int(round(elapsed / interval))),
+                        "c_max_bytes": current.get("c_max"),
+                        "l2_present": bool(current.get("l2_size") or current.get("l2_hits") or current.get("l2_misses"))
+                    })
+                except Exception as e: print(f"ARC stats publish error: {e}")
+        last, last_ts = current, now
+        sampler_sleep(interval * interval_scale())
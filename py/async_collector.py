@@ -0,0 +1,124 @@
+import asyncio, os, re
+from zfs_logic import smart_probe_devices, smart_command, check_truenas_api, api_is_healthy
+from .topology import _find_ircu_adapter, is_virtual_storage_controller
+from .paths import host_path
+from .runner import run_command_async, find_tool
+from .enclosure import has_ses_slot_links
+from .storcli import storcli_tool, storcli_enclosures, DRIVE_QUERY
+
+# asyncio collection engine (collector.engine = "asyncio").
+#
+# The sequential engine forks midclt, smartctl, ircu and lsblk one after another,
+# so a scan costs the sum of every call. This engine launches the scan's
+# commands concurrently with asyncio.create_subprocess_exec, each under its tool
+# deadline, and stores the results in the runner's per-cycle prefetch cache.
+# scan_topology() then runs the unchanged assembly code, whose run_command()
+# calls are answered from the cache, so the outputs are identical to the
+# sequential engine and the command phase costs roughly the slowest call.
+#
+#   wave 1  smartctl per disk without a hwmon sensor, midclt pool.query +
+#           service.query (or zpool status while the API is degraded), lsblk serials, ircu LIST and the storcli
+#           drive query (unless SES maps every controller)
+#   wave 2  ircu DISPLAY for each HBA the LIST output maps, lsblk serial+size
+#           per /dev/disk/by-path link on controllers without an ircu adapter
+#           (controllers mapped through SES or storcli need neither)
+# Anything not prefetched (rare fallbacks) still runs synchronously on a miss.
+
+ENGINES = ("sequential", "asyncio")
+DEFAULT_MAX_CONCURRENT = 4           # never above the runner's global MAX_CONCURRENT_COMMANDS
+IRCU_TOOLS = ("sas3ircu", "sas2ircu")
+
+
+def collector_engine(config):
+    engine = str(((config or {}).get('collector') or {}).get('engine', 'sequential')).strip().lower()
+    return engine if engine in ENGINES else 'sequential'
+
+
+def _max_concurrent(config):
+    try:
+        return max(1, int(((config or {}).get('collector') or {}).get('max_concurrent_commands', DEFAULT_MAX_CONCURRENT)))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_CONCURRENT
+
+
+def _controller_links():
+    """{pci_raw: [by-path link, ...]} for physical controllers, as build_chassis_topology walks them."""
+    controllers = {}
+    path_dir = host_path('/dev/disk/by-path')
+    if not os.path.exists(path_dir):
+        return controllers
+    for entry in os.scandir(path_dir):
+        if not entry.is_symlink() or "-part" in entry.name:
+            continue
+        pci_match = re.search(r'pci-([0-9a-fA-F:.]+)', entry.name)
+        if not pci_match:
+            continue
+        controllers.setdefault(pci_match.group(1), []).append(entry.path)
+    return {pci: links for pci, links in controllers.items() if not is_virtual_storage_controller(pci)}
+
+
+def _first_wave(smart=True, services=True):
+    """(cmd, name, check, timeout) for the calls that don't depend on other output; timeout None is the tool default."""
+    plan = [(smart_command(path, dev_type), None, False, None) for path, dev_type in smart_probe_devices()] if smart else []
+    if check_truenas_api() and api_is_healthy():
+        plan.append((['midclt', 'call', 'pool.query'], "midclt pool.query", True, None))
+        if services:
+            plan.append((['midclt', 'call', 'service.query'], "midclt service.query", True, None))
+    else:
+        plan.append((['zpool', 'status', '-v', '-p'], "zpool status", True, None))
+    plan.append((["lsblk", "-dno", "NAME,SERIAL"], "lsblk serials", True, None))
+    if not all(has_ses_slot_links(pci_raw) for pci_raw in _controller_links()):
+        for tool in IRCU_TOOLS:
+            if find_tool(tool):
+                plan.append(([tool, "LIST"], f"{tool} LIST", True, 2))   # same deadline as _find_ircu_adapter
+        storcli = storcli_tool()
+        if storcli:
+            plan.append(([storcli] + DRIVE_QUERY, "storcli drives", True, None))
+    return plan
+
+
+def _second_wave():
+    """Planned from wave-1 output; _find_ircu_adapter reads LIST from the prefetch cache."""
+    plan = []
+    for pci_raw, links in _controller_links().items():
+        if has_ses_slot_links(pci_raw):
+            continue                # mapped from /sys/class/enclosure, no tool calls
+        adapter = None
+        for tool in IRCU_TOOLS:
+            if not find_tool(tool):
+                continue
+            adapter_id = _find_ircu_adapter(tool, pci_raw)
+            if adapter_id is not None:
+                adapter = (tool, adapter_id)
+                break
+        if adapter:
+            plan.append(([adapter[0], str(adapter[1]), "DISPLAY"], f"{adapter[0]} DISPLAY", False, None))
+        elif storcli_tool() and storcli_enclosures(pci_raw):
+            continue                # mapped from the storcli drive query above
+        else:
+            plan.extend((['lsblk', '-dbno', 'SERIAL,SIZE', link], "lsblk serial+size", True, None) for link in links)
+    return plan
+
+
+async def _run_wave(plan, cache, semaphore):
+    pending = {}
+    for cmd, name, check, timeout in plan:
+        key = tuple(str(part) for part in cmd)
+        if key not in cache and key not in pending:
+            pending[key] = run_command_async(cmd, timeout=timeout, name=name, check=check, semaphore=semaphore)
+    results = await asyncio.gather(*pending.values(), return_exceptions=True)
+    cache.update(zip(pending.keys(), results))
+
+
+async def _prefetch(cache, limit, smart, services):
+    semaphore = asyncio.Semaphore(limit)
+    await _run_wave(_first_wave(smart, services), cache, semaphore)
+    await _run_wave(_second_wave(), cache, semaphore)
+
+
+def prefetch_scan_commands(cache, config, smart=True, services=True):
+    """Fill a runner prefetch cache (runner.prefetch_scope) with this cycle's command results.
+    smart=False leaves out the smartctl sweep (the governor skipped it this scan);
+    services=False leaves out service.query (scan_topology(services=False))."""
+    asyncio.run(_prefetch(cache, _max_concurrent(config), smart, services))
+    return len(cache)
@@ -0,0 +1,241 @@
+import json, os, re, time
+from contextlib import nullcontext
+from zfs_logic import get_zfs_topology, get_api_status, api_is_healthy, _fetch_disk_temperatures_via_api
+from .topology import (get_controller_capacity, is_virtual_storage_controller, get_ircu_slot_topology,
+                       get_storcli_slot_topology, make_disk_record)
+from .enclosure import get_ses_slot_topology
+from .records import EMPTY_BAY
+from .identity import DeviceIdentityIndex
+from .paths import host_path
+from .simulator import active_simulator
+from .timings import timed, record
+from .runner import command_output, prefetch_scope
+from .async_collector import collector_engine, prefetch_scan_commands
+from .governor import smart_sweep_due
+
+# Topology collection shared by the HTTP service (topology_scanner_thread) and the
+# headless collector CLI (collect.py). Nothing here imports the HTTP stack.
+
+# Last SMART sweep, reused on scans the governor skips the sweep for.
+_LAST_TEMP_MAP = {}
+
+
+def _read_enabled_services_status():
+    if not api_is_healthy():
+        # Same backoff as pool.query: don't spend a midclt timeout per scan while degraded.
+        return {
+            'tracked': [],
+            'stopped': [],
+            'hasStopped': False,
+            'source': 'truenas-api',
+            'error': 'TrueNAS API unavailable; service status paused'
+        }
+    try:
+        output = command_output(['midclt', 'call', 'service.query'], name="midclt service.query")
+        rows = json.loads(output)
+        tracked = []
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, dict):
+                continue
+
+            enabled = bool(row.get('enable', False))
+            if not enabled:
+                continue
+
+            name = str(row.get('service') or row.get('id') or 'unknown')
+            state = str(row.get('state') or 'UNKNOWN').upper()
+            running = state == 'RUNNING'
+            tracked.append({
+                'name': name,
+                'state': state,
+                'running': running,
+                'enabled': True
+            })
+
+        tracked.sort(key=lambda item: item.get('name', '').lower())
+        stopped = [item['name'] for item in tracked if not item.get('running', False)]
+
+        return {
+            'tracked': tracked,
+            'stopped': stopped,
+            'hasStopped': len(stopped) > 0,
+            'source': 'truenas-api',
+            'error': None
+        }
+    except Exception as ex:
+        return {
+            'tracked': [],
+            'stopped': [],
+            'hasStopped': False,
+            'source': 'truenas-api',
+            'error': str(ex)
+        }
+
+
+def collect_zfs(identity, temp_map=None):
+    """Return (zfs_map, pool_states) keyed by canonical disk; registers vdev GUIDs in identity."""
+    zfs_map, pool_states = get_zfs_topology(identity, temp_map=temp_map)
+    identity.add_zfs_guids(zfs_map)
+    return zfs_map, pool_states
+
+
+def build_chassis_topology(config, zfs_map, temp_map, identity):
+    """Walk /dev/disk/by-path and build {chassis_key: {settings, disks}} (SES, ircu, storcli, then by-path)."""
+    new_topology = {}
+    controller_capacity = {}
+    path_dir = host_path('/dev/disk/by-path')
+    if os.path.exists(path_dir):
+        for entry in os.scandir(path_dir):
+            if entry.is_symlink() and "-part" not in entry.name:
+                pci_match = re.search(r'pci-([0-9a-fA-F:.]+)', entry.name)
+                if not pci_match: continue
+                pci_raw = pci_match.group(1)
+                pci_key = pci_raw.replace(':', '-').replace('.', '-')
+
+                # Skip virtual storage controllers (only show physical HBAs/RAID controllers)
+                if is_virtual_storage_controller(pci_raw):
+                    continue
+
+                if pci_key not in controller_capacity:
+                    with timed("stage", "controller capacity"):
+                        max_bays, has_backplane, ports, capacity_unknown = get_controller_capacity(pci_raw, config)
+                    controller_capacity[pci_key] = {
+                        "max_bays": max_bays,
+                        "has_backplane": has_backplane,
+                        "ports": ports,
+                        "capacity_unknown": capacity_unknown,
+                        "ircu_handled": False
+                    }
+
+                # If this controller was fully mapped via ircu on first encounter, skip remaining symlinks
+                if controller_capacity[pci_key].get("ircu_handled"):
+                    continue
+
+                if pci_key not in new_topology and not any(
+                    k.startswith(pci_key + "-e") or k == pci_key + "-da"
+                    for k in new_topology
+                ):
+                    # Try SES (/sys/class/enclosure), ircu and storcli - all give authoritative per-slot
+                    # data. Each returns a dict of per-enclosure chassis entries (one per backplane +
+                    # one for direct-attach); each is stored as its own key in new_topology.
+                    ircu_topos = get_ses_slot_topology(
+                        pci_raw, zfs_map, config, temp_map=temp_map, identity=identity
+                    ) or get_ircu_slot_topology(
+                        pci_raw, zfs_map, config, temp_map=temp_map, identity=identity
+                    ) or get_storcli_slot_topology(
+                        pci_raw, zfs_map, config, temp_map=temp_map, identity=identity
+                    )
+                    if ircu_topos:
+                        for sub_key, topo in ircu_topos.items():
+                            new_topology[sub_key] = topo
+                        controller_capacity[pci_key]["ircu_handled"] = True
+                        continue
+
+                    # Fall through to standard /dev/disk/by-path approach
+                    rows = 1
+                    bays_per_row = controller_capacity[pci_key]["max_bays"]
+
+                    new_topology[pci_key] = {
+                        "settings": {
+                            "pci_raw": pci_raw,
+                            "array_address": "",
+                            "array_id": "",
+                            "max_bays": controller_capacity[pci_key]["max_bays"],
+                            "has_backplane": controller_capacity[pci_key]["has_backplane"],
+                            "ports": controller_capacity[pci_key]["ports"],
+                            "capacity_unknown": controller_capacity[pci_key]["capacity_unknown"],
+                            "rows": rows,
+                            "bays_per_row": bays_per_row
+                        },
+                        "disks": []
+                    }
+
+                match = re.search(r'(phy|ata|sas|port|slot|exp)(\d+)', entry.name)
+                bay_num = int(match.group(2)) if match else 0
+
+                while bay_num >= len(new_topology[pci_key]["disks"]):
+                    new_topology[pci_key]["disks"].append(EMPTY_BAY)
+
+                dev_name = os.path.basename(os.path.realpath(entry.path))
+                try:
+                    out = command_output(['lsblk', '-dbno', 'SERIAL,SIZE', entry.path], name="lsblk serial+size").split()
+                    sn, size = (out[0], int(out[1])) if len(out) >= 2 else ("", 0)
+                except: sn, size = "", 0
+
+                new_topology[pci_key]["disks"][bay_num] = make_disk_record(
+                    zfs_map, dev_name, temp_map, sn=sn, size_bytes=size, identity=identity, prefer_smart=False
+                )
+
+    for pci_key, data in new_topology.items():
+        max_bays = data["settings"].get("max_bays", 0)
+        if max_bays and len(data["disks"]) < max_bays:
+            while len(data["disks"]) < max_bays:
+                data["disks"].append(EMPTY_BAY)
+
+    return new_topology
+
+
+def scan_topology(config, services=True):
+    """
+    Run one full collection pass: identity index, SMART temperatures, ZFS state,
+    services and chassis topology. Returns a snapshot dict; callers decide where
+    to publish it (GLOBAL_DATA, NDJSON, ...). snapshot["durations"] holds
+    per-stage wall time in seconds. collector.engine selects sequential or
+    asyncio (py/async_collector.py) command execution; the output is the same.
+    services=False skips `midclt call service.query` (snapshot["services"] is None).
+    """
+    durations = {}
+    scan_started = time.perf_counter()
+
+    def _stage(name, fn, *args):
+        started = time.perf_counter()
+        try:
+            with timed("stage", name):
+                return fn(*args)
+        finally:
+            durations[name] = time.perf_counter() - started
+
+    # The simulator replaces the host-facing sources; assembly code is shared.
+    sim = active_simulator(config)
+    # asyncio engine: run the cycle's commands concurrently first; the stages below
+    # then read their output from the runner's prefetch cache.
+    prefetch = sim is None and collector_engine(config) == "asyncio"
+    # Under CPU pressure the governor stretches the SMART sweep over several scans.
+    sweep_smart = sim is not None or smart_sweep_due() or not _LAST_TEMP_MAP
+
+    with prefetch_scope() if prefetch else nullcontext() as cache:
+        if prefetch:
+            _stage("prefetch", prefetch_scan_commands, cache, config, sweep_smart, services)
+
+        # One alias -> canonical disk index per scan (partuuid, by-id, serial, WWN, ...)
+        identity = _stage("identity", sim.identity_index if sim else DeviceIdentityIndex.build)
+        # Temperatures are swept once and shared by the ZFS and chassis stages.
+        if sweep_smart:
+            temp_map = _stage("smart", sim.temperatures if sim else _fetch_disk_temperatures_via_api)
+            if not sim:
+                _LAST_TEMP_MAP.clear()
+                _LAST_TEMP_MAP.update(temp_map)
+        else:
+            temp_map = dict(_LAST_TEMP_MAP)
+
+        # Get ZFS topology and pool states from API or fallback
+        zfs_map, pool_states = _stage("zfs", sim.zfs_topology if sim else collect_zfs, identity, temp_map)
+        api_status = sim.api_status() if sim else get_api_status()
+        if services:
+            services = _stage("services", sim.services_status if sim else _read_enabled_services_status)
+        else:
+            services = None
+        topology = _stage("chassis", sim.chassis_topology if sim else build_chassis_topology,
+                          config, zfs_map, temp_map, identity)
+    durations["total"] = time.perf_counter() - scan_started
+    record("stage", "total", durations["total"])
+
+    return {
+        "topology": topology,
+        "pool_states": pool_states,
+        "api_status": api_status,
+        "services": services,
+        "zfs_map": zfs_map,
+        "temp_map": temp_map,
+        "durations": durations
+    }
@@ -69,6 +69,48 @@ DEFAULT_CONFIG = {
             }
         ]
     },
+    "__REMARK_FEDERATION": "Aggregator mode: poll other dashboard instances and merge them at /federation/data and /federation/pool-activity.\nPeers are URL strings or {\"name\": ..., \"url\": \"http://host:8010\"} objects.",
+    "federation": {
+        "enabled": False,
+        "peers": [],
+        "timeout_ms": 2000,
+        "data_interval_ms": 1000,
+        "pool_activity_interval_ms": 500
+    },
+    "__REMARK_SIMULATOR": "Synthetic hardware for load testing. When enabled, ZFS, controller, SMART and diskstats data come from py/simulator.py instead of the host.\nThe DASHBOARD_SIMULATOR environment variable (\"1\" or a JSON object of these keys) overrides this section.",
+    "simulator": {
+        "enabled": False,
+        "seed": 1,
+        "controllers": 1,
+        "enclosures_per_controller": 1,
+        "bays_per_enclosure": 90,
+        "fill_ratio": 1.0,
+        "pools": 2,
+        "vdev_type": "RAIDZ2",
+        "vdev_width": 10,
+        "io_mbps_per_pool": 400,
+        "read_ratio": 0.6,
+        "temp_base_c": 34,
+        "temp_drift_c": 4,
+        "temp_period_secs": 900,
+        "failure_rate_per_hour": 2.0,
+        "recovery_secs": 300,
+        "resilver_secs": 120
+    },
+    "__REMARK_COLLECTOR": "Backend collection runtime. process_split runs the samplers and topology scanner in a separate collector process that publishes snapshots through shared memory (/dev/shm); the web server only reads them. Restart the service after changing it.\nThe DASHBOARD_PROCESS_SPLIT environment variable (1 or 0) overrides this setting.\nengine: \"sequential\" runs midclt/smartctl/ircu/lsblk one after another; \"asyncio\" launches each scan's commands concurrently (at most max_concurrent_commands at once, and never more than the runner's global cap of 4) and assembles the same topology from their results.\ncpu_budget_pct: the service's own CPU target (percent of one core, measured from /proc/self/stat). Above it the io/pool activity samplers and the SMART sweep slow down (up to 8x) and recover once usage drops; 0 disables the governor. Effective rates are reported in /data under \"governor\".\nidle_after_secs: with no dashboard request (/data, /pool-activity) for this long, the io/pool activity samplers drop to one tick every idle_interval_secs and resume full rate on the next request; alerts and scans keep their cadence. 0 keeps full-rate sampling. The current state is in /debug/timings under \"demand\".\niostat_interval_secs: interval of the long-running `zpool iostat -vlHp` child that feeds per-pool and per-vdev ops, bandwidth and latency history (GET /pool-iostat); 0 disables it.\narc_interval_secs: how often /proc/spl/kstat/zfs/arcstats is sampled for the ARC/L2ARC hit ratios, size and MRU/MFU history (GET /arc-stats); 0 disables it.\ndataset_interval_secs: how often the per-dataset objset kstats (/proc/spl/kstat/zfs/<pool>/objset-*) are read for the busiest-datasets ranking (GET /dataset-io); 0 disables it.\ntxg_interval_secs: how often each pool's txgs kstat ring is tailed for transaction-group open/quiesce/wait/sync times and dirty bytes (GET /txg-stats); 0 disables it.\ntxg_sync_alert_ms: raise the TXG Sync Time Alert while a pool's p95 txg sync time over the last minute exceeds this; 0 disables the alert.",
+    "collector": {
+        "process_split": False,
+        "engine": "sequential",
+        "max_concurrent_commands": 4,
+        "cpu_budget_pct": 25,
+        "idle_after_secs": 30,
+        "idle_interval_secs": 2,
+        "iostat_interval_secs": 1,
+        "arc_interval_secs": 1,
+        "dataset_interval_secs": 5,
+        "txg_interval_secs": 1,
+        "txg_sync_alert_ms": 5000
+    },
     "__REMARK_UI": "Dashboard UI configuration. All values are applied live without restart.\nUse style arrays to combine: [\"bold\", \"italic\", \"allcaps\"]",
     "ui": {
         "__REMARK_SERVER_NAME": "Server name display (top-left of each chassis).",
@@ -0,0 +1,210 @@
+import os, threading, time
+from collections import deque
+from .paths import host_path
+from .demand import sampler_sleep
+from .governor import interval_scale
+
+# Per-dataset I/O from the objset kstats (/proc/spl/kstat/zfs/<pool>/objset-0x<id>).
+#
+# Every filesystem and zvol has one objset file with cumulative reads/nread and
+# writes/nwritten counters plus its dataset_name. dataset_io_thread lists the
+# objset files every DISCOVERY_SECS, reading dataset_name once per new objset (and
+# again on later discovery passes, which catches renames); in between, each
+# sample only preads the counters of the known files into one reused buffer.
+# No subprocess is involved.
+#
+# record_sample keeps each dataset's last WINDOW_SECS of counter readings, so
+# GET /dataset-io can rank the busiest datasets by bytes per second over the
+# window and show each one's last-interval rates. In process-split mode the
+# collector publishes the raw counters on the "datasets" channel and the server
+# keeps the windows.
+
+KSTAT_ROOT = '/proc/spl/kstat/zfs'
+DEFAULT_INTERVAL_SECS = 5
+DISCOVERY_SECS = 30.0
+WINDOW_SECS = 60.0
+DEFAULT_TOP_N = 10
+IDLE_CHECK_SECS = 30.0
+BUFFER_SIZE = 4096
+
+COUNTERS = ("nread", "nwritten", "reads", "writes")
+_COUNTER_KEYS = tuple(b'\n' + name.encode() + b' ' for name in COUNTERS)
+_NAME_KEY = b'\ndataset_name '
+
+DATASET_LOCK = threading.Lock()
+DATASET_HISTORY = {}                # "pool/objset-0x36" -> {"pool", "dataset", "readings": deque[(ts, nread, nwritten, reads, writes)]}
+DATASET_STATE = {
+    "available": False,
+    "interval_secs": DEFAULT_INTERVAL_SECS,
+    "objsets": 0,
+    "samples": 0,
+    "last_sample_ts": None,
+    "last_error": None
+}
+
+
+def _read(path, buf):
+    """Whole (small) kstat file into buf; returns the length."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        length = 0
+        with memoryview(buf) as view:
+            while length < len(buf):
+                count = os.preadv(fd, [view[length:]], length)
+                if count <= 0:
+                    break
+                length += count
+        return length
+    finally:
+        os.close(fd)
+
+
+def _row_value(buf, length, key):
+    """Data column of the row starting with key, as bytes (None when missing)."""
+    start = buf.find(key, 0, length)
+    if start < 0:
+        return None
+    end = buf.find(b'\n', start + 1, length)
+    fields = buf[start + len(key):end if end >= 0 else length].split()
+    return bytes(fields[1]) if len(fields) == 2 else None
+
+
+def read_objset(path, buf, with_name=False):
+    """(counter tuple, dataset name or None) of one objset kstat file."""
+    length = _read(path, buf)
+    counters = []
+    for key in _COUNTER_KEYS:
+        value = _row_value(buf, length, key)
+        counters.append(int(value) if value is not None and value.isdigit() else 0)
+    name = None
+    if with_name:
+        value = _row_value(buf, length, _NAME_KEY)
+        name = value.decode('utf-8', 'replace') if value is not None else None
+    return tuple(counters), name
+
+
+def discover_objsets(root=None):
+    """{"pool/objset-0x..": path} for every objset kstat under root."""
+    root = root or host_path(KSTAT_ROOT)
+    found = {}
+    try:
+        pools = [entry for entry in os.scandir(root) if entry.is_dir()]
+    except OSError:
+        return found
+    for pool in pools:
+        try:
+            entries = os.scandir(pool.path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('objset-'):
+                    found[f"{pool.name}/{entry.name}"] = entry.path
+    return found
+
+
+def record_sample(sample):
+    """Add one reading of every objset ({"ts", "datasets": {key: [pool, dataset, nread, nwritten, reads, writes]}})."""
+    ts = sample.get("ts") or time.time()
+    datasets = sample.get("datasets") or {}
+    with DATASET_LOCK:
+        for key in [k for k in DATASET_HISTORY if k not in datasets]:
+            del DATASET_HISTORY[key]    # destroyed dataset or exported pool
+        for key, (pool, dataset, *counters) in datasets.items():
+            entry = DATASET_HISTORY.get(key)
+            if entry is None:
+                entry = DATASET_HISTORY[key] = {"pool": pool, "dataset": dataset, "readings": deque()}
+            entry["pool"], entry["dataset"] = pool, dataset
+            readings = entry["readings"]
+            # Counters went backwards: the objset id was reused (destroy + create, re-import).
+            if readings and any(now < last for now, last in zip(counters, readings[-1][1:])):
+                readings.clear()
+            readings.append((ts, *counters))
+            while len(readings) > 2 and ts - readings[1][0] >= WINDOW_SECS:
+                readings.popleft()
+        DATASET_STATE.update(available=True, objsets=len(datasets), samples=DATASET_STATE["samples"] + 1,
+                             last_sample_ts=ts)
+
+
+def _rates(first, last):
+    elapsed = last[0] - first[0]
+    if elapsed <= 0:
+        return None
+    nread, nwritten, reads, writes = ((b - a) / elapsed for a, b in zip(first[1:], last[1:]))
+    return {
+        "read_bytes_per_sec": round(nread, 1),
+        "write_bytes_per_sec": round(nwritten, 1),
+        "read_ops_per_sec": round(reads, 2),
+        "write_ops_per_sec": round(writes, 2)
+    }
+
+
+def dataset_io_status(top_n=DEFAULT_TOP_N):
+    """Payload of GET /dataset-io: the top_n busiest datasets by bytes/s over the last WINDOW_SECS."""
+    ranked = []
+    with DATASET_LOCK:
+        for entry in DATASET_HISTORY.values():
+            readings = entry["readings"]
+            if len(readings) < 2:
+                continue
+            window = _rates(readings[0], readings[-1])
+            if window is None:
+                continue
+            ranked.append(dict(
+                window, pool=entry["pool"], dataset=entry["dataset"],
+                window_secs=round(readings[-1][0] - readings[0][0], 1),
+                last=_rates(readings[-2], readings[-1])
+            ))
+        state = dict(DATASET_STATE, window_secs=WINDOW_SECS)
+    ranked.sort(key=lambda item: item["read_bytes_per_sec"] + item["write_bytes_per_sec"], reverse=True)
+    state["datasets"] = ranked[:max(0, top_n)]
+    return state
+
+
+def _interval(config):
+    try:
+        return max(0, float(((config or {}).get('collector') or {}).get('dataset_interval_secs', DEFAULT_INTERVAL_SECS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECS
+
+
+def dataset_io_thread(load_config, publish=None):
+    """Sample the objset kstats every collector.dataset_interval_secs and feed the readings to publish (default record_sample)."""
+    publish = publish or record_sample
+    buf = bytearray(BUFFER_SIZE)
+    objsets = {}                    # key -> [path, pool, dataset name]
+    last_discovery = None
+    while True:
+        interval = _interval(load_config())
+        with DATASET_LOCK:
+            DATASET_STATE["interval_secs"] = interval
+        if interval <= 0:
+            time.sleep(IDLE_CHECK_SECS)
+            continue
+        now = time.monotonic()
+        rediscover = last_discovery is None or now - last_discovery >= DISCOVERY_SECS
+        if rediscover:
+            last_discovery = now
+            found = discover_objsets()
+            objsets = {key: objsets.get(key, [path, key.split('/', 1)[0], None]) for key, path in found.items()}
+            if not objsets:
+                with DATASET_LOCK:
+                    DATASET_STATE.update(available=False, objsets=0, last_error="no objset kstats")
+                last_discovery = None
+                time.sleep(IDLE_CHECK_SECS)
+                continue
+        datasets = {}
+        for key, info in list(objsets.items()):
+            path, pool, dataset = info
+            try:
+                counters, name = read_objset(path, buf, with_name=rediscover or dataset is None)
+            except OSError:
+                del objsets[key]    # destroyed since the last discovery
+                continue
+            if name:
+                info[2] = dataset = name
+            datasets[key] = [pool, dataset or key, *counters]
+        try:
+            publish({"ts": time.time(), "datasets": datasets})
+        except Exception as e: print(f"Dataset I/O publish error: {e}")
+        sampler_sleep(interval * interval_scale())
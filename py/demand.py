@@ -0,0 +1,121 @@
+import threading, time
+
+# Viewer registry for demand-driven sampling. Dashboard requests (/data,
+# /pool-activity and their /federation twins) mark a viewer; once nobody has
+# asked for idle_after_secs, the io and pool activity samplers tick only every
+# idle_interval_secs. The next viewer request sets _WAKE, so sleeping samplers
+# resume their normal rate at once. Alerts and topology scans are not affected.
+#
+# In process-split mode the registry lives in the server; the collector process
+# mirrors its last-viewer time through the "demand" channel (demand_watch_thread).
+
+VIEWER_PATHS = ('/data', '/pool-activity', '/arc-stats', '/federation/data', '/federation/pool-activity')
+DEFAULT_IDLE_AFTER_SECS = 30.0
+DEFAULT_IDLE_INTERVAL_SECS = 2.0
+PUBLISH_MIN_INTERVAL_SECS = 1.0
+WATCH_INTERVAL_SECS = 0.1
+
+DEMAND_LOCK = threading.Lock()
+DEMAND_STATE = {
+    "last_view_ts": 0.0,
+    "viewers": {},                  # client -> last request time
+    "idle_after_secs": DEFAULT_IDLE_AFTER_SECS,
+    "idle_interval_secs": DEFAULT_IDLE_INTERVAL_SECS,
+    "published_ts": 0.0
+}
+_WAKE = threading.Event()
+_PUBLISH_LOCK = threading.Lock()
+_PUBLISHER = None                   # server side of the "demand" channel in process-split mode
+
+
+def apply_config(config):
+    """Pick up collector.idle_after_secs / idle_interval_secs (called once per scan)."""
+    settings = (config or {}).get('collector') or {}
+    try:
+        idle_after = float(settings.get('idle_after_secs', DEFAULT_IDLE_AFTER_SECS))
+        idle_interval = float(settings.get('idle_interval_secs', DEFAULT_IDLE_INTERVAL_SECS))
+    except (TypeError, ValueError):
+        idle_after, idle_interval = DEFAULT_IDLE_AFTER_SECS, DEFAULT_IDLE_INTERVAL_SECS
+    with DEMAND_LOCK:
+        DEMAND_STATE.update(idle_after_secs=idle_after, idle_interval_secs=max(0.1, idle_interval))
+
+
+def _is_idle(now):
+    after = DEMAND_STATE["idle_after_secs"]
+    return after > 0 and now - DEMAND_STATE["last_view_ts"] > after
+
+
+def note_viewer(client):
+    """Record a dashboard request from client; wakes idle samplers."""
+    now = time.time()
+    with DEMAND_LOCK:
+        was_idle = _is_idle(now)
+        DEMAND_STATE["last_view_ts"] = now
+        DEMAND_STATE["viewers"][client] = now
+        publish = _PUBLISHER is not None and (was_idle or now - DEMAND_STATE["published_ts"] >= PUBLISH_MIN_INTERVAL_SECS)
+        if publish:
+            DEMAND_STATE["published_ts"] = now
+    if was_idle:
+        _WAKE.set()
+    if publish:
+        try:
+            with _PUBLISH_LOCK:
+                _PUBLISHER.publish_json("demand", {"last_view_ts": now})
+        except Exception as e: print(f"Demand publish error: {e}")
+
+
+def sampler_sleep(interval):
+    """Sleep one sampler tick: interval while viewed, idle_interval_secs (or until a viewer arrives) otherwise."""
+    with DEMAND_LOCK:
+        idle = _is_idle(time.time())
+        idle_interval = DEMAND_STATE["idle_interval_secs"]
+    if not idle or idle_interval <= interval:
+        time.sleep(interval)
+        return
+    _WAKE.clear()
+    with DEMAND_LOCK:
+        # A viewer may have arrived between the check and clear().
+        if not _is_idle(time.time()):
+            return
+    _WAKE.wait(idle_interval)
+
+
+def demand_status():
+    now = time.time()
+    with DEMAND_LOCK:
+        after = DEMAND_STATE["idle_after_secs"]
+        window = after if after > 0 else DEFAULT_IDLE_AFTER_SECS
+        for client, seen in list(DEMAND_STATE["viewers"].items()):
+            if now - seen > window:
+                del DEMAND_STATE["viewers"][client]
+        last = DEMAND_STATE["last_view_ts"]
+        return {
+            "idle": _is_idle(now),
+            "viewers": len(DEMAND_STATE["viewers"]),
+            "last_view_age_secs": round(now - last, 1) if last else None,
+            "idle_after_secs": after,
+            "idle_interval_secs": DEMAND_STATE["idle_interval_secs"]
+        }
+
+
+def set_publisher(channels):
+    """Server side of process-split mode: forward viewer activity to the collector process."""
+    global _PUBLISHER
+    _PUBLISHER = channels
+
+
+def demand_watch_thread(channels):
+    """Collector process: mirror the server's last-viewer time and wake samplers when it advances."""
+    while True:
+        try:
+            payload = channels.read_new_json("demand")
+            if payload is not None:
+                ts = float(payload.get("last_view_ts") or 0.0)
+                with DEMAND_LOCK:
+                    was_idle = _is_idle(time.time())
+                    DEMAND_STATE["last_view_ts"] = max(DEMAND_STATE["last_view_ts"], ts)
+                    woke = was_idle and not _is_idle(time.time())
+                if woke:
+                    _WAKE.set()
+        except Exception as e: print(f"Demand watch error: {e}")
+        time.sleep(WATCH_INTERVAL_SECS)
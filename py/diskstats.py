@@ -0,0 +1,79 @@
+import os, sys
+from .paths import host_path
+from .runner import command_output
+
+# /proc/diskstats readers used by the io/pool activity samplers and the headless collector.
+
+
+def active_simulator():
+    """
+    The SimulatedHost when the simulator is on, else None. py.simulator pulls in
+    zfs_logic and the topology stack, so it is imported only when
+    DASHBOARD_SIMULATOR is set or something already loaded it (scan_topology
+    with a config that enables it); with the simulator off, a diskstats read
+    never loads config.json.
+    """
+    simulator = sys.modules.get(f"{__package__}.simulator")
+    if simulator is None:
+        raw = os.environ.get("DASHBOARD_SIMULATOR", "").strip()
+        if not raw or raw in ("0", "false"):
+            return None
+        from . import simulator
+    return simulator.active_simulator()
+
+
+def get_io_snapshot():
+    sim = active_simulator()
+    if sim is not None:
+        return sim.io_snapshot()
+    activity = {}
+    try:
+        with open(host_path('/proc/diskstats'), 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 13: continue
+                dev, r, w = parts[2], int(parts[3]), int(parts[7])
+                activity[dev] = r + w
+    except: pass
+    return activity
+
+def get_dynamic_pool_mapping():
+    """Map drive base names to their ZFS pool names"""
+    sim = active_simulator()
+    if sim is not None:
+        return sim.pool_mapping()
+    mapping = {}
+    try:
+        cmd = ["lsblk", "-pno", "KNAME,LABEL,FSTYPE"]
+        output = command_output(cmd, name="lsblk pools")
+        for line in output.splitlines():
+            parts = line.split()
+            if "zfs_member" in parts and len(parts) >= 2:
+                pool_name = parts[1] if parts[1] != "zfs_member" else (parts[2] if len(parts) > 2 else "unknown")
+                dev_name = parts[0].replace("/dev/", "")
+                base_dev = "".join(filter(str.isalpha, dev_name))
+                mapping[base_dev] = pool_name
+    except: 
+        pass
+    return mapping
+
+def get_diskstats_for_pools():
+    """Read current diskstats for all drives"""
+    sim = active_simulator()
+    if sim is not None:
+        return sim.diskstats()
+    stats = {}
+    try:
+        with open(host_path('/proc/diskstats'), 'r') as f:
+            for line in f:
+                p = line.split()
+                if len(p) < 10:
+                    continue
+                dev_name = p[2]
+                stats[dev_name] = {
+                    'r': int(p[5]) * 512,  # sectors read -> bytes
+                    'w': int(p[9]) * 512   # sectors written -> bytes
+                }
+        return stats
+    except:
+        return {}
@@ -0,0 +1,216 @@
+import os, re
+from .topology import normalize_pci_address, count_controller_phys, build_ircu_chassis
+from .paths import host_path
+
+# Native SES slot mapping from /sys/class/enclosure (the kernel ses driver).
+#
+# Every SES-capable backplane shows up as /sys/class/enclosure/<H:C:T:L>/ with one
+# directory per element: status, fault, locate, slot and, for an occupied bay, a
+# device link to the SCSI disk in it. Enclosures whose device link resolves under
+# the controller's PCI address become one backplane chassis each, with exact slot
+# positions, and no vendor tool is forked. The parsed shape matches
+# _parse_ircu_display, so build_ircu_chassis lays out the bays for both sources.
+#
+# Some expanders publish slot elements without device links (common with SATA
+# drives); when no slot links a disk, the controller falls through to ircu.
+
+DEVICE_ELEMENT_TYPES = ("array device", "device")
+BY_PATH_BAY = re.compile(r'(phy|ata|sas|port|slot|exp)(\d+)')
+
+
+def _read_attr(directory, name):
+    # Raw os.open/os.read: a large enclosure costs thousands of small sysfs reads per scan.
+    try:
+        fd = os.open(f"{directory}/{name}", os.O_RDONLY)
+    except OSError:
+        return ""
+    try:
+        return os.read(fd, 4096).decode('utf-8', 'replace').strip()
+    except OSError:
+        return ""
+    finally:
+        os.close(fd)
+
+
+def _read_vpd_serial(device_dir):
+    """Unit serial number from VPD page 0x80 (4-byte header, then ASCII)."""
+    try:
+        with open(os.path.join(device_dir, 'vpd_pg80'), 'rb') as fh:
+            raw = fh.read()
+    except OSError:
+        return ""
+    if len(raw) < 4:
+        return ""
+    return raw[4:4 + raw[3]].decode('ascii', 'ignore').strip(' \x00')
+
+
+def _logical_id(enclosure_dir):
+    """Enclosure id (0x5003048000000002) in ircu's Logical ID form (50030480:00000002)."""
+    value = _read_attr(enclosure_dir, 'id').lower()
+    value = value[2:] if value.startswith('0x') else value
+    if len(value) == 16 and all(c in '0123456789abcdef' for c in value):
+        return f"{value[:8]}:{value[8:]}"
+    return value
+
+
+def _block_device(device_dir):
+    """Kernel name (sda) of the disk behind a SCSI device directory, or ''."""
+    try:
+        names = os.listdir(os.path.join(device_dir, 'block'))
+    except OSError:
+        return ""
+    return sorted(names)[0] if names else ""
+
+
+def _disk_info(dev_name, device_dir):
+    block_dir = host_path(f"/sys/block/{dev_name}")
+    try:
+        size_bytes = int(_read_attr(block_dir, 'size') or 0) * 512
+    except ValueError:
+        size_bytes = 0
+    return {
+        "serial":     _read_vpd_serial(device_dir),
+        "model":      _read_attr(device_dir, 'model') or "Unknown",
+        "size_bytes": size_bytes,
+        "dev_name":   dev_name
+    }
+
+
+def find_ses_enclosures(pci_address):
+    """/sys/class/enclosure directories that sit behind this controller, in H:C:T:L order."""
+    enclosure_root = host_path('/sys/class/enclosure')
+    if not os.path.isdir(enclosure_root):
+        return []
+    pci_path = normalize_pci_address(pci_address)
+    found = []
+    for enclosure in os.scandir(enclosure_root):
+        device_link = os.path.join(enclosure.path, 'device')
+        try:
+            if enclosure.is_dir() and pci_path in os.path.realpath(device_link):
+                found.append(enclosure.path)
+        except OSError:
+            continue
+    # H:C:T:L names sort numerically (0:0:10:0 after 0:0:9:0).
+    return sorted(found, key=lambda path: [int(part) if part.isdigit() else part
+                                           for part in re.split(r'(\d+)', os.path.basename(path))])
+
+
+def _slot_elements(enclosure_dir):
+    """[(slot_number, element_dir, status)] for the drive slot elements of one enclosure."""
+    elements = []
+    for order, entry in enumerate(sorted(os.scandir(enclosure_dir), key=lambda e: e.name)):
+        # device/subsystem are links and power is a kernel dir without status, not elements.
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        status = _read_attr(entry.path, 'status')
+        if not status:
+            continue
+        element_type = _read_attr(entry.path, 'type').lower()
+        if element_type and element_type not in DEVICE_ELEMENT_TYPES:
+            continue
+        number = _read_attr(entry.path, 'slot')
+        if not number.lstrip('-').isdigit() or int(number) < 0:
+            digits = re.findall(r'\d+', entry.name)
+            number = digits[-1] if digits else order
+        elements.append((int(number), entry.path, status))
+    if elements:
+        # Element names such as "Slot 01" count from 1; bays are indexed from 0.
+        base = min(element[0] for element in elements)
+        if base in (0, 1):
+            elements = [(number - base, path, status) for number, path, status in elements]
+    return elements
+
+
+def has_ses_slot_links(pci_address):
+    """True when some enclosure slot behind this controller links a disk (read_ses_enclosures will map it)."""
+    for enclosure_dir in find_ses_enclosures(pci_address):
+        for entry in os.scandir(enclosure_dir):
+            if entry.is_dir(follow_symlinks=False) and _block_device(os.path.join(entry.path, 'device')):
+                return True
+    return False
+
+
+def read_ses_enclosures(pci_address):
+    """
+    Parse the controller's SES enclosures into the _parse_ircu_display shape:
+      { enc_id: { "slots", "is_backplane": True, "array_address",
+                  "drives": { slot: { serial, model, size_bytes, raw_state, dev_name } },
+                  "locate": [slot, ...] } }
+    Enclosures are numbered from 2 in H:C:T:L order, as ircu numbers expanders after the
+    HBA's own enclosure 1, so chassis keys stay the same when ircu is swapped out.
+    Returns {} when no slot links a disk.
+    """
+    enclosures = {}
+    linked = 0
+    for number, enclosure_dir in enumerate(find_ses_enclosures(pci_address), start=2):
+        elements = _slot_elements(enclosure_dir)
+        if not elements:
+            continue
+        drives, locate = {}, []
+        for slot, element_dir, status in elements:
+            if _read_attr(element_dir, 'locate') == '1':
+                locate.append(slot)
+            device_dir = os.path.join(element_dir, 'device')
+            dev_name = _block_device(device_dir)
+            if not dev_name:
+                continue
+            linked += 1
+            drive = _disk_info(dev_name, device_dir)
+            # make_disk_record promotes unallocated drives to FAULTED on "Failed"/"Critical".
+            drive["raw_state"] = f"{status}, Failed (fault indicator)" if _read_attr(element_dir, 'fault') == '1' else status
+            drives[str(slot)] = drive
+        enclosures[str(number)] = {
+            "slots": max(element[0] for element in elements) + 1,
+            "is_backplane": True,
+            "array_address": _logical_id(enclosure_dir),
+            "drives": drives,
+            "locate": sorted(locate)
+        }
+    return enclosures if linked else {}
+
+
+def _direct_attach_drives(pci_address, mapped_devs):
+    """Disks on this controller that no enclosure slot claims, keyed by by-path phy/port number."""
+    path_dir = host_path('/dev/disk/by-path')
+    drives = {}
+    if not os.path.isdir(path_dir):
+        return drives
+    for entry in os.scandir(path_dir):
+        if not entry.is_symlink() or "-part" in entry.name or f"pci-{pci_address}" not in entry.name:
+            continue
+        # by-path links point straight at ../../sdX; no need to resolve every component.
+        dev_name = os.path.basename(os.readlink(entry.path))
+        if dev_name in mapped_devs:
+            continue
+        match = BY_PATH_BAY.search(entry.name)
+        bay = int(match.group(2)) if match else 0
+        drive = _disk_info(dev_name, host_path(f"/sys/block/{dev_name}/device"))
+        drive["raw_state"] = ""
+        drives.setdefault(str(bay), drive)
+    return drives
+
+
+def get_ses_slot_topology(pci_address, zfs_map, config, temp_map=None, identity=None):
+    """
+    Chassis entries for a controller from /sys/class/enclosure, or {} to fall back to ircu.
+    One chassis per SES backplane (keys and settings as get_ircu_slot_topology); disks on
+    the same controller outside any enclosure go to its direct-attach chassis. Bays with
+    the locate indicator lit are listed in settings["locate_bays"].
+    """
+    enclosures = read_ses_enclosures(pci_address)
+    if not enclosures:
+        return {}
+    mapped = {drive["dev_name"] for enc in enclosures.values() for drive in enc["drives"].values()}
+    da_drives = _direct_attach_drives(pci_address, mapped)
+    phy_count = 0
+    if da_drives:
+        enclosures["0"] = {"slots": 0, "is_backplane": False, "array_address": "", "drives": da_drives}
+        phy_count = count_controller_phys(pci_address)
+
+    result = build_ircu_chassis(pci_address, enclosures, phy_count, zfs_map, config, temp_map, identity)
+    pci_key = pci_address.replace(':', '-').replace('.', '-')
+    for eid, enc in enclosures.items():
+        chassis = result.get(f"{pci_key}-e{eid}")
+        if chassis is not None:
+            chassis["settings"]["locate_bays"] = enc.get("locate", [])
+    return result
@@ -0,0 +1,253 @@
+import http.client, json, threading, time
+from urllib.parse import urlsplit
+
+# Aggregator mode: poll other dashboard instances' /data and /pool-activity and
+# merge them into one view keyed by hostname. Each peer gets its own worker
+# thread and its own keep-alive connection, so a slow or unreachable host only
+# delays itself.
+
+FEDERATION_LOCK = threading.Lock()
+FEDERATION_PEERS = {}   # peer url -> state dict (see _new_peer_state)
+MAX_BACKOFF_SECS = 30.0
+
+
+def _new_peer_state(name, url):
+    return {
+        "name": name,
+        "url": url,
+        "hostname": None,
+        "status": "pending",
+        "error": None,
+        "last_ok": 0.0,
+        "latency_ms": None,
+        "failures": 0,
+        "data": None,
+        "pool_activity": None
+    }
+
+
+def normalize_peers(federation_cfg):
+    """Return [(name, url)] from config; peers may be URL strings or {name, url} dicts."""
+    peers = []
+    raw = federation_cfg.get("peers", []) if isinstance(federation_cfg, dict) else []
+    for entry in raw if isinstance(raw, list) else []:
+        if isinstance(entry, str):
+            url, name = entry, None
+        elif isinstance(entry, dict):
+            url, name = entry.get("url"), entry.get("name")
+        else:
+            continue
+        url = str(url or "").strip().rstrip('/')
+        if not url:
+            continue
+        if "://" not in url:
+            url = f"http://{url}"
+        peers.append((str(name or urlsplit(url).hostname or url), url))
+    return peers
+
+
+class PeerConnection:
+    """
+    Persistent HTTP/1.1 connection to one peer with conditional GETs.
+    Remembers the ETag and decoded payload per path; a 304 reuses the cached payload.
+    """
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+        self._etags = {}
+        self._cache = {}
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self._conn = cls(self.host, self.port, timeout=self.timeout)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def get_json(self, path):
+        """Return (payload, changed). Raises on network/HTTP errors."""
+        # A keep-alive socket the peer already closed fails on first use;
+        # GET is idempotent so retry once on a fresh connection.
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._connect()
+            headers = {"Accept": "application/json", "Connection": "keep-alive"}
+            if path in self._etags:
+                headers["If-None-Match"] = self._etags[path]
+            try:
+                self._conn.request("GET", self.base_path + path, headers=headers)
+                response = self._conn.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self.close()
+                raise
+
+            if response.will_close:
+                self.close()
+            if response.status == 304 and path in self._cache:
+                return self._cache[path], False
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status} for {path}")
+
+            payload = json.loads(body.decode(response.headers.get_content_charset() or 'utf-8'))
+            etag = response.getheader("ETag")
+            if etag:
+                self._etags[path] = etag
+            self._cache[path] = payload
+            return payload, True
+        raise RuntimeError(f"request failed for {path}")
+
+
+def _peer_worker(name, url, settings):
+    timeout = max(0.1, settings["timeout_ms"] / 1000.0)
+    data_interval = max(0.05, settings["data_interval_ms"] / 1000.0)
+    pool_interval = max(0.05, settings["pool_activity_interval_ms"] / 1000.0)
+    conn = PeerConnection(url, timeout)
+    next_data = next_pool = 0.0
+
+    while True:
+        with FEDERATION_LOCK:
+            state = FEDERATION_PEERS.get(url)
+            if state is None or state.get("_generation") != settings["generation"]:
+                conn.close()
+                return
+
+        now = time.time()
+        try:
+            if now >= next_data:
+                started = time.perf_counter()
+                payload, _ = conn.get_json("/data")
+                latency_ms = round((time.perf_counter() - started) * 1000.0, 1)
+                with FEDERATION_LOCK:
+                    state["data"] = payload
+                    state["hostname"] = payload.get("hostname") if isinstance(payload, dict) else None
+                    state["latency_ms"] = latency_ms
+                next_data = now + data_interval
+            if now >= next_pool:
+                payload, _ = conn.get_json("/pool-activity")
+                with FEDERATION_LOCK:
+                    state["pool_activity"] = payload
+                next_pool = now + pool_interval
+            with FEDERATION_LOCK:
+                state.update(status="ok", error=None, last_ok=time.time(), failures=0)
+            delay = max(0.0, min(next_data, next_pool) - time.time())
+        except Exception as ex:
+            conn.close()
+            with FEDERATION_LOCK:
+                state["failures"] += 1
+                state["error"] = str(ex)
+                # Keep the last good payload but flag it; the UI decides how to show stale hosts.
+                state["status"] = "stale" if state.get("data") is not None else "unreachable"
+                failures = state["failures"]
+            delay = min(MAX_BACKOFF_SECS, data_interval * (2 ** min(failures, 8)))
+            next_data = next_pool = time.time() + delay
+        time.sleep(delay)
+
+
+def _federation_settings(config):
+    cfg = config.get("federation", {}) if isinstance(config, dict) else {}
+    cfg = cfg if isinstance(cfg, dict) else {}
+
+    def _ms(key, default):
+        try:
+            return max(1, int(cfg.get(key, default)))
+        except Exception:
+            return default
+
+    return {
+        "enabled": bool(cfg.get("enabled", False)),
+        "peers": normalize_peers(cfg),
+        "timeout_ms": _ms("timeout_ms", 2000),
+        "data_interval_ms": _ms("data_interval_ms", 1000),
+        "pool_activity_interval_ms": _ms("pool_activity_interval_ms", 500)
+    }
+
+
+def federation_monitor_thread(load_config):
+    """Start/stop one worker per configured peer as config.json changes."""
+    generation = 0
+    last_signature = None
+    while True:
+        try:
+            settings = _federation_settings(load_config())
+            signature = json.dumps(settings, sort_keys=True)
+            if signature != last_signature:
+                last_signature = signature
+                generation += 1
+                settings["generation"] = generation
+                wanted = settings["peers"] if settings["enabled"] else []
+                with FEDERATION_LOCK:
+                    FEDERATION_PEERS.clear()
+                    for name, url in wanted:
+                        state = _new_peer_state(name, url)
+                        state["_generation"] = generation
+                        FEDERATION_PEERS[url] = state
+                # Workers of the previous generation notice the change and exit.
+                for name, url in wanted:
+                    threading.Thread(target=_peer_worker, args=(name, url, settings), daemon=True).start()
+                if wanted:
+                    print(f"Federation: polling {len(wanted)} peer(s)")
+        except Exception as e:
+            print(f"Federation monitor error: {e}")
+        time.sleep(5)
+
+
+def _peer_key(state, used):
+    key = state.get("hostname") or state.get("name") or state.get("url")
+    if key in used:
+        key = f"{key} ({state.get('url')})"
+    used.add(key)
+    return key
+
+
+def federated_data(local_data):
+    """Merged /data view: {"hosts": {hostname: {status, ..., data}}} including this host."""
+    local_host = local_data.get("hostname") or "localhost"
+    hosts = {local_host: {"status": "ok", "local": True, "url": None, "error": None,
+                          "last_ok": time.time(), "latency_ms": 0.0, "data": local_data}}
+    used = {local_host}
+    with FEDERATION_LOCK:
+        peers = [dict(state) for state in FEDERATION_PEERS.values()]
+    for state in peers:
+        hosts[_peer_key(state, used)] = {
+            "status": state["status"],
+            "local": False,
+            "url": state["url"],
+            "error": state["error"],
+            "last_ok": state["last_ok"],
+            "latency_ms": state["latency_ms"],
+            "data": state["data"]
+        }
+    return {"hostname": local_host, "hosts": hosts}
+
+
+def federated_pool_activity(local_activity):
+    """Merged /pool-activity view: {"hosts": {hostname: {status, stats}}}."""
+    local_host = local_activity.get("hostname") or "localhost"
+    hosts = {local_host: {"status": "ok", "stats": local_activity.get("stats", {})}}
+    used = {local_host}
+    with FEDERATION_LOCK:
+        peers = [dict(state) for state in FEDERATION_PEERS.values()]
+    for state in peers:
+        activity = state.get("pool_activity") or {}
+        hosts[_peer_key(state, used)] = {
+            "status": state["status"],
+            "stats": activity.get("stats", {}) if isinstance(activity, dict) else {}
+        }
+    return {"hostname": local_host, "hosts": hosts}
@@ -0,0 +1,129 @@
+import os, threading, time
+
+# Sampling governor: keeps the service's own CPU use under collector.cpu_budget_pct
+# (percent of one core) by slowing the high-frequency samplers and the SMART sweep.
+#
+# Every GOVERNOR_INTERVAL_SECS the process CPU share is measured from
+# /proc/self/stat (utime + stime over wall time) and smoothed. Over budget, the
+# level goes up one step; below half the budget for RESTORE_SAMPLES measurements
+# in a row, it comes back down one step. Level n multiplies the io and pool
+# activity sampling intervals by 2**n and sweeps SMART every 2**n scans.
+# Alerts are evaluated by the event-driven rule engine (py/alerts.py) once per
+# topology scan and on each txg sample; neither they nor the scan are throttled.
+
+GOVERNOR_INTERVAL_SECS = 5.0
+MAX_LEVEL = 3                   # up to 8x slower sampling
+RESTORE_SAMPLES = 2
+SMOOTHING = 0.5                 # EWMA weight of the newest measurement
+DEFAULT_BUDGET_PCT = 25.0
+
+BASE_IO_INTERVAL_SECS = 0.1
+BASE_POOL_INTERVAL_SECS = 0.05
+
+GOVERNOR_LOCK = threading.Lock()
+GOVERNOR_STATE = {
+    "enabled": False,
+    "budget_pct": DEFAULT_BUDGET_PCT,
+    "cpu_pct": None,
+    "level": 0,
+    "below_count": 0,
+    "changed_at": None
+}
+_SMART_SCANS = {"skipped": 0}
+
+try:
+    _CLK_TCK = os.sysconf('SC_CLK_TCK')
+except (ValueError, OSError, AttributeError):
+    _CLK_TCK = 100
+
+
+def _process_cpu_seconds():
+    """utime + stime of this process from /proc/self/stat, or None."""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            stat = f.read()
+        # comm may contain spaces; fields after ")" start at field 3 (state).
+        fields = stat[stat.rindex(')') + 2:].split()
+        return (int(fields[11]) + int(fields[12])) / float(_CLK_TCK)
+    except Exception:
+        return None
+
+
+def _budget(config):
+    try:
+        return float(((config or {}).get('collector') or {}).get('cpu_budget_pct', DEFAULT_BUDGET_PCT))
+    except (TypeError, ValueError):
+        return DEFAULT_BUDGET_PCT
+
+
+def _step(cpu_pct, budget_pct):
+    """Apply one measurement to GOVERNOR_STATE (lock held by caller)."""
+    state = GOVERNOR_STATE
+    previous = state["cpu_pct"]
+    smoothed = cpu_pct if previous is None else SMOOTHING * cpu_pct + (1 - SMOOTHING) * previous
+    state.update(enabled=budget_pct > 0, budget_pct=budget_pct, cpu_pct=smoothed)
+    if budget_pct <= 0:
+        if state["level"]:
+            state.update(level=0, below_count=0, changed_at=time.time())
+        return
+    level = state["level"]
+    if smoothed > budget_pct and level < MAX_LEVEL:
+        state.update(level=level + 1, below_count=0, changed_at=time.time())
+        print(f"Governor: CPU {smoothed:.1f}% over {budget_pct:g}% budget; sampling slowed {2 ** (level + 1)}x")
+    elif smoothed < budget_pct / 2.0 and level > 0:
+        state["below_count"] += 1
+        if state["below_count"] >= RESTORE_SAMPLES:
+            state.update(level=level - 1, below_count=0, changed_at=time.time())
+            print(f"Governor: CPU {smoothed:.1f}% under budget; sampling at {2 ** (level - 1)}x base interval")
+    else:
+        state["below_count"] = 0
+
+
+def governor_thread(load_config):
+    budget_pct = _budget(load_config())
+    with GOVERNOR_LOCK:
+        GOVERNOR_STATE.update(enabled=budget_pct > 0, budget_pct=budget_pct)
+    last_cpu, last_wall = _process_cpu_seconds(), time.monotonic()
+    while True:
+        time.sleep(GOVERNOR_INTERVAL_SECS)
+        try:
+            cpu, wall = _process_cpu_seconds(), time.monotonic()
+            if cpu is not None and last_cpu is not None and wall > last_wall:
+                cpu_pct = (cpu - last_cpu) / (wall - last_wall) * 100.0
+                with GOVERNOR_LOCK:
+                    _step(cpu_pct, _budget(load_config()))
+            last_cpu, last_wall = cpu, wall
+        except Exception as e: print(f"Governor error: {e}")
+
+
+def interval_scale():
+    """Multiplier for the high-frequency sampler intervals (1, 2, 4 or 8)."""
+    with GOVERNOR_LOCK:
+        return 2 ** GOVERNOR_STATE["level"]
+
+
+def smart_sweep_due():
+    """Called once per scan: True when this scan should run the SMART sweep."""
+    every = interval_scale()
+    with GOVERNOR_LOCK:
+        if _SMART_SCANS["skipped"] + 1 >= every:
+            _SMART_SCANS["skipped"] = 0
+            return True
+        _SMART_SCANS["skipped"] += 1
+        return False
+
+
+def governor_status(scan_interval_secs):
+    """Effective collection rates, as reported in /data."""
+    with GOVERNOR_LOCK:
+        state = dict(GOVERNOR_STATE)
+    scale = 2 ** state["level"]
+    return {
+        "enabled": state["enabled"],
+        "budget_pct": state["budget_pct"],
+        "cpu_pct": round(state["cpu_pct"], 1) if state["cpu_pct"] is not None else None,
+        "level": state["level"],
+        "io_hz": round(1.0 / (BASE_IO_INTERVAL_SECS * scale), 2),
+        "pool_activity_hz": round(1.0 / (BASE_POOL_INTERVAL_SECS * scale), 2),
+        "smart_interval_secs": scan_interval_secs * scale
+    }
@@ -0,0 +1,97 @@
+import os, re
+from .paths import host_path
+
+# Disk temperatures from kernel hwmon sensors, without forking smartctl.
+#
+#   drivetemp  SATA/SAS disks with the drivetemp module loaded register
+#              /sys/class/hwmon/hwmonN (name "drivetemp") whose device link is
+#              the SCSI device; its block/ directory names the disk (sda).
+#   nvme       every NVMe controller exposes /sys/class/nvme/nvmeX/hwmonN
+#              (older kernels: device/hwmon/hwmonN); the reading applies to all
+#              of the controller's namespaces (nvme0n1, ...).
+#
+# temp1_input is in millidegrees Celsius. Disks without a sensor are left to the
+# smartctl sweep in zfs_logic.
+
+NVME_NAMESPACE = re.compile(r'^nvme\d+(?:c\d+)?n\d+$')
+
+
+def _read_celsius(hwmon_dir):
+    """temp1_input of one hwmon directory in whole degrees, or None."""
+    try:
+        with open(os.path.join(hwmon_dir, 'temp1_input'), 'r') as fh:
+            value = int(round(int(fh.read().strip()) / 1000.0))
+    except (OSError, ValueError):
+        return None
+    return value if 0 <= value <= 150 else None
+
+
+def _read_name(hwmon_dir):
+    try:
+        with open(os.path.join(hwmon_dir, 'name'), 'r') as fh:
+            return fh.read().strip()
+    except OSError:
+        return ""
+
+
+def nvme_namespaces(controller):
+    """Namespace disks (nvme0n1, ...) of an NVMe controller name (nvme0), from sysfs."""
+    try:
+        entries = os.listdir(host_path(f"/sys/class/nvme/{controller}"))
+    except OSError:
+        return []
+    # Multipath controller paths (nvme0c0n1) report for the nvme0n1 head disk.
+    return sorted({re.sub(r'c\d+n', 'n', name) for name in entries if NVME_NAMESPACE.match(name)})
+
+
+def _drivetemp_sensors():
+    """{sdX: temp_c} from drivetemp hwmon devices."""
+    temps = {}
+    hwmon_root = host_path('/sys/class/hwmon')
+    if not os.path.isdir(hwmon_root):
+        return temps
+    for entry in os.scandir(hwmon_root):
+        if _read_name(entry.path) != 'drivetemp':
+            continue
+        try:
+            names = os.listdir(os.path.join(entry.path, 'device', 'block'))
+        except OSError:
+            continue
+        value = _read_celsius(entry.path)
+        if value is not None:
+            for name in names:
+                temps[name] = value
+    return temps
+
+
+def _nvme_sensors():
+    """{nvmeXnY: temp_c} from NVMe controller hwmon devices."""
+    temps = {}
+    nvme_root = host_path('/sys/class/nvme')
+    if not os.path.isdir(nvme_root):
+        return temps
+    for controller in os.scandir(nvme_root):
+        try:
+            entries = os.listdir(controller.path)
+        except OSError:
+            continue
+        sensors = [os.path.join(controller.path, name) for name in sorted(entries) if name.startswith('hwmon')]
+        legacy = os.path.join(controller.path, 'device', 'hwmon')
+        if not sensors and os.path.isdir(legacy):
+            sensors = [os.path.join(legacy, name) for name in sorted(os.listdir(legacy))]
+        value = next((v for v in map(_read_celsius, sensors) if v is not None), None)
+        if value is None:
+            continue
+        for name in nvme_namespaces(controller.name):
+            temps[name] = value
+    return temps
+
+
+def read_hwmon_temperatures():
+    """{kernel disk name: temp_c} for every disk with a hwmon temperature sensor."""
+    try:
+        temps = _drivetemp_sensors()
+        temps.update(_nvme_sensors())
+        return temps
+    except Exception:
+        return {}
@@ -0,0 +1,124 @@
+import os, re
+from .topology import build_serial_to_dev_map
+from .paths import host_path
+
+SYS_BLOCK_ROOT = host_path('/sys/block')
+DISK_LINK_DIRS = tuple(host_path(d) for d in ('/dev/disk/by-id', '/dev/disk/by-partuuid', '/dev/disk/by-path'))
+
+
+def _alias_key(name):
+    value = str(name or '').strip()
+    if value.startswith('/dev/'):
+        value = value.rsplit('/', 1)[-1]
+    return value.lower()
+
+
+class DeviceIdentityIndex:
+    """
+    Maps every known alias of a disk to one canonical key: the kernel name of
+    the whole disk (sda, nvme0n1). Built once per topology scan so ZFS, SMART and
+    controller lookups are exact dict hits instead of prefix scans.
+
+    Aliases: kernel name, partition names, /dev/disk/by-id, by-partuuid and
+    by-path link names, serial (plus dash-stripped form), WWN and ZFS vdev GUID.
+    Alias matching is case-insensitive.
+
+    Also usable wherever a {partuuid: device} map was passed before: get()
+    returns the canonical device for any alias.
+    """
+
+    def __init__(self):
+        self._aliases = {}
+
+    def __len__(self):
+        return len(self._aliases)
+
+    def __contains__(self, name):
+        return _alias_key(name) in self._aliases
+
+    def add(self, alias, canonical):
+        key = _alias_key(alias)
+        if key and canonical:
+            # First registration wins so a later, looser alias can't steal a disk.
+            self._aliases.setdefault(key, canonical)
+
+    def resolve(self, name):
+        """Return the canonical disk key for name, or None if unknown."""
+        if not name:
+            return None
+        return self._aliases.get(_alias_key(name))
+
+    def get(self, name, default=None):
+        found = self.resolve(name)
+        return found if found is not None else default
+
+    def canonical_map(self, mapping):
+        """Re-key an {alias: value} dict by canonical disk; first value per disk wins."""
+        out = {}
+        for alias, value in (mapping or {}).items():
+            canonical = self.resolve(alias)
+            if canonical is not None and canonical not in out:
+                out[canonical] = value
+        return out
+
+    def add_serials(self, serial_map):
+        """serial_map is {serial: kernel_name} as returned by build_serial_to_dev_map."""
+        for serial, dev in (serial_map or {}).items():
+            canonical = self.resolve(dev) or dev
+            self.add(serial, canonical)
+            stripped = str(serial).replace('-', '')
+            if stripped != serial:
+                self.add(stripped, canonical)
+
+    def add_zfs_guids(self, zfs_map):
+        """Register ZFS leaf vdev GUIDs from a canonical-keyed zfs_map."""
+        for canonical, info in (zfs_map or {}).items():
+            guid = info.get('guid') if isinstance(info, dict) else None
+            if guid:
+                self.add(str(guid), canonical)
+
+    @classmethod
+    def build(cls, serial_map=None):
+        index = cls()
+        index._scan_sys_block()
+        index._scan_disk_links()
+        index.add_serials(build_serial_to_dev_map() if serial_map is None else serial_map)
+        return index
+
+    def _scan_sys_block(self):
+        if not os.path.isdir(SYS_BLOCK_ROOT):
+            return
+        for disk in os.scandir(SYS_BLOCK_ROOT):
+            name = disk.name
+            self.add(name, name)
+            try:
+                for child in os.scandir(disk.path):
+                    if child.name.startswith(name) and os.path.exists(os.path.join(child.path, 'partition')):
+                        self.add(child.name, name)
+            except OSError:
+                pass
+            try:
+                with open(os.path.join(disk.path, 'device', 'wwid'), 'r') as fh:
+                    wwid = fh.read().strip()
+                if wwid:
+                    self.add(wwid, name)
+                    # naa.5000c500a1b2c3d4 -> 0x5000c500a1b2c3d4 (lsblk / by-id wwn- form)
+                    match = re.match(r'^(?:naa|eui)\.([0-9a-fA-F]+)$', wwid)
+                    if match:
+                        self.add(f"0x{match.group(1)}", name)
+            except OSError:
+                pass
+
+    def _scan_disk_links(self):
+        for link_dir in DISK_LINK_DIRS:
+            if not os.path.isdir(link_dir):
+                continue
+            for entry in os.scandir(link_dir):
+                kernel_name = os.path.basename(os.path.realpath(entry.path))
+                canonical = self.resolve(kernel_name) or kernel_name
+                self.add(entry.name, canonical)
+                # smartctl temperature keys drop the ata- prefix; wwn- links also
+                # register the bare 0x... WWN.
+                for prefix in ('ata-', 'wwn-'):
+                    if entry.name.startswith(prefix):
+                        self.add(entry.name[len(prefix):], canonical)
@@ -0,0 +1,122 @@
+# Prometheus / OpenMetrics text rendering for GET /metrics.
+# Everything is rendered from the cached GLOBAL_DATA snapshot in one pass over the
+# bays; no subprocesses or sysfs reads, so scrape cost does not depend on hardware.
+
+PREFIX = "truenas_dashboard_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+ALERT_FLAGS = ("poolDegraded", "diskFaultOrErrors", "highTemperature", "servicesStopped", "txgSyncSlow")
+
+# name -> (type, help). Counter samples get the _total suffix.
+FAMILIES = {
+    "up": ("gauge", "1 if the dashboard service is serving metrics."),
+    "api_available": ("gauge", "1 if the TrueNAS middleware API (midclt) answered the last scan."),
+    "bay_present": ("gauge", "1 if a drive is present in the bay, 0 if the bay is empty."),
+    "disk_info": ("gauge", "Static drive metadata; always 1."),
+    "disk_state": ("gauge", "Current ZFS state of the drive; 1 for the reported state label."),
+    "disk_temperature_celsius": ("gauge", "Drive temperature from smartctl (ZFS fallback)."),
+    "disk_read_errors": ("counter", "ZFS read errors reported for the drive."),
+    "disk_write_errors": ("counter", "ZFS write errors reported for the drive."),
+    "disk_checksum_errors": ("counter", "ZFS checksum errors reported for the drive."),
+    "disk_size_bytes": ("gauge", "Drive capacity in bytes."),
+    "disk_io_active": ("gauge", "1 if /proc/diskstats showed recent I/O for the drive."),
+    "pool_state": ("gauge", "Current pool state; 1 for the reported state label."),
+    "pool_healthy": ("gauge", "1 if the pool state is ONLINE."),
+    "pool_read_bytes_per_second": ("gauge", "Smoothed pool read throughput."),
+    "pool_write_bytes_per_second": ("gauge", "Smoothed pool write throughput."),
+    "alert_active": ("gauge", "1 if the named dashboard alert is active."),
+    "alerts_muted": ("gauge", "1 while the alert beeper is muted."),
+    "collector_duration_seconds": ("gauge", "Wall time of the last topology scan, per stage."),
+    "last_scan_timestamp_seconds": ("gauge", "Unix time the last topology scan completed."),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def wants_openmetrics(accept_header):
+    return "application/openmetrics-text" in str(accept_header or "")
+
+
+def render_metrics(data, openmetrics=False):
+    """Render GLOBAL_DATA-shaped data as exposition text. Returns (body, content_type)."""
+    samples = {name: [] for name in FAMILIES}
+    host = data.get("hostname") or ""
+    io_activity = data.get("io_activity") or {}
+
+    samples["up"].append(((("host", host),), 1))
+    api_status = data.get("api_status") or {}
+    samples["api_available"].append(((("host", host),), bool(api_status.get("available", True))))
+
+    for enclosure, chassis in (data.get("topology") or {}).items():
+        for bay, disk in enumerate(chassis.get("disks", [])):
+            bay_labels = (("host", host), ("enclosure", enclosure), ("bay", bay))
+            samples["bay_present"].append((bay_labels, disk.is_present))
+            if not disk.is_present:
+                continue
+            labels = bay_labels + (("pool", disk.pool_name), ("serial", disk.sn))
+            samples["disk_info"].append((labels + (("dev", disk.dev_name), ("model", disk.model)), 1))
+            samples["disk_state"].append((labels + (("state", disk.state),), 1))
+            if disk.temperature_c is not None:
+                samples["disk_temperature_celsius"].append((labels, disk.temperature_c))
+            samples["disk_read_errors"].append((labels, disk.read_errors or 0))
+            samples["disk_write_errors"].append((labels, disk.write_errors or 0))
+            samples["disk_checksum_errors"].append((labels, disk.cksum_errors or 0))
+            if disk.size_bytes:
+                samples["disk_size_bytes"].append((labels, disk.size_bytes))
+            samples["disk_io_active"].append((labels, bool(io_activity.get(disk.dev_name, False))))
+
+    for pool, state in (data.get("pool_states") or {}).items():
+        labels = (("host", host), ("pool", pool))
+        samples["pool_state"].append((labels + (("state", state),), 1))
+        samples["pool_healthy"].append((labels, str(state or '').upper() == 'ONLINE'))
+
+    for pool, history in (data.get("pool_activity_history") or {}).items():
+        labels = (("host", host), ("pool", pool))
+        read_hist, write_hist = history.get('r'), history.get('w')
+        samples["pool_read_bytes_per_second"].append((labels, read_hist[-1] if read_hist else 0.0))
+        samples["pool_write_bytes_per_second"].append((labels, write_hist[-1] if write_hist else 0.0))
+
+    alerts = data.get("alerts") or {}
+    for flag in ALERT_FLAGS:
+        samples["alert_active"].append(((("host", host), ("alert", flag)), bool(alerts.get(flag, False))))
+    samples["alerts_muted"].append(((("host", host),), bool(alerts.get("muteActive", False))))
+
+    for stage, seconds in (data.get("collector_durations") or {}).items():
+        samples["collector_duration_seconds"].append(((("host", host), ("stage", stage)), seconds))
+    last_scan = data.get("last_scan_ts")
+    if last_scan:
+        samples["last_scan_timestamp_seconds"].append(((("host", host),), last_scan))
+
+    lines = []
+    for name, (metric_type, help_text) in FAMILIES.items():
+        rows = samples[name]
+        if not rows:
+            continue
+        family = PREFIX + name
+        sample_name = family + "_total" if metric_type == "counter" else family
+        if metric_type == "counter" and not openmetrics:
+            family = sample_name
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for labels, value in rows:
+            lines.append(f"{sample_name}{_labels(labels)} {_number(value)}")
+
+    if openmetrics:
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n", OPENMETRICS_CONTENT_TYPE
+    return "\n".join(lines) + "\n", PROMETHEUS_CONTENT_TYPE
@@ -0,0 +1,10 @@
+import os
+
+# Root prefix for host paths (/dev, /sys, /proc). Empty on a real host; the
+# benchmark suite points it at a recorded fixture tree via DASHBOARD_HOST_ROOT.
+HOST_ROOT = os.environ.get('DASHBOARD_HOST_ROOT', '').rstrip('/')
+
+
+def host_path(path):
+    """Return path under HOST_ROOT (unchanged when no root is set)."""
+    return f"{HOST_ROOT}{path}" if HOST_ROOT else path
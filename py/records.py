@@ -0,0 +1,100 @@
+import sys
+
+# Bay records are rebuilt on every topology scan and held for the lifetime of the
+# snapshot, so they use __slots__ instead of per-disk dicts. Repeated strings
+# (pool names, ZFS states, device names) are interned so 1000 bays in the same
+# pool share a single pool-name object.
+
+DISK_FIELDS = (
+    "status", "sn", "size_bytes", "dev_name", "pool_name", "pool_idx", "state",
+    "temperature_c", "read_errors", "write_errors", "cksum_errors", "model"
+)
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class DiskRecord:
+    """One drive bay in a chassis topology (PRESENT disk or EMPTY slot)."""
+    __slots__ = DISK_FIELDS
+
+    def __init__(self, status="PRESENT", sn="", size_bytes=0, dev_name="", pool_name="",
+                 pool_idx="", state="UNALLOCATED", temperature_c=None, read_errors=0,
+                 write_errors=0, cksum_errors=0, model=""):
+        self.status        = _intern(status)
+        self.sn            = sn
+        self.size_bytes    = size_bytes
+        self.dev_name      = _intern(dev_name)
+        self.pool_name     = _intern(pool_name)
+        self.pool_idx      = pool_idx
+        self.state         = _intern(state)
+        self.temperature_c = temperature_c
+        self.read_errors   = read_errors
+        self.write_errors  = write_errors
+        self.cksum_errors  = cksum_errors
+        self.model         = model
+
+    @property
+    def is_present(self):
+        return self.status == "PRESENT"
+
+    def to_dict(self, active=False):
+        """Serialize to the /data disk payload shape."""
+        if self.status != "PRESENT":
+            return {"status": self.status, "active": False}
+        return {
+            "status":        self.status,
+            "sn":            self.sn,
+            "size_bytes":    self.size_bytes,
+            "dev_name":      self.dev_name,
+            "pool_name":     self.pool_name,
+            "pool_idx":      self.pool_idx,
+            "state":         self.state,
+            "temperature_c": self.temperature_c,
+            "read_errors":   self.read_errors,
+            "write_errors":  self.write_errors,
+            "cksum_errors":  self.cksum_errors,
+            "model":         self.model,
+            "active":        bool(active)
+        }
+
+    def __repr__(self):
+        if self.status != "PRESENT":
+            return f"DiskRecord(status={self.status!r})"
+        return f"DiskRecord(dev_name={self.dev_name!r}, sn={self.sn!r}, state={self.state!r})"
+
+
+# Shared placeholder for unpopulated slots; never mutated.
+EMPTY_BAY = DiskRecord(status="EMPTY")
+
+
+def serialize_topology(topology, io_activity=None):
+    """Return a JSON-ready copy of a {chassis_key: {settings, disks}} topology."""
+    io_activity = io_activity or {}
+    out = {}
+    for key, data in topology.items():
+        out[key] = {
+            "settings": data["settings"],
+            "disks": [d.to_dict(io_activity.get(d.dev_name, False)) for d in data["disks"]]
+        }
+    return out
+
+
+def deserialize_topology(payload):
+    """Rebuild DiskRecord topology from serialize_topology() output (process-split mode)."""
+    out = {}
+    for key, data in (payload or {}).items():
+        disks = []
+        for disk in data.get("disks", []):
+            status = disk.get("status", "EMPTY")
+            if status == "EMPTY":
+                disks.append(EMPTY_BAY)
+            elif status != "PRESENT":
+                disks.append(DiskRecord(status=status))
+            else:
+                disks.append(DiskRecord(**{field: disk[field] for field in DISK_FIELDS if field in disk}))
+        out[key] = {"settings": data.get("settings", {}), "disks": disks}
+    return out
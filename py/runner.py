@@ -0,0 +1,329 @@
+import asyncio, os, shutil, signal, subprocess, threading, time
+from contextlib import contextmanager
+from .timings import record
+
+# Single execution path for external tools (midclt, smartctl, sas2ircu/sas3ircu,
+# storcli, lsblk, zpool, beep):
+#   - a global cap on concurrently running commands,
+#   - per-tool default timeouts; on deadline the whole process group is killed,
+#   - duration / timeout / failure stats recorded into py/timings.py,
+#   - a circuit breaker per call label and target device (_breaker_key), so a call
+#     that keeps failing is skipped for a backoff period instead of being retried on
+#     every 5 s scan, without taking down the tool's other calls.
+# run_command()/command_output() raise the same subprocess exceptions callers already
+# handle, plus CircuitOpen (a SubprocessError) while a call is backed off.
+#
+# Inside prefetch_scope() (one scan cycle of the asyncio engine, py/async_collector.py)
+# results are cached per command line: calls the engine already ran concurrently are
+# answered from the cache, and repeated calls within the cycle run only once. The
+# cache belongs to the scanning thread (carry_prefetch() hands it to the scan's own
+# worker threads); other threads' calls always run for real.
+# run_command_async() takes the same global slots as run_command(), so the asyncio
+# engine never has more than MAX_CONCURRENT_COMMANDS tools running either.
+
+MAX_CONCURRENT_COMMANDS = 4
+RUNNER_SEMAPHORE = threading.BoundedSemaphore(MAX_CONCURRENT_COMMANDS)
+
+DEFAULT_TIMEOUT_SECS = 10
+TOOL_TIMEOUTS = {
+    "midclt": 5,
+    "smartctl": 5,
+    "sas2ircu": 5,
+    "sas3ircu": 5,
+    "storcli": 15,     # /call/eall/sall show all queries every drive
+    "storcli64": 15,
+    "storcli2": 15,
+    "lsblk": 5,
+    "zpool": 10,
+    "beep": 2
+}
+
+BREAKER_FAILURE_THRESHOLD = 3       # consecutive failures before the breaker opens
+BREAKER_BASE_BACKOFF_SECS = 30.0
+BREAKER_MAX_BACKOFF_SECS = 300.0
+BREAKER_LOCK = threading.Lock()
+BREAKERS = {}   # tool -> {"failures", "opened", "open_until", "backoff", "last_error"}
+
+_PREFETCH = threading.local()   # .cache: {command tuple: CompletedProcess | exception} while this thread's scope is open
+SLOT_POLL_SECS = 0.01
+
+WHICH_TTL_SECS = 60.0
+_WHICH_CACHE = {}   # tool -> (path or None, checked_at)
+
+
+class CircuitOpen(subprocess.SubprocessError):
+    """Raised instead of running a tool whose breaker is open."""
+
+    def __init__(self, tool, retry_in):
+        self.tool = tool
+        self.retry_in = retry_in
+        super().__init__(f"{tool} skipped: circuit open after repeated failures (retry in {retry_in:.0f}s)")
+
+
+def find_tool(tool):
+    """shutil.which with a short cache; tool availability rarely changes between scans."""
+    now = time.time()
+    cached = _WHICH_CACHE.get(tool)
+    if cached and now - cached[1] < WHICH_TTL_SECS:
+        return cached[0]
+    path = shutil.which(tool)
+    _WHICH_CACHE[tool] = (path, now)
+    return path
+
+
+def _tool_name(cmd):
+    return os.path.basename(str(cmd[0])) if cmd else "?"
+
+
+def _breaker_key(cmd, name):
+    """
+    What a breaker guards: the call's label (e.g. "midclt pool.query", so a slow
+    service.query cannot block pool status), plus the target device when the
+    command names one (smartctl per disk), so a few dying disks don't silence
+    the probes of every other disk. Unlabelled calls fall back to the tool name.
+    """
+    key = name or _tool_name(cmd)
+    devices = [str(part) for part in cmd[1:] if str(part).startswith('/dev/')]
+    return f"{key} {' '.join(devices)}" if devices else key
+
+
+def _breaker_check(tool):
+    with BREAKER_LOCK:
+        state = BREAKERS.get(tool)
+        if not state or not state["opened"]:
+            return
+        remaining = state["open_until"] - time.time()
+        if remaining > 0:
+            raise CircuitOpen(tool, remaining)
+        # Half-open: let this call through as the trial; reopen immediately if it fails.
+        state["failures"] = BREAKER_FAILURE_THRESHOLD - 1
+
+
+def _breaker_result(tool, error=None):
+    with BREAKER_LOCK:
+        state = BREAKERS.setdefault(tool, {"failures": 0, "opened": False, "open_until": 0.0,
+                                           "backoff": BREAKER_BASE_BACKOFF_SECS, "last_error": None})
+        if error is None:
+            if state["opened"]:
+                print(f"Runner: {tool} recovered, circuit closed")
+            state.update(failures=0, opened=False, open_until=0.0, backoff=BREAKER_BASE_BACKOFF_SECS)
+            return
+        state["failures"] += 1
+        state["last_error"] = str(error)[:300]
+        if state["failures"] >= BREAKER_FAILURE_THRESHOLD:
+            if state["opened"]:
+                state["backoff"] = min(state["backoff"] * 2, BREAKER_MAX_BACKOFF_SECS)
+            state["opened"] = True
+            state["open_until"] = time.time() + state["backoff"]
+            print(f"Runner: {tool} failed {state['failures']}x ({state['last_error']}); "
+                  f"skipping it for {state['backoff']:.0f}s")
+
+
+def breaker_status():
+    """Per-call breaker state (keyed as _breaker_key) for /debug/timings."""
+    now = time.time()
+    with BREAKER_LOCK:
+        return {
+            tool: {
+                "state": ("open" if state["open_until"] > now else "half-open") if state["opened"] else "closed",
+                "consecutive_failures": state["failures"],
+                "retry_in_secs": round(max(0.0, state["open_until"] - now), 1) if state["opened"] else 0.0,
+                "last_error": state["last_error"]
+            }
+            for tool, state in BREAKERS.items()
+        }
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
+
+def _command_key(cmd):
+    return tuple(str(part) for part in cmd)
+
+
+@contextmanager
+def prefetch_scope():
+    """Cache this thread's command results for one scan cycle; yields the cache the async engine fills."""
+    previous = getattr(_PREFETCH, "cache", None)
+    cache = _PREFETCH.cache = {}
+    try:
+        yield cache
+    finally:
+        _PREFETCH.cache = previous
+
+
+def carry_prefetch(fn):
+    """Wrap fn for a worker thread so its run_command() calls share the calling thread's scan cache."""
+    cache = getattr(_PREFETCH, "cache", None)
+    if cache is None:
+        return fn
+
+    def run_with_cache(*args, **kwargs):
+        previous = getattr(_PREFETCH, "cache", None)
+        _PREFETCH.cache = cache
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _PREFETCH.cache = previous
+    return run_with_cache
+
+
+def _cached_result(cached, cmd, check):
+    if isinstance(cached, BaseException):
+        raise cached
+    if check and cached.returncode != 0:
+        raise subprocess.CalledProcessError(cached.returncode, cmd, output=cached.stdout, stderr=cached.stderr)
+    return cached
+
+
+def run_command(cmd, timeout=None, check=True, name=None, stderr=subprocess.PIPE):
+    """
+    Run cmd and return a text-mode CompletedProcess.
+    check=True raises CalledProcessError on a non-zero exit (like subprocess.run).
+    name labels the stats entry (defaults to the tool name).
+    """
+    cache = getattr(_PREFETCH, "cache", None)
+    if cache is not None:
+        key = _command_key(cmd)
+        if key in cache:
+            return _cached_result(cache[key], cmd, check)
+        try:
+            cache[key] = _run_command(cmd, timeout, check, name, stderr)
+        except subprocess.CalledProcessError as ex:
+            cache[key] = subprocess.CompletedProcess(cmd, ex.returncode, ex.output, ex.stderr)
+        except Exception as ex:
+            cache[key] = ex
+        return _cached_result(cache[key], cmd, check)
+    return _run_command(cmd, timeout, check, name, stderr)
+
+
+def _run_command(cmd, timeout, check, name, stderr):
+    tool = _tool_name(cmd)
+    label = name or tool
+    timeout = TOOL_TIMEOUTS.get(tool, DEFAULT_TIMEOUT_SECS) if timeout is None else timeout
+    breaker = _breaker_key(cmd, name)
+    _breaker_check(breaker)
+
+    started = time.perf_counter()
+    # Waiting for a slot counts against the deadline.
+    if not RUNNER_SEMAPHORE.acquire(timeout=timeout):
+        ex = subprocess.TimeoutExpired(cmd, timeout)
+        record("command", label, time.perf_counter() - started, "timeout", "no free command slot")
+        raise ex
+    try:
+        try:
+            # Own session so a deadline kill also takes out anything the tool spawned.
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, stdin=subprocess.DEVNULL,
+                                    text=True, start_new_session=True)
+        except OSError as ex:
+            record("command", label, time.perf_counter() - started, "error", ex)
+            _breaker_result(breaker, ex)
+            raise
+        try:
+            remaining = max(0.01, timeout - (time.perf_counter() - started))
+            stdout, err_out = proc.communicate(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            proc.communicate()
+            ex = subprocess.TimeoutExpired(cmd, timeout)
+            record("command", label, time.perf_counter() - started, "timeout", ex)
+            _breaker_result(breaker, ex)
+            raise ex
+    finally:
+        RUNNER_SEMAPHORE.release()
+
+    elapsed = time.perf_counter() - started
+    result = subprocess.CompletedProcess(cmd, proc.returncode, stdout, err_out)
+    if check and proc.returncode != 0:
+        ex = subprocess.CalledProcessError(proc.returncode, cmd, output=stdout, stderr=err_out)
+        record("command", label, elapsed, "error", ex)
+        _breaker_result(breaker, ex)
+        raise ex
+    record("command", label, elapsed)
+    _breaker_result(breaker)
+    return result
+
+
+def command_output(cmd, timeout=None, name=None, stderr=subprocess.PIPE):
+    """run_command(cmd).stdout; drop-in for subprocess.check_output(..., text=True)."""
+    return run_command(cmd, timeout=timeout, check=True, name=name, stderr=stderr).stdout
+
+
+async def run_command_async(cmd, timeout=None, check=True, name=None, semaphore=None, stderr=subprocess.PIPE):
+    """
+    asyncio twin of run_command() for the async engine: same timeouts, process-group
+    kill, breakers and stats, but it never raises for a non-zero exit; the returned
+    CompletedProcess is checked when run_command() reads it from the prefetch cache.
+    check only decides whether a non-zero exit counts as a failure.
+    Each command also holds one of the global RUNNER_SEMAPHORE slots while it runs
+    (polled, so the event loop never blocks); semaphore (asyncio.Semaphore) can
+    bound a batch further.
+    """
+    tool = _tool_name(cmd)
+    label = name or tool
+    timeout = TOOL_TIMEOUTS.get(tool, DEFAULT_TIMEOUT_SECS) if timeout is None else timeout
+    breaker = _breaker_key(cmd, name)
+    _breaker_check(breaker)
+
+    started = time.perf_counter()
+    if semaphore is not None:
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            ex = subprocess.TimeoutExpired(cmd, timeout)
+            record("command", label, time.perf_counter() - started, "timeout", "no free command slot")
+            raise ex
+    # Waiting for a global slot counts against the deadline, as in run_command().
+    while not RUNNER_SEMAPHORE.acquire(blocking=False):
+        if time.perf_counter() - started >= timeout:
+            if semaphore is not None:
+                semaphore.release()
+            ex = subprocess.TimeoutExpired(cmd, timeout)
+            record("command", label, time.perf_counter() - started, "timeout", "no free command slot")
+            raise ex
+        await asyncio.sleep(SLOT_POLL_SECS)
+    try:
+        try:
+            proc = await asyncio.create_subprocess_exec(*[str(part) for part in cmd], stdout=subprocess.PIPE,
+                                                        stderr=stderr, stdin=subprocess.DEVNULL,
+                                                        start_new_session=True)
+        except OSError as ex:
+            record("command", label, time.perf_counter() - started, "error", ex)
+            _breaker_result(breaker, ex)
+            raise
+        try:
+            remaining = max(0.01, timeout - (time.perf_counter() - started))
+            stdout, err_out = await asyncio.wait_for(proc.communicate(), remaining)
+        except asyncio.TimeoutError:
+            _kill_group(proc)
+            await proc.wait()
+            ex = subprocess.TimeoutExpired(cmd, timeout)
+            record("command", label, time.perf_counter() - started, "timeout", ex)
+            _breaker_result(breaker, ex)
+            raise ex
+    finally:
+        RUNNER_SEMAPHORE.release()
+        if semaphore is not None:
+            semaphore.release()
+
+    elapsed = time.perf_counter() - started
+    result = subprocess.CompletedProcess(
+        cmd, proc.returncode,
+        stdout.decode(errors='replace') if stdout is not None else None,
+        err_out.decode(errors='replace') if err_out is not None else None
+    )
+    if check and proc.returncode != 0:
+        ex = subprocess.CalledProcessError(proc.returncode, cmd, output=result.stdout, stderr=result.stderr)
+        record("command", label, elapsed, "error", ex)
+        _breaker_result(breaker, ex)
+        return result
+    record("command", label, elapsed)
+    _breaker_result(breaker)
+    return result
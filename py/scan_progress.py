@@ -0,0 +1,283 @@
+import json, os, re, threading, time
+from collections import deque
+from .config import BASE_DIR
+
+# Scrub / resilver progress per pool.
+#
+# Every topology scan hands each pool's scan record (midclt pool.query "scan", or
+# the scan: block of zpool status) to update_pools(). While a scan runs, the
+# bytes issued are sampled per scan cycle: the issue rate is smoothed with an
+# EWMA and gives the ETA and percent done. A finished or cancelled scan goes
+# into SCAN_HISTORY with its duration and average throughput, persisted to
+# SCAN_HISTORY_FILE, so a running scan can be compared with the pool's usual
+# rate for the same function. Served at GET /scan-progress.
+
+SCAN_HISTORY_FILE = os.environ.get('DASHBOARD_SCAN_HISTORY', os.path.join(BASE_DIR, 'scan_history.json'))
+HISTORY_LIMIT = 100
+SAMPLE_LIMIT = 120                  # ~10 minutes of samples at the 5 s scan interval
+RATE_SMOOTHING = 0.2                # EWMA weight of the newest issue-rate sample
+SLOW_FACTOR = 0.75                  # flagged when the rate falls under 75% of the usual rate
+USUAL_RUNS = 5                      # past runs the usual rate is taken from
+
+SCAN_LOCK = threading.Lock()
+SCAN_STATE = {}                     # pool -> progress of the running scan
+SCAN_HISTORY = deque(maxlen=HISTORY_LIMIT)
+_HISTORY_LOADED = {"done": False}
+
+ACTIVE_STATES = ("SCANNING",)
+DONE_STATES = ("FINISHED", "CANCELED")
+
+
+def _timestamp(value):
+    """pool.query dates ({"$date": ms}), epoch seconds/ms, or None."""
+    if isinstance(value, dict):
+        value = value.get('$date')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    return value / 1000.0 if value > 1e11 else value
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def from_pool_query(scan):
+    """Normalise a pool.query "scan" dict; None when the pool has never been scanned."""
+    if not isinstance(scan, dict) or not scan.get('function'):
+        return None
+    return {
+        "function":   str(scan.get('function')).upper(),
+        "state":      str(scan.get('state') or 'FINISHED').upper(),
+        "paused":     bool(scan.get('pause')),
+        "started_at": _timestamp(scan.get('start_time')),
+        "ended_at":   _timestamp(scan.get('end_time')),
+        "total":      _int(scan.get('bytes_to_process')),
+        "scanned":    _int(scan.get('bytes_processed')),
+        "issued":     _int(scan.get('bytes_issued')),
+        "errors":     _int(scan.get('errors')) or 0
+    }
+
+
+_SIZE = r'([\d.]+)\s*([KMGTPE]?)i?B?'
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40, "P": 1 << 50, "E": 1 << 60}
+_DATE = r'(\w{3} \w{3}\s+\d+ \d\d:\d\d:\d\d \d{4})'
+
+
+def _bytes(number, unit):
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def _parse_date(text):
+    try:
+        return time.mktime(time.strptime(re.sub(r'\s+', ' ', text), "%a %b %d %H:%M:%S %Y"))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _duration(text):
+    """'03:12:45' or '1 days 03:12:45' -> seconds."""
+    match = re.match(r'(?:(\d+) days? )?(\d+):(\d\d):(\d\d)', text)
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def from_zpool_status(text):
+    """
+    Normalise a zpool status scan: block (the scan: line and its continuation lines):
+      scan: scrub in progress since Sun Oct 19 00:24:01 2025
+            1.23T / 4.56T scanned at 1.20G/s, 800G / 4.56T issued at 900M/s
+            0B repaired, 17.12% done, 01:12:33 to go
+      scan: resilvered 1.20T in 05:00:00 with 0 errors on Sun Oct 12 03:36:46 2025
+    -p output (exact byte counts) parses the same way. None for "none requested".
+    """
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    text = re.sub(r'^scan: ', '', text)
+    match = re.match(r'(scrub|resilver|rebuild|repair)', text)
+    if not match:
+        return None
+    info = {"function": match.group(1).upper(), "state": "FINISHED", "paused": False, "started_at": None,
+            "ended_at": None, "total": None, "scanned": None, "issued": None, "errors": 0}
+    running = re.search(r'(?:in progress|paused) since ' + _DATE, text)
+    if running:
+        info["state"] = "SCANNING"
+        info["paused"] = 'paused since' in text
+        # A paused scan reports when it paused; the start follows as "started on".
+        started = re.search(r'started on ' + _DATE, text)
+        info["started_at"] = _parse_date((started or running).group(1))
+        scanned = re.search(_SIZE + r' / ' + _SIZE + r' scanned', text)
+        if scanned:
+            info["scanned"] = _bytes(*scanned.group(1, 2))
+            info["total"] = _bytes(*scanned.group(3, 4))
+        issued = re.search(_SIZE + r' / ' + _SIZE + r' issued', text)
+        if issued:
+            info["issued"] = _bytes(*issued.group(1, 2))
+        return info
+    canceled = re.search(r'canceled on ' + _DATE, text)
+    if canceled:
+        info["state"] = "CANCELED"
+        info["ended_at"] = _parse_date(canceled.group(1))
+        return info
+    done = re.search(r'(?:repaired|resilvered) ' + _SIZE + r' in (.+?) with (\d+) errors on ' + _DATE, text)
+    if done:
+        info["ended_at"] = _parse_date(done.group(5))
+        elapsed = _duration(done.group(3))
+        if info["ended_at"] is not None and elapsed is not None:
+            info["started_at"] = info["ended_at"] - elapsed
+        info["errors"] = int(done.group(4))
+    return info
+
+
+def _load_history():
+    """Read SCAN_HISTORY_FILE once (lock held by caller)."""
+    if _HISTORY_LOADED["done"]:
+        return
+    _HISTORY_LOADED["done"] = True
+    try:
+        with open(SCAN_HISTORY_FILE, 'r') as f:
+            entries = json.load(f)
+        SCAN_HISTORY.extend(entry for entry in entries if isinstance(entry, dict))
+    except FileNotFoundError:
+        pass
+    except Exception as e: print(f"Scan history load error: {e}")
+
+
+def _save_history():
+    try:
+        tmp_path = SCAN_HISTORY_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(list(SCAN_HISTORY), f, indent=1)
+        os.replace(tmp_path, SCAN_HISTORY_FILE)
+    except Exception as e: print(f"Scan history save error: {e}")
+
+
+def _record_history(pool, info, entry):
+    """Append a finished/cancelled scan once (lock held by caller); True when added."""
+    started, ended = info["started_at"], info["ended_at"]
+    if started is None or ended is None or ended < started:
+        return False
+    # zpool status start times are derived (end - elapsed), so match within a minute.
+    if any(h["pool"] == pool and h["function"] == info["function"] and abs(h["started_at"] - started) < 60
+           for h in SCAN_HISTORY):
+        return False
+    # A finished scan may report no byte counts (zpool status never does); use the last running reading.
+    total = info["total"] or (entry or {}).get("total") or 0
+    issued = info["issued"] or (entry or {}).get("issued") or total
+    duration = ended - started
+    SCAN_HISTORY.append({
+        "pool": pool,
+        "function": info["function"],
+        "state": info["state"],
+        "started_at": started,
+        "ended_at": ended,
+        "duration_secs": round(duration, 1),
+        "bytes_issued": issued,
+        "rate_bytes_per_sec": round(issued / duration, 1) if issued and duration > 0 else None,
+        "errors": info["errors"]
+    })
+    return True
+
+
+def _usual_rate(pool, function):
+    """Median throughput of the pool's last USUAL_RUNS finished runs of this function (lock held)."""
+    rates = [
+        h["rate_bytes_per_sec"] for h in SCAN_HISTORY
+        if h["pool"] == pool and h["function"] == function and h["state"] == "FINISHED" and h.get("rate_bytes_per_sec")
+    ][-USUAL_RUNS:]
+    if not rates:
+        return None
+    return sorted(rates)[len(rates) // 2]
+
+
+def _sample(entry, info, now):
+    """Add one running-scan reading to entry and refresh its smoothed rate (lock held)."""
+    issued = info["issued"] if info["issued"] is not None else info["scanned"]
+    entry.update(total=info["total"], scanned=info["scanned"], issued=issued,
+                 errors=info["errors"], paused=info["paused"])
+    if issued is None:
+        return
+    samples = entry["samples"]
+    if samples and not info["paused"]:
+        last_ts, last_issued = samples[-1]
+        if now > last_ts and issued >= last_issued:
+            rate = (issued - last_issued) / (now - last_ts)
+            previous = entry["rate"]
+            entry["rate"] = rate if previous is None else RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * previous
+    elif entry["rate"] is None and info["started_at"] and now > info["started_at"] and issued:
+        # First reading of a scan already under way: start from its average rate.
+        entry["rate"] = issued / (now - info["started_at"])
+    samples.append((now, issued))
+
+
+def update_pools(scans, now=None):
+    """Called once per topology scan with {pool: normalised scan record or None}."""
+    now = time.time() if now is None else now
+    changed = False
+    with SCAN_LOCK:
+        _load_history()
+        for pool, info in scans.items():
+            entry = SCAN_STATE.get(pool)
+            if info is None:
+                SCAN_STATE.pop(pool, None)
+                continue
+            if info["state"] in ACTIVE_STATES:
+                key = (info["function"], info["started_at"])
+                if entry is None or entry["key"] != key:
+                    entry = SCAN_STATE[pool] = {
+                        "key": key, "function": info["function"], "started_at": info["started_at"],
+                        "first_seen": now, "samples": deque(maxlen=SAMPLE_LIMIT), "rate": None,
+                        "total": None, "scanned": None, "issued": None, "errors": 0, "paused": False
+                    }
+                _sample(entry, info, now)
+            elif info["state"] in DONE_STATES:
+                if entry is not None and entry["function"] == info["function"]:
+                    SCAN_STATE.pop(pool, None)
+                changed = _record_history(pool, info, entry) or changed
+        # Exported / destroyed pools
+        for pool in [p for p in SCAN_STATE if p not in scans]:
+            del SCAN_STATE[pool]
+        if changed:
+            _save_history()
+
+
+def _active_status(pool, entry, now):
+    total, issued, rate = entry["total"], entry["issued"], entry["rate"]
+    percent = round(min(100.0, issued * 100.0 / total), 2) if total and issued is not None else None
+    eta = None
+    if rate and rate > 0 and total and issued is not None and not entry["paused"]:
+        eta = round(max(0, total - issued) / rate)
+    usual = _usual_rate(pool, entry["function"])
+    return {
+        "function": entry["function"],
+        "paused": entry["paused"],
+        "started_at": entry["started_at"],
+        "elapsed_secs": round(now - (entry["started_at"] or entry["first_seen"]), 1),
+        "bytes_total": total,
+        "bytes_scanned": entry["scanned"],
+        "bytes_issued": issued,
+        "percent_done": percent,
+        "issue_rate_bytes_per_sec": round(rate, 1) if rate is not None else None,
+        "eta_secs": eta,
+        "errors": entry["errors"],
+        "usual_rate_bytes_per_sec": usual,
+        "slower_than_usual": bool(usual and rate is not None and not entry["paused"] and rate < usual * SLOW_FACTOR)
+    }
+
+
+def scan_progress_status():
+    """Payload of GET /scan-progress: running scans per pool and the finished-scan history."""
+    now = time.time()
+    with SCAN_LOCK:
+        _load_history()
+        return {
+            "active": {pool: _active_status(pool, entry, now) for pool, entry in SCAN_STATE.items()},
+            "history": list(SCAN_HISTORY)
+        }
@@ -1,9 +1,26 @@
-import http.server, socketserver, json, time, subprocess, socket, os, re, threading, shutil
-import urllib.request, urllib.error
+import http.server, socketserver, json, time, subprocess, socket, os, re, threading, hashlib
+import urllib.request, urllib.error, urllib.parse
 from collections import deque
-from zfs_logic import get_zfs_topology, get_api_status, _fetch_disk_temperatures_via_api
 from .config import load_config, load_style_config, CONFIG_FILE, DEFAULT_CONFIG_JSON, BASE_DIR
-from .topology import get_controller_capacity, is_virtual_storage_controller, get_ircu_slot_topology, lookup_zfs_disk_entry, _find_ircu_adapter, normalize_pci_address, _parse_ircu_display, build_serial_to_dev_map
+from . import config as config_module
+from .topology import get_ircu_slot_topology, _find_ircu_adapter, normalize_pci_address, _parse_ircu_display, build_serial_to_dev_map
+from .records import serialize_topology, deserialize_topology
+from .diskstats import get_io_snapshot, get_dynamic_pool_mapping, get_diskstats_for_pools
+from .collector import scan_topology
+from .federation import federated_data, federated_pool_activity
+from .metrics import render_metrics, wants_openmetrics
+from .paths import host_path
+from .runner import run_command, command_output, find_tool, breaker_status
+from .timings import timings_snapshot, arm_profiler, profiler_status, profile_bytes, profile_text, profile_cycle, timed
+from .splitmode import split_channels, collector_status, process_split_enabled, start_split_mode
+from .governor import governor_thread, governor_status, interval_scale, BASE_IO_INTERVAL_SECS, BASE_POOL_INTERVAL_SECS
+from .scan_progress import scan_progress_status
+from .zpool_iostat import zpool_iostat_thread, note_pools as note_iostat_pools, iostat_status, record_sample as record_iostat_sample
+from .arcstats import arc_monitor_thread, arc_status, record_sample as record_arc_sample
+from .dataset_io import dataset_io_thread, dataset_io_status, record_sample as record_dataset_sample, DEFAULT_TOP_N
+from .txg_stats import txg_monitor_thread, txg_status, record_sample as record_txg_sample, slow_sync_pools, sync_alert_ms
+from .alerts import update_inputs as update_alert_inputs, current_alerts, mute as mute_alerts, mute_remaining_sec, alert_beeper_thread, alert_events_status
+from .demand import note_viewer, sampler_sleep, demand_status, apply_config as apply_demand_config, VIEWER_PATHS
 
 CONFIG_MTIME = 0
 CONFIG_CACHE = None
@@ -20,15 +37,6 @@ GLOBAL_DATA = {
         "hasStopped": False,
         "source": "unknown",
         "error": None
-    },
-    "alerts": {
-        "poolDegraded": False,
-        "diskFaultOrErrors": False,
-        "highTemperature": False,
-        "activeCount": 0,
-        "activeNames": [],
-        "muteActive": False,
-        "muteRemainingSec": 0
     }
 }
 
@@ -37,7 +45,7 @@ GITHUB_REPO = 'TrueNAS_Scale_Drive-Bay_Dashboard'
 GITHUB_BRANCH = 'main'
 REPO_SYNC_TIMEOUT_SECS = 12
 ALERT_MUTE_SECONDS = 300
-ALERT_MUTE_UNTIL_TS = 0.0
+SCAN_INTERVAL_SECS = 5
 LOCAL_VERSION_FILE = 'VERSION'
 REPO_SYNC_ENABLED_OVERRIDE = None
 
@@ -48,7 +56,8 @@ REPO_SYNC_TRACKED_FILES = [
     'service.py', 'start_up.sh', 'zfs_logic.py',
     'js/utils.js', 'js/data.js', 'js/topology.js', 'js/styleVars.js', 'js/renderer.js',
     'js/configStore.js', 'js/stylePreview.js', 'js/menuBuilder.js',
-    'py/__init__.py', 'py/config.py', 'py/topology.py', 'py/server.py',
+    'py/__init__.py', 'py/config.py', 'py/topology.py', 'py/server.py', 'py/records.py', 'py/identity.py', 'py/federation.py',
+    'py/diskstats.py', 'py/collector.py', 'py/metrics.py', 'py/paths.py', 'py/simulator.py', 'py/timings.py', 'py/runner.py', 'py/async_collector.py', 'py/splitmode.py', 'py/governor.py', 'py/demand.py', 'py/enclosure.py', 'py/storcli.py', 'py/hwmon.py', 'py/scan_progress.py', 'py/zpool_iostat.py', 'py/arcstats.py', 'py/dataset_io.py', 'py/txg_stats.py', 'py/alerts.py', 'collect.py',
     'CHANGELOG.md', 'VERSION'
 ]
 
@@ -398,106 +407,28 @@ def get_port():
     return 8010
 
 
-def get_io_snapshot():
-    activity = {}
-    try:
-        with open('/proc/diskstats', 'r') as f:
-            for line in f:
-                parts = line.split()
-                if len(parts) < 13: continue
-                dev, r, w = parts[2], int(parts[3]), int(parts[7])
-                activity[dev] = r + w
-    except: pass
-    return activity
-
-
-def _to_float_or_none(value):
-    try:
-        return float(value)
-    except Exception:
-        return None
-
-
-def _to_int_or_zero(value):
-    try:
-        return int(value)
-    except Exception:
-        return 0
-
-
-def _alert_mute_remaining_sec():
-    remaining = ALERT_MUTE_UNTIL_TS - time.time()
-    if remaining <= 0:
-        return 0
-    return int(remaining + 0.999)
-
-
 def _with_alert_mute_state(alerts):
-    mute_remaining = _alert_mute_remaining_sec()
+    mute_remaining = mute_remaining_sec()
     payload = dict(alerts or {})
     payload['muteActive'] = mute_remaining > 0
     payload['muteRemainingSec'] = mute_remaining
     return payload
 
 
-def _compute_alerts_from_global_state():
-    pool_states = GLOBAL_DATA.get("pool_states") or {}
-    topology = GLOBAL_DATA.get("topology") or {}
+def _current_alerts():
+    return _with_alert_mute_state(current_alerts())
 
-    pool_degraded = any(str(state or '').upper() != 'ONLINE' for state in pool_states.values())
-    disk_fault_or_errors = False
-    high_temperature = False
-    services_payload = GLOBAL_DATA.get("services") or {}
-    services_stopped = bool(services_payload.get("hasStopped", False))
 
-    for enclosure in topology.values():
-        for disk in enclosure.get("disks", []):
-            if disk.get("status") != "PRESENT":
-                continue
-
-            disk_state = str(disk.get("state") or '').upper()
-            if disk_state in ('FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED'):
-                disk_fault_or_errors = True
-
-            read_errors = _to_int_or_zero(disk.get("read_errors"))
-            write_errors = _to_int_or_zero(disk.get("write_errors"))
-            cksum_errors = _to_int_or_zero(disk.get("cksum_errors"))
-            if (read_errors + write_errors + cksum_errors) > 0:
-                disk_fault_or_errors = True
-
-            temperature_c = _to_float_or_none(disk.get("temperature_c"))
-            if temperature_c is not None and temperature_c > 40.0:
-                high_temperature = True
-
-            if disk_fault_or_errors and high_temperature:
-                break
-        if disk_fault_or_errors and high_temperature:
-            break
-
-    names = []
-    if pool_degraded:
-        names.append('Pool Health Alert')
-    if disk_fault_or_errors:
-        names.append('Disk Fault/Error Alert')
-    if high_temperature:
-        names.append('High Temperature Alert')
-    if services_stopped:
-        names.append('Services Stopped Alert')
-
-    return {
-        "poolDegraded": pool_degraded,
-        "diskFaultOrErrors": disk_fault_or_errors,
-        "highTemperature": high_temperature,
-        "servicesStopped": services_stopped,
-        "activeCount": len(names),
-        "activeNames": names
-    }
+def _record_txg_sample(sample):
+    """Keep the txg windows and re-evaluate the TXG sync alert against them."""
+    record_txg_sample(sample)
+    update_alert_inputs(txg_slow_pools=slow_sync_pools(sync_alert_ms(GLOBAL_DATA.get("config"))))
 
 
 def _host_beep_once():
     try:
-        if shutil.which('beep'):
-            subprocess.Popen(['beep', '-f', '1400', '-l', '120'])
+        if find_tool('beep'):
+            run_command(['beep', '-f', '1400', '-l', '120'], check=False)
             return True
         # Console bell fallback for environments without the beep utility.
         print('\a', end='', flush=True)
@@ -507,24 +438,8 @@ def _host_beep_once():
 
 
 def alert_monitor_thread():
-    beep_interval_secs = 2.0
-    poll_interval_secs = 1.0
-    last_beep_at = 0.0
-
-    while True:
-        try:
-            alerts = _with_alert_mute_state(_compute_alerts_from_global_state())
-            GLOBAL_DATA["alerts"] = alerts
-
-            if alerts.get("activeCount", 0) > 0 and not alerts.get('muteActive', False):
-                now = time.time()
-                if (now - last_beep_at) >= beep_interval_secs:
-                    _host_beep_once()
-                    last_beep_at = now
-        except Exception as e:
-            print(f"Alert monitor error: {e}")
-
-        time.sleep(poll_interval_secs)
+    """Beep while an alert is active and not muted; the alert engine wakes it on changes."""
+    alert_beeper_thread(_host_beep_once)
 
 def io_monitor_thread():
     last_io, cooldowns = {}, {}
@@ -537,94 +452,11 @@ def io_monitor_thread():
                 cooldowns[dev] -= 1
             last_io[dev] = count
         GLOBAL_DATA["io_activity"] = {d: (v > 0) for d, v in cooldowns.items()}
-        time.sleep(0.1)
-
-def get_dynamic_pool_mapping():
-    """Map drive base names to their ZFS pool names"""
-    mapping = {}
-    try:
-        cmd = ["lsblk", "-pno", "KNAME,LABEL,FSTYPE"]
-        output = subprocess.check_output(cmd, text=True)
-        for line in output.splitlines():
-            parts = line.split()
-            if "zfs_member" in parts and len(parts) >= 2:
-                pool_name = parts[1] if parts[1] != "zfs_member" else (parts[2] if len(parts) > 2 else "unknown")
-                dev_name = parts[0].replace("/dev/", "")
-                base_dev = "".join(filter(str.isalpha, dev_name))
-                mapping[base_dev] = pool_name
-    except: 
-        pass
-    return mapping
-
-def get_diskstats_for_pools():
-    """Read current diskstats for all drives"""
-    stats = {}
-    try:
-        with open('/proc/diskstats', 'r') as f:
-            for line in f:
-                p = line.split()
-                if len(p) < 10:
-                    continue
-                dev_name = p[2]
-                stats[dev_name] = {
-                    'r': int(p[5]) * 512,  # sectors read -> bytes
-                    'w': int(p[9]) * 512   # sectors written -> bytes
-                }
-        return stats
-    except:
-        return {}
-
-
-def _read_enabled_services_status():
-    try:
-        output = subprocess.check_output(
-            ['midclt', 'call', 'service.query'],
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=5
-        )
-        rows = json.loads(output)
-        tracked = []
-        for row in rows if isinstance(rows, list) else []:
-            if not isinstance(row, dict):
-                continue
-
-            enabled = bool(row.get('enable', False))
-            if not enabled:
-                continue
-
-            name = str(row.get('service') or row.get('id') or 'unknown')
-            state = str(row.get('state') or 'UNKNOWN').upper()
-            running = state == 'RUNNING'
-            tracked.append({
-                'name': name,
-                'state': state,
-                'running': running,
-                'enabled': True
-            })
-
-        tracked.sort(key=lambda item: item.get('name', '').lower())
-        stopped = [item['name'] for item in tracked if not item.get('running', False)]
-
-        return {
-            'tracked': tracked,
-            'stopped': stopped,
-            'hasStopped': len(stopped) > 0,
-            'source': 'truenas-api',
-            'error': None
-        }
-    except Exception as ex:
-        return {
-            'tracked': [],
-            'stopped': [],
-            'hasStopped': False,
-            'source': 'truenas-api',
-            'error': str(ex)
-        }
+        sampler_sleep(BASE_IO_INTERVAL_SECS * interval_scale())
 
 def pool_activity_monitor_thread():
     """Monitor per-pool read/write activity with smoothing"""
-    POLL_INTERVAL = 0.05   # 10Hz sampling (50ms)
+    POLL_INTERVAL = BASE_POOL_INTERVAL_SECS   # 20Hz sampling (50ms); the governor and idle mode may stretch it
     SMOOTHING_WINDOW = 100  # 10-second rolling average (100 samples at 10Hz)
     HISTORY_LIMIT = 150    # 15 seconds of history (150 samples at 10Hz)
     
@@ -645,13 +477,19 @@ def pool_activity_monitor_thread():
         }
     
     last_raw = get_diskstats_for_pools()
+    last_ts = time.monotonic()
     
     while True:
-        time.sleep(POLL_INTERVAL)
+        sampler_sleep(POLL_INTERVAL * interval_scale())
         current_raw = get_diskstats_for_pools()
+        now = time.monotonic()
         
         if not current_raw or not last_raw:
             continue
+        elapsed = max(now - last_ts, 1e-6)
+        # When the governor or idle mode stretches sampling, each reading stands in for
+        # the base ticks it covered so the smoothing window and history keep their spans.
+        scale = max(1, min(HISTORY_LIMIT, int(round(elapsed / POLL_INTERVAL))))
         
         # Calculate per-device deltas and accumulate by pool
         for dev, stats in current_raw.items():
@@ -664,12 +502,12 @@ def pool_activity_monitor_thread():
             pool = drive_to_pool[base_dev]
             
             if dev in last_raw:
-                r_bps = (stats['r'] - last_raw[dev]['r']) / POLL_INTERVAL
-                w_bps = (stats['w'] - last_raw[dev]['w']) / POLL_INTERVAL
+                r_bps = (stats['r'] - last_raw[dev]['r']) / elapsed
+                w_bps = (stats['w'] - last_raw[dev]['w']) / elapsed
                 
                 # Add to smoothing buffer for this pool
-                smoothing_buffer[pool]['r'].append(r_bps)
-                smoothing_buffer[pool]['w'].append(w_bps)
+                smoothing_buffer[pool]['r'].extend([r_bps] * scale)
+                smoothing_buffer[pool]['w'].extend([w_bps] * scale)
         
         # Calculate smoothed averages and update history
         for pool in unique_pools:
@@ -677,138 +515,221 @@ def pool_activity_monitor_thread():
                 avg_r = sum(smoothing_buffer[pool]['r']) / SMOOTHING_WINDOW
                 avg_w = sum(smoothing_buffer[pool]['w']) / SMOOTHING_WINDOW
                 
-                GLOBAL_DATA["pool_activity_history"][pool]['r'].append(round(avg_r, 2))
-                GLOBAL_DATA["pool_activity_history"][pool]['w'].append(round(avg_w, 2))
+                GLOBAL_DATA["pool_activity_history"][pool]['r'].extend([round(avg_r, 2)] * scale)
+                GLOBAL_DATA["pool_activity_history"][pool]['w'].extend([round(avg_w, 2)] * scale)
         
         last_raw = current_raw
+        last_ts = now
 
-def topology_scanner_thread():
+def topology_scanner_thread(evaluate_alerts=True):
+    """Scan every SCAN_INTERVAL_SECS; evaluate_alerts=False in the split collector (the server evaluates its snapshots)."""
     while True:
         try:
-            GLOBAL_DATA["hostname"] = socket.gethostname()
-            GLOBAL_DATA["config"] = load_config()
-            uuid_map = {}
-
-            if os.path.exists('/dev/disk/by-partuuid'):
-                for uid in os.listdir('/dev/disk/by-partuuid'):
-                    real = os.path.realpath(os.path.join('/dev/disk/by-partuuid', uid))
-                    uuid_map[uid] = re.sub(r'p?\d+$', '', os.path.basename(real))
-            
-            # Get ZFS topology and pool states from API or fallback
-            zfs_map, pool_states = get_zfs_topology(uuid_map)
-            temp_map = _fetch_disk_temperatures_via_api()
-            GLOBAL_DATA["pool_states"] = pool_states  # Store pool states for frontend
-            GLOBAL_DATA["api_status"] = get_api_status()  # Store API status
-            GLOBAL_DATA["_last_zfs_map"] = zfs_map  # Retained for /ircu-debug diagnostic endpoint
-            GLOBAL_DATA["services"] = _read_enabled_services_status()
-            
-            new_topology = {}
-            controller_capacity = {}
-            path_dir = '/dev/disk/by-path'
-            if os.path.exists(path_dir):
-                for entry in os.scandir(path_dir):
-                    if entry.is_symlink() and "-part" not in entry.name:
-                        pci_match = re.search(r'pci-([0-9a-fA-F:.]+)', entry.name)
-                        if not pci_match: continue
-                        pci_raw = pci_match.group(1)
-                        pci_key = pci_raw.replace(':', '-').replace('.', '-')
-                        
-                        # Skip virtual storage controllers (only show physical HBAs/RAID controllers)
-                        if is_virtual_storage_controller(pci_raw):
-                            continue
-
-                        if pci_key not in controller_capacity:
-                            max_bays, has_backplane, ports, capacity_unknown = get_controller_capacity(
-                                pci_raw, GLOBAL_DATA["config"]
-                            )
-                            controller_capacity[pci_key] = {
-                                "max_bays": max_bays,
-                                "has_backplane": has_backplane,
-                                "ports": ports,
-                                "capacity_unknown": capacity_unknown,
-                                "ircu_handled": False
-                            }
-
-                        # If this controller was fully mapped via ircu on first encounter, skip remaining symlinks
-                        if controller_capacity[pci_key].get("ircu_handled"):
-                            continue
+            # "scan cycle" failures (and the failing stage) show up in /debug/timings.
+            with timed("stage", "scan cycle"):
+                GLOBAL_DATA["hostname"] = socket.gethostname()
+                GLOBAL_DATA["config"] = load_config()
+                apply_demand_config(GLOBAL_DATA["config"])
+                with profile_cycle():
+                    snapshot = scan_topology(GLOBAL_DATA["config"])
+                GLOBAL_DATA["pool_states"] = snapshot["pool_states"]  # Store pool states for frontend
+                GLOBAL_DATA["api_status"] = snapshot["api_status"]  # Store API status
+                GLOBAL_DATA["_last_zfs_map"] = snapshot["zfs_map"]  # Retained for /ircu-debug diagnostic endpoint
+                GLOBAL_DATA["services"] = snapshot["services"]
+                GLOBAL_DATA["topology"] = snapshot["topology"]
+                GLOBAL_DATA["collector_durations"] = snapshot["durations"]
+                GLOBAL_DATA["last_scan_ts"] = time.time()
+                note_iostat_pools(snapshot["pool_states"].keys())
+                if evaluate_alerts:
+                    update_alert_inputs(pool_states=snapshot["pool_states"], topology=snapshot["topology"],
+                                        services=snapshot["services"])
+        except Exception as e: print(f"Scanner Error ({getattr(e, 'failed_stage', None) or 'scan cycle'} stage): {e}")
+        time.sleep(SCAN_INTERVAL_SECS)
+
+def collector_publisher_thread(channels, parent_pid=None):
+    """Process-split collector side: publish this process's GLOBAL_DATA into the shared channels."""
+    last_scan_ts, last_io = None, None
+    while True:
+        if parent_pid and os.getppid() != parent_pid:
+            print("Collector process: server exited, stopping")
+            return
+        try:
+            if GLOBAL_DATA.get("last_scan_ts") != last_scan_ts:
+                last_scan_ts = GLOBAL_DATA.get("last_scan_ts")
+                channels.publish_json("snapshot", {
+                    "hostname": GLOBAL_DATA["hostname"],
+                    "topology": serialize_topology(GLOBAL_DATA["topology"]),
+                    "pool_states": GLOBAL_DATA.get("pool_states", {}),
+                    "api_status": GLOBAL_DATA.get("api_status"),
+                    "services": GLOBAL_DATA.get("services"),
+                    "zfs_map": GLOBAL_DATA.get("_last_zfs_map", {}),
+                    "durations": GLOBAL_DATA.get("collector_durations", {}),
+                    "last_scan_ts": last_scan_ts,
+                    "timings": timings_snapshot(),
+                    "breakers": breaker_status(),
+                    "governor": governor_status(SCAN_INTERVAL_SECS),
+                    "scan_progress": scan_progress_status()
+                })
+            io_activity = GLOBAL_DATA["io_activity"]
+            if io_activity != last_io:
+                channels.publish_json("io", io_activity)
+                last_io = io_activity
+            channels.publish_pools(GLOBAL_DATA["pool_activity_history"])
+        except Exception as e: print(f"Collector publish error: {e}")
+        sampler_sleep(BASE_POOL_INTERVAL_SECS * interval_scale())
+
+def split_sync_thread():
+    """Process-split server side: mirror new collector snapshots into GLOBAL_DATA (decoded once per version)."""
+    channels = split_channels()
+    while True:
+        try:
+            io_activity = channels.read_new_json("io")
+            if io_activity is not None:
+                GLOBAL_DATA["io_activity"] = io_activity
+            iostat_sample = channels.read_new_json("iostat")
+            if iostat_sample is not None:
+                record_iostat_sample(iostat_sample)
+            arc_sample = channels.read_new_json("arc")
+            if arc_sample is not None:
+                record_arc_sample(arc_sample)
+            dataset_sample = channels.read_new_json("datasets")
+            if dataset_sample is not None:
+                record_dataset_sample(dataset_sample)
+            txg_sample = channels.read_new_json("txgs")
+            if txg_sample is not None:
+                _record_txg_sample(txg_sample)
+            snapshot = channels.read_new_json("snapshot")
+            if snapshot is not None:
+                GLOBAL_DATA["hostname"] = snapshot.get("hostname") or GLOBAL_DATA["hostname"]
+                GLOBAL_DATA["config"] = load_config()
+                apply_demand_config(GLOBAL_DATA["config"])
+                GLOBAL_DATA["pool_states"] = snapshot.get("pool_states", {})
+                GLOBAL_DATA["api_status"] = snapshot.get("api_status")
+                GLOBAL_DATA["_last_zfs_map"] = snapshot.get("zfs_map", {})
+                GLOBAL_DATA["services"] = snapshot.get("services")
+                GLOBAL_DATA["topology"] = deserialize_topology(snapshot.get("topology"))
+                GLOBAL_DATA["collector_durations"] = snapshot.get("durations", {})
+                GLOBAL_DATA["last_scan_ts"] = snapshot.get("last_scan_ts")
+                GLOBAL_DATA["collector_timings"] = snapshot.get("timings")
+                GLOBAL_DATA["collector_breakers"] = snapshot.get("breakers")
+                GLOBAL_DATA["governor"] = snapshot.get("governor")
+                GLOBAL_DATA["scan_progress"] = snapshot.get("scan_progress")
+                update_alert_inputs(pool_states=GLOBAL_DATA["pool_states"], topology=GLOBAL_DATA["topology"],
+                                    services=GLOBAL_DATA["services"])
+        except Exception as e: print(f"Split sync error: {e}")
+        time.sleep(0.1)
 
-                        if pci_key not in new_topology and not any(
-                            k.startswith(pci_key + "-e") or k == pci_key + "-da"
-                            for k in new_topology
-                        ):
-                            # Try ircu path first ÔÇö gives authoritative per-slot data from the SCSI adapter.
-                            # Returns a dict of per-enclosure chassis entries (one per backplane + one for
-                            # direct-attach); each is stored as its own key in new_topology.
-                            ircu_topos = get_ircu_slot_topology(pci_raw, zfs_map, GLOBAL_DATA["config"], temp_map=temp_map)
-                            if ircu_topos:
-                                for sub_key, topo in ircu_topos.items():
-                                    new_topology[sub_key] = topo
-                                controller_capacity[pci_key]["ircu_handled"] = True
-                                continue
-
-                            # Fall through to standard /dev/disk/by-path approach
-                            rows = 1
-                            bays_per_row = controller_capacity[pci_key]["max_bays"]
-
-                            new_topology[pci_key] = {
-                                "settings": {
-                                    "pci_raw": pci_raw,
-                                    "array_address": "",
-                                    "array_id": "",
-                                    "max_bays": controller_capacity[pci_key]["max_bays"],
-                                    "has_backplane": controller_capacity[pci_key]["has_backplane"],
-                                    "ports": controller_capacity[pci_key]["ports"],
-                                    "capacity_unknown": controller_capacity[pci_key]["capacity_unknown"],
-                                    "rows": rows,
-                                    "bays_per_row": bays_per_row
-                                },
-                                "disks": []
-                            }
+def start_collector_threads(port, config=None):
+    """Start the sampler/scanner/alert threads, in-process or behind a collector process (collector.process_split)."""
+    config = load_config() if config is None else config
+    if process_split_enabled(config):
+        start_split_mode(port, config_module.CONFIG_FILE)
+        targets = (split_sync_thread, alert_monitor_thread)
+    else:
+        targets = (io_monitor_thread, topology_scanner_thread, alert_monitor_thread, pool_activity_monitor_thread)
+        # The governor runs where the samplers run (the collector process in split mode).
+        threading.Thread(target=governor_thread, args=(load_config,), daemon=True).start()
+        threading.Thread(target=zpool_iostat_thread, args=(load_config,), daemon=True).start()
+        threading.Thread(target=arc_monitor_thread, args=(load_config,), daemon=True).start()
+        threading.Thread(target=dataset_io_thread, args=(load_config,), daemon=True).start()
+        threading.Thread(target=txg_monitor_thread, args=(load_config, _record_txg_sample), daemon=True).start()
+    for target in targets:
+        threading.Thread(target=target, daemon=True).start()
+
+def _pool_activity_history():
+    channels = split_channels()
+    if channels is not None:
+        return channels.pool_histories()
+    return GLOBAL_DATA["pool_activity_history"]
+
+def _build_data_payload():
+    return {
+        "hostname": GLOBAL_DATA["hostname"], 
+        "topology": serialize_topology(GLOBAL_DATA["topology"], GLOBAL_DATA["io_activity"]), 
+        "config": GLOBAL_DATA.get("config", {}),
+        "pool_states": GLOBAL_DATA.get("pool_states", {}),
+        "services": GLOBAL_DATA.get("services", {
+            "tracked": [],
+            "stopped": [],
+            "hasStopped": False,
+            "source": "unknown",
+            "error": None
+        }),
+        "api_status": GLOBAL_DATA.get("api_status", {"available": True, "error_message": ""}),
+        "governor": GLOBAL_DATA.get("governor") if split_channels() is not None else governor_status(SCAN_INTERVAL_SECS),
+        "alerts": _current_alerts()
+    }
 
-                        match = re.search(r'(phy|ata|sas|port|slot|exp)(\d+)', entry.name)
-                        bay_num = int(match.group(2)) if match else 0
-                        
-                        while bay_num >= len(new_topology[pci_key]["disks"]):
-                            new_topology[pci_key]["disks"].append({"status": "EMPTY"})
-                            
-                        dev_name = os.path.basename(os.path.realpath(entry.path))
-                        try:
-                            out = subprocess.check_output(['lsblk', '-dbno', 'SERIAL,SIZE', entry.path], text=True).split()
-                            sn, size = (out[0], int(out[1])) if len(out) >= 2 else ("", 0)
-                        except: sn, size = "", 0
-                        
-                        z = lookup_zfs_disk_entry(zfs_map, dev_name, temp_map=temp_map)
-                        new_topology[pci_key]["disks"][bay_num] = {
-                            "status": "PRESENT", "sn": sn, "size_bytes": size, "dev_name": dev_name,
-                            "pool_name": z["pool"], "pool_idx": z["idx"], "state": z["state"],
-                            "temperature_c": z.get("temperature_c"),
-                            "read_errors": z.get("read_errors", 0),
-                            "write_errors": z.get("write_errors", 0),
-                            "cksum_errors": z.get("cksum_errors", 0)
-                        }
 
-            for pci_key, data in new_topology.items():
-                max_bays = data["settings"].get("max_bays", 0)
-                if max_bays and len(data["disks"]) < max_bays:
-                    while len(data["disks"]) < max_bays:
-                        data["disks"].append({"status": "EMPTY"})
+def _build_pool_activity_payload():
+    history = _pool_activity_history()
+    return {
+        'hostname': GLOBAL_DATA["hostname"],
+        'stats': {
+            pool: {
+                'r': list(history[pool]['r']),
+                'w': list(history[pool]['w'])
+            }
+            for pool in history
+        }
+    }
 
-            GLOBAL_DATA["topology"] = new_topology
-        except Exception as e: print(f"Scanner Error: {e}")
-        time.sleep(5)
 
 class FastHandler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 so dashboards and federation peers can reuse connections.
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, a small body
+    # waits for the client's delayed ACK (~40 ms per request on keep-alive).
+    disable_nagle_algorithm = True
+
+    def send_response(self, code, message=None):
+        self._body_framed = False
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() in ('content-length', 'connection'):
+            self._body_framed = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        # Handlers that stream a body without Content-Length must close the
+        # connection, otherwise a keep-alive client can't tell where it ends.
+        if not getattr(self, '_body_framed', True):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def _send_json(self, payload, status=200, cache_control='no-store', etag=False):
+        """Send a JSON body with Content-Length; etag=True honours If-None-Match."""
+        body = json.dumps(payload).encode()
+        tag = None
+        if etag:
+            tag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == tag:
+                self.send_response(304)
+                self.send_header('ETag', tag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        if cache_control:
+            self.send_header('Cache-Control', cache_control)
+        if tag:
+            self.send_header('ETag', tag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_POST(self):
         # Handle POST requests for saving configuration
-        global CONFIG_MTIME, CONFIG_CACHE, ALERT_MUTE_UNTIL_TS, REPO_SYNC_ENABLED_OVERRIDE
+        global CONFIG_MTIME, CONFIG_CACHE, REPO_SYNC_ENABLED_OVERRIDE
         path = self.path.split('?')[0]
 
         if path == '/alerts-mute-5m':
             try:
-                current_alerts = _compute_alerts_from_global_state()
-                if current_alerts.get('activeCount', 0) <= 0:
-                    payload = _with_alert_mute_state(current_alerts)
+                alerts = current_alerts()
+                if alerts.get('activeCount', 0) <= 0:
+                    payload = _with_alert_mute_state(alerts)
                     self.send_response(409)
                     self.send_header('Content-type', 'application/json')
                     self.send_header('Cache-Control', 'no-store')
@@ -820,9 +741,8 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
                     }).encode())
                     return
 
-                ALERT_MUTE_UNTIL_TS = time.time() + ALERT_MUTE_SECONDS
-                payload = _with_alert_mute_state(current_alerts)
-                GLOBAL_DATA['alerts'] = payload
+                mute_alerts(ALERT_MUTE_SECONDS)
+                payload = _with_alert_mute_state(alerts)
 
                 self.send_response(200)
                 self.send_header('Content-type', 'application/json')
@@ -840,6 +760,21 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
                 self.wfile.write(json.dumps({'status': 'error', 'message': str(ex)}).encode())
             return
 
+        if path == '/debug/profile':
+            # Arm the scan profiler: the next N topology scans are captured with cProfile.
+            if split_channels() is not None:
+                self._send_json({'status': 'error', 'message': 'Scans run in the collector process (collector.process_split); '
+                                 'disable process split to profile them.'}, status=409)
+                return
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(content_length).decode('utf-8') if content_length > 0 else '{}'
+                payload = json.loads(body or '{}')
+                self._send_json({'status': 'success', 'profile': arm_profiler(payload.get('cycles', 3))})
+            except Exception as ex:
+                self._send_json({'status': 'error', 'message': str(ex)}, status=400)
+            return
+
         if path == '/repo-sync-enabled':
             content_length = int(self.headers.get('Content-Length', 0))
             try:
@@ -1081,41 +1016,98 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         # Extract path without query string
         path = self.path.split('?')[0]
+        if path in VIEWER_PATHS:
+            note_viewer(self.client_address[0])
         
         if path == '/data':
-            resp = {
-                "hostname": GLOBAL_DATA["hostname"], 
-                "topology": {}, 
-                "config": GLOBAL_DATA.get("config", {}),
-                "pool_states": GLOBAL_DATA.get("pool_states", {}),
-                "services": GLOBAL_DATA.get("services", {
-                    "tracked": [],
-                    "stopped": [],
-                    "hasStopped": False,
-                    "source": "unknown",
-                    "error": None
-                }),
-                "api_status": GLOBAL_DATA.get("api_status", {"available": True, "error_message": ""}),
-                "alerts": GLOBAL_DATA.get("alerts", {
-                    "poolDegraded": False,
-                    "diskFaultOrErrors": False,
-                    "highTemperature": False,
-                    "servicesStopped": False,
-                    "activeCount": 0,
-                    "activeNames": [],
-                    "muteActive": False,
-                    "muteRemainingSec": 0
-                })
-            }
-            for pci, data in GLOBAL_DATA["topology"].items():
-                resp["topology"][pci] = {
-                    "settings": data["settings"],
-                    "disks": [{**d, "active": GLOBAL_DATA["io_activity"].get(d.get("dev_name"), False)} for d in data["disks"]]
-                }
+            self._send_json(_build_data_payload(), cache_control=None, etag=True)
+            return
+        elif path == '/metrics':
+            # Prometheus/OpenMetrics scrape target, rendered from the cached snapshot only.
+            data = dict(GLOBAL_DATA, alerts=_current_alerts())
+            if split_channels() is not None:
+                data["pool_activity_history"] = _pool_activity_history()
+            body, content_type = render_metrics(data, wants_openmetrics(self.headers.get('Accept')))
+            payload = body.encode('utf-8')
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-type', content_type)
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Content-Length', str(len(payload)))
             self.end_headers()
-            self.wfile.write(json.dumps(resp).encode())
+            self.wfile.write(payload)
+            return
+        elif path == '/debug/timings':
+            payload = timings_snapshot()
+            payload['scan_durations_ms'] = {k: round(v * 1000.0, 2) for k, v in (GLOBAL_DATA.get('collector_durations') or {}).items()}
+            payload['last_scan_ts'] = GLOBAL_DATA.get('last_scan_ts')
+            payload['profile'] = profiler_status()
+            payload['breakers'] = breaker_status()
+            payload['demand'] = demand_status()
+            if split_channels() is not None:
+                # Scans run in the collector process; its stats arrive with each snapshot.
+                payload['server'] = {'commands': payload.get('commands', {}), 'breakers': payload['breakers']}
+                payload.update(GLOBAL_DATA.get('collector_timings') or {'stages': {}, 'commands': {}})
+                payload['breakers'] = GLOBAL_DATA.get('collector_breakers') or {}
+                payload['collector_process'] = collector_status()
+            self._send_json(payload)
+            return
+        elif path == '/scan-progress':
+            # Scrub/resilver progress, ETA and past-scan history (collector process data in split mode).
+            if split_channels() is not None:
+                payload = GLOBAL_DATA.get("scan_progress") or {"active": {}, "history": []}
+            else:
+                payload = scan_progress_status()
+            self._send_json(payload)
+            return
+        elif path == '/pool-iostat':
+            # Per-pool and per-vdev ops, bandwidth and latency history from the zpool iostat stream.
+            self._send_json(iostat_status())
+            return
+        elif path == '/arc-stats':
+            # ARC / L2ARC hit ratios, size, target and MRU/MFU split with their history.
+            self._send_json(arc_status())
+            return
+        elif path == '/dataset-io':
+            # Busiest datasets/zvols by bytes/s over the last minute (?top=N, default 10).
+            query = urllib.parse.parse_qs(self.path.partition('?')[2])
+            try:
+                top_n = int(query.get('top', [DEFAULT_TOP_N])[0])
+            except ValueError:
+                top_n = DEFAULT_TOP_N
+            self._send_json(dataset_io_status(top_n))
+            return
+        elif path == '/txg-stats':
+            # Per-pool txg open/quiesce/wait/sync and dirty-bytes percentiles over 1/5/15 minutes.
+            self._send_json(txg_status())
+            return
+        elif path == '/alert-events':
+            # Per-rule alert state (first/last seen, flapping) and the recent raise/clear transitions.
+            self._send_json(alert_events_status())
+            return
+        elif path == '/debug/profile':
+            self._send_json(profiler_status())
+            return
+        elif path in ('/debug/profile.prof', '/debug/profile.txt'):
+            data = profile_bytes() if path.endswith('.prof') else (profile_text() or '').encode('utf-8')
+            if not data:
+                self._send_json({'status': 'error', 'message': 'No profile captured; POST /debug/profile first.'}, status=404)
+                return
+            self.send_response(200)
+            if path.endswith('.prof'):
+                self.send_header('Content-type', 'application/octet-stream')
+                self.send_header('Content-Disposition', 'attachment; filename="scan-profile.prof"')
+            else:
+                self.send_header('Content-type', 'text/plain; charset=utf-8')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        elif path == '/federation/data':
+            self._send_json(federated_data(_build_data_payload()))
+            return
+        elif path == '/federation/pool-activity':
+            self._send_json(federated_pool_activity(_build_pool_activity_payload()))
             return
         elif path == '/style-config':
             # Serve the style configuration (fonts, colors, etc.)
@@ -1159,21 +1151,7 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
             return
         elif path == '/pool-activity':
             # Serve pool activity history for Chart.js visualization
-            out = {
-                'hostname': GLOBAL_DATA["hostname"],
-                'stats': {
-                    pool: {
-                        'r': list(GLOBAL_DATA["pool_activity_history"][pool]['r']),
-                        'w': list(GLOBAL_DATA["pool_activity_history"][pool]['w'])
-                    }
-                    for pool in GLOBAL_DATA["pool_activity_history"]
-                }
-            }
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Cache-Control', 'no-store')
-            self.end_headers()
-            self.wfile.write(json.dumps(out).encode())
+            self._send_json(_build_pool_activity_payload(), etag=True)
             return
         elif path == '/livereload-status':
             # Return modification times for watched files
@@ -1216,7 +1194,7 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
             report = {"steps": {}}
             try:
                 # Step 1: PCI addresses visible in by-path
-                path_dir = '/dev/disk/by-path'
+                path_dir = host_path('/dev/disk/by-path')
                 pci_addrs = set()
                 if os.path.exists(path_dir):
                     for entry in os.scandir(path_dir):
@@ -1229,12 +1207,10 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
                 # Step 2: sas2ircu/sas3ircu availability and LIST output
                 ircu_available = {}
                 for tool in ('sas3ircu', 'sas2ircu'):
-                    ircu_available[tool] = bool(shutil.which(tool))
+                    ircu_available[tool] = bool(find_tool(tool))
                     if ircu_available[tool]:
                         try:
-                            list_out = subprocess.check_output(
-                                [tool, 'LIST'], text=True, timeout=5
-                            )
+                            list_out = command_output([tool, 'LIST'], name=f"{tool} LIST")
                             ircu_available[tool + '_list_output'] = list_out
                         except Exception as ex:
                             ircu_available[tool + '_list_error'] = str(ex)
@@ -1244,7 +1220,7 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
                 adapter_results = {}
                 for pci_raw in pci_addrs:
                     for tool in ('sas3ircu', 'sas2ircu'):
-                        if not shutil.which(tool):
+                        if not find_tool(tool):
                             continue
                         aid = _find_ircu_adapter(tool, pci_raw)
                         adapter_results[pci_raw] = {
@@ -1290,7 +1266,7 @@ class FastHandler(http.server.SimpleHTTPRequestHandler):
                         sub_key: {
                             'settings': topo['settings'],
                             'disk_count': len(topo['disks']),
-                            'present_count': sum(1 for d in topo['disks'] if d.get('status') == 'PRESENT')
+                            'present_count': sum(1 for d in topo['disks'] if d.is_present)
                         }
                         for sub_key, topo in result.items()
                     } if result else 'empty_result'
@@ -0,0 +1,362 @@
+import json, math, os, random, threading, time
+from collections import deque
+from zfs_logic import process_pool_query
+from .config import DEFAULT_CONFIG
+from .topology import build_ircu_chassis
+from .identity import DeviceIdentityIndex
+
+# Synthetic hardware source for load testing (config "simulator" section or the
+# DASHBOARD_SIMULATOR environment variable). Generates controllers, backplane
+# enclosures, bays, pools and vdevs, then feeds them through the same code the
+# real collectors use: pool.query-shaped dicts go through process_pool_query and
+# ircu-shaped enclosures through build_ircu_chassis. Only the hardware is fake.
+#
+# State advances with wall time: I/O counters integrate a per-pool load curve,
+# temperatures drift on a slow sine, and failure events (checksum errors, faults,
+# pulled drives, overheating) fire as a Poisson process and recover on their own.
+
+SIMULATOR_LOCK = threading.Lock()
+_SIMULATOR = None
+_SIGNATURE = None
+_CONFIGURED = False
+
+IO_SIZE_BYTES = 128 * 1024
+EVENT_KINDS = ("errors", "fault", "remove", "overheat")
+PARITY = {"STRIPE": 0, "RAIDZ1": 1, "RAIDZ2": 2, "RAIDZ3": 3}
+SIM_SERVICES = ("cifs", "nfs", "smartd", "ssh")
+
+
+def _kernel_name(i):
+    # sda..sdz, sdaa..sdzz, ... (kernel naming order)
+    name = ""
+    i += 1
+    while i > 0:
+        i, rem = divmod(i - 1, 26)
+        name = chr(97 + rem) + name
+    return "sd" + name
+
+
+def simulator_settings(config):
+    """Simulator section of config with defaults filled in; DASHBOARD_SIMULATOR overrides it."""
+    settings = dict(DEFAULT_CONFIG["simulator"])
+    section = config.get("simulator", {}) if isinstance(config, dict) else {}
+    if isinstance(section, dict):
+        settings.update({k: v for k, v in section.items() if not k.startswith("__")})
+
+    raw = os.environ.get("DASHBOARD_SIMULATOR", "").strip()
+    if raw and raw not in ("0", "false"):
+        settings["enabled"] = True
+        if raw.startswith("{"):
+            try:
+                settings.update(json.loads(raw))
+            except Exception as e:
+                print(f"Simulator: ignoring invalid DASHBOARD_SIMULATOR ({e})")
+
+    for key, default in DEFAULT_CONFIG["simulator"].items():
+        if isinstance(default, bool):
+            settings[key] = bool(settings.get(key, default))
+        elif isinstance(default, (int, float)):
+            try:
+                settings[key] = type(default)(settings.get(key, default))
+            except Exception:
+                settings[key] = default
+    settings["vdev_type"] = str(settings.get("vdev_type") or "RAIDZ2").upper()
+    settings["vdev_width"] = max(1, settings["vdev_width"])
+    settings["pools"] = max(1, settings["pools"])
+    return settings
+
+
+class SimulatedHost:
+    """One simulated machine. Thread-safe; every reader advances the clock first."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.started = time.time()
+        self._last = self.started
+        self._rng = random.Random(settings["seed"] + 1)
+        self.events = deque(maxlen=200)
+        self.controllers = []
+        self.disks = []
+        self.pools = {}
+        self._build(random.Random(settings["seed"]))
+
+    def _build(self, rng):
+        s = self.settings
+        for c in range(max(1, s["controllers"])):
+            pci = f"0000:{0x41 + c:02x}:00.0"
+            enclosures = []
+            for e in range(max(1, s["enclosures_per_controller"])):
+                eid = 2 + e
+                enclosures.append({"eid": eid, "array_address": f"5003048{c:x}:{eid:08x}"})
+                for slot in range(max(1, s["bays_per_enclosure"])):
+                    if rng.random() >= s["fill_ratio"]:
+                        continue
+                    i = len(self.disks)
+                    self.disks.append({
+                        "dev": _kernel_name(i),
+                        "serial": f"SIM{c:02d}{eid:02d}{slot:04d}",
+                        "partuuid": f"5e1a{c:04x}-{eid:04x}-4000-8000-{slot:012x}",
+                        "guid": str(rng.getrandbits(63)),
+                        "pci": pci,
+                        "enclosure": eid,
+                        "slot": slot,
+                        "model": "SIM HUH721212AL",
+                        "size_bytes": 12000138625024,
+                        "pool": None,
+                        "vdev": None,
+                        "status": "ONLINE",
+                        "present": True,
+                        "read_errors": 0, "write_errors": 0, "cksum_errors": 0,
+                        "temp_offset": (slot % 15) / 15.0 * 4.0 + rng.uniform(-1.0, 1.0),
+                        "temp_boost": 0.0,
+                        "phase": rng.uniform(0, 2 * math.pi),
+                        "r_bytes": 0.0, "w_bytes": 0.0, "r_ios": 0.0, "w_ios": 0.0,
+                        "event": None,
+                        "recover_at": 0.0,
+                        "replacements": 0
+                    })
+            self.controllers.append({"pci": pci, "enclosures": enclosures})
+
+        width = s["vdev_width"]
+        names = [f"simpool{p}" for p in range(s["pools"])]
+        for name in names:
+            self.pools[name] = {"vdevs": [], "phase": rng.uniform(0, 2 * math.pi), "resilver_until": 0.0}
+        # Whole vdevs are dealt round-robin to pools; leftover drives stay unallocated.
+        for v, start in enumerate(range(0, len(self.disks) - width + 1, width)):
+            pool_name = names[v % len(names)]
+            members = self.disks[start:start + width]
+            vdev = {"name": f"{self.settings['vdev_type'].lower()}-{len(self.pools[pool_name]['vdevs'])}",
+                    "guid": str(rng.getrandbits(63)), "members": members}
+            for disk in members:
+                disk["pool"], disk["vdev"] = pool_name, vdev
+            self.pools[pool_name]["vdevs"].append(vdev)
+
+    # ── time evolution ─────────────────────────────────────────────────────────
+
+    def _advance(self):
+        now = time.time()
+        with SIMULATOR_LOCK:
+            dt = now - self._last
+            if dt <= 0:
+                return now
+            self._last = now
+            self._accumulate_io(now, dt)
+            self._recover(now)
+            self._fire_events(now, dt)
+        return now
+
+    def _accumulate_io(self, now, dt):
+        s = self.settings
+        t = now - self.started
+        for pool in self.pools.values():
+            members = [d for v in pool["vdevs"] for d in v["members"] if d["present"] and d["status"] == "ONLINE"]
+            if not members:
+                continue
+            # Pool load swings between ~10% and 100% of io_mbps_per_pool over a minute.
+            load = 0.55 + 0.45 * math.sin(2 * math.pi * t / 60.0 + pool["phase"])
+            pool_bps = s["io_mbps_per_pool"] * 1024 * 1024 * load
+            per_disk = pool_bps / len(members)
+            for disk in members:
+                # Per-disk duty cycle so bay activity LEDs flicker instead of staying lit.
+                duty = max(0.0, math.sin(2 * math.pi * t / 3.0 + disk["phase"]))
+                r = per_disk * s["read_ratio"] * duty * 2 * dt
+                w = per_disk * (1 - s["read_ratio"]) * duty * 2 * dt
+                disk["r_bytes"] += r
+                disk["w_bytes"] += w
+                disk["r_ios"] += r / IO_SIZE_BYTES
+                disk["w_ios"] += w / IO_SIZE_BYTES
+
+    def _fire_events(self, now, dt):
+        rate = self.settings["failure_rate_per_hour"]
+        if rate <= 0 or self._rng.random() >= 1 - math.exp(-rate * dt / 3600.0):
+            return
+        candidates = [d for d in self.disks if d["pool"] and d["event"] is None]
+        if not candidates:
+            return
+        disk = self._rng.choice(candidates)
+        kind = self._rng.choice(EVENT_KINDS)
+        if kind == "errors":
+            disk["cksum_errors"] += self._rng.randint(1, 40)
+            disk["read_errors"] += self._rng.randint(0, 3)
+        elif kind == "fault":
+            disk["status"] = "FAULTED"
+        elif kind == "remove":
+            disk["status"], disk["present"] = "REMOVED", False
+        elif kind == "overheat":
+            disk["temp_boost"] = 25.0
+        disk["event"] = kind
+        disk["recover_at"] = now + self.settings["recovery_secs"]
+        self._log(now, kind, disk)
+
+    def _recover(self, now):
+        for disk in self.disks:
+            if disk["event"] is None or now < disk["recover_at"]:
+                continue
+            kind = disk["event"]
+            if kind in ("fault", "remove"):
+                # Drive swapped: new serial, pool resilvers onto it.
+                disk["replacements"] += 1
+                disk["serial"] = f"{disk['serial'].split('R')[0]}R{disk['replacements']}"
+                self.pools[disk["pool"]]["resilver_until"] = now + self.settings["resilver_secs"]
+            disk.update(status="ONLINE", present=True, read_errors=0, write_errors=0,
+                        cksum_errors=0, temp_boost=0.0, event=None, recover_at=0.0)
+            self._log(now, "recovered", disk)
+
+    def _log(self, now, kind, disk):
+        self.events.append({"ts": round(now, 3), "kind": kind, "dev": disk["dev"],
+                            "serial": disk["serial"], "pool": disk["pool"]})
+        print(f"Simulator: {kind} on {disk['dev']} ({disk['serial']}, pool {disk['pool']})")
+
+    # ── collector stand-ins ────────────────────────────────────────────────────
+
+    def identity_index(self):
+        """Stand-in for DeviceIdentityIndex.build()."""
+        self._advance()
+        index = DeviceIdentityIndex()
+        with SIMULATOR_LOCK:
+            for disk in self.disks:
+                dev = disk["dev"]
+                index.add(dev, dev)
+                index.add(f"{dev}1", dev)
+                index.add(disk["partuuid"], dev)
+                index.add(disk["serial"], dev)
+        return index
+
+    def temperatures(self):
+        """Stand-in for _fetch_disk_temperatures_via_api(): {dev: temp_c}."""
+        now = self._advance()
+        s = self.settings
+        t = now - self.started
+        temps = {}
+        with SIMULATOR_LOCK:
+            for disk in self.disks:
+                if not disk["present"]:
+                    continue
+                drift = s["temp_drift_c"] * math.sin(2 * math.pi * t / max(1, s["temp_period_secs"]) + disk["phase"])
+                temps[disk["dev"]] = int(round(s["temp_base_c"] + disk["temp_offset"] + drift + disk["temp_boost"]))
+        return temps
+
+    def _pool_query(self, now):
+        """pool.query-shaped list for process_pool_query."""
+        s = self.settings
+        parity = PARITY.get(s["vdev_type"], s["vdev_width"] - 1)
+        pools = []
+        for name, pool in self.pools.items():
+            degraded = unavailable = False
+            vdevs = []
+            for vdev in pool["vdevs"]:
+                failed = sum(1 for d in vdev["members"] if d["status"] != "ONLINE")
+                degraded = degraded or failed > 0
+                unavailable = unavailable or failed > parity
+                children = [{
+                    "type": "DISK",
+                    "path": f"/dev/disk/by-partuuid/{d['partuuid']}",
+                    "guid": d["guid"],
+                    "status": d["status"],
+                    "disk": d["dev"] if d["present"] else None,
+                    "children": [],
+                    "stats": {"read_errors": d["read_errors"], "write_errors": d["write_errors"],
+                              "checksum_errors": d["cksum_errors"]}
+                } for d in vdev["members"]]
+                vdevs.append({"type": s["vdev_type"], "name": vdev["name"], "guid": vdev["guid"],
+                              "status": "UNAVAIL" if failed > parity else ("DEGRADED" if failed else "ONLINE"),
+                              "children": children})
+            status = "UNAVAIL" if unavailable else ("DEGRADED" if degraded else "ONLINE")
+            resilvering = now < pool["resilver_until"]
+            pools.append({
+                "name": name,
+                "status": status,
+                "healthy": status == "ONLINE",
+                "scan": {"function": "RESILVER" if resilvering else "SCRUB",
+                         "state": "SCANNING" if resilvering else "FINISHED"},
+                "topology": {"data": vdevs, "cache": [], "log": [], "spare": []}
+            })
+        return pools
+
+    def zfs_topology(self, identity, temp_map=None):
+        """Stand-in for collect_zfs(): same (zfs_map, pool_states) via process_pool_query."""
+        now = self._advance()
+        with SIMULATOR_LOCK:
+            pools = self._pool_query(now)
+        zfs_map, pool_states = process_pool_query(pools, identity, temp_map)
+        identity.add_zfs_guids(zfs_map)
+        return zfs_map, pool_states
+
+    def chassis_topology(self, config, zfs_map, temp_map, identity):
+        """Stand-in for build_chassis_topology(): ircu-shaped enclosures through build_ircu_chassis."""
+        self._advance()
+        topology = {}
+        slots = max(1, self.settings["bays_per_enclosure"])
+        with SIMULATOR_LOCK:
+            layouts = []
+            for controller in self.controllers:
+                enclosures = {
+                    str(enc["eid"]): {"slots": slots, "is_backplane": True,
+                                      "array_address": enc["array_address"], "drives": {}}
+                    for enc in controller["enclosures"]
+                }
+                layouts.append((controller["pci"], enclosures))
+            by_pci = dict(layouts)
+            for disk in self.disks:
+                if not disk["present"]:
+                    continue
+                by_pci[disk["pci"]][str(disk["enclosure"])]["drives"][str(disk["slot"])] = {
+                    "serial": disk["serial"],
+                    "model": disk["model"],
+                    "size_bytes": disk["size_bytes"],
+                    "raw_state": "Failed (FLD)" if disk["status"] == "FAULTED" else "Ready (RDY)"
+                }
+        for pci, enclosures in layouts:
+            topology.update(build_ircu_chassis(pci, enclosures, 0, zfs_map, config, temp_map, identity))
+        return topology
+
+    def services_status(self):
+        """Stand-in for _read_enabled_services_status()."""
+        tracked = [{"name": name, "state": "RUNNING", "running": True, "enabled": True} for name in SIM_SERVICES]
+        return {"tracked": tracked, "stopped": [], "hasStopped": False, "source": "simulator", "error": None}
+
+    def api_status(self):
+        return {"available": True, "error_message": ""}
+
+    def io_snapshot(self):
+        """Stand-in for get_io_snapshot(): {dev: completed ios}."""
+        self._advance()
+        with SIMULATOR_LOCK:
+            return {d["dev"]: int(d["r_ios"] + d["w_ios"]) for d in self.disks if d["present"]}
+
+    def diskstats(self):
+        """Stand-in for get_diskstats_for_pools(): {dev: {'r': bytes, 'w': bytes}}."""
+        self._advance()
+        with SIMULATOR_LOCK:
+            return {d["dev"]: {"r": int(d["r_bytes"]), "w": int(d["w_bytes"])} for d in self.disks if d["present"]}
+
+    def pool_mapping(self):
+        """Stand-in for get_dynamic_pool_mapping(): {dev: pool}."""
+        with SIMULATOR_LOCK:
+            return {d["dev"]: d["pool"] for d in self.disks if d["pool"]}
+
+
+def active_simulator(config=None):
+    """
+    Return the SimulatedHost for config, or None when the simulator is off.
+    The host is rebuilt only when its settings change. With config=None the
+    last configured answer is reused (config.json is read once if never set).
+    """
+    global _SIMULATOR, _SIGNATURE, _CONFIGURED
+    if config is None:
+        if _CONFIGURED:
+            return _SIMULATOR
+        from .config import load_config
+        config = load_config()
+
+    settings = simulator_settings(config)
+    signature = json.dumps(settings, sort_keys=True)
+    with SIMULATOR_LOCK:
+        if signature != _SIGNATURE:
+            _SIGNATURE = signature
+            _SIMULATOR = SimulatedHost(settings) if settings["enabled"] else None
+            if _SIMULATOR is not None:
+                print(f"Simulator: {len(_SIMULATOR.controllers)} controller(s), {len(_SIMULATOR.disks)} drive(s), "
+                      f"{len(_SIMULATOR.pools)} pool(s)")
+        _CONFIGURED = True
+        return _SIMULATOR
@@ -0,0 +1,379 @@
+import argparse, json, mmap, os, signal, struct, subprocess, sys, tempfile, threading, time
+from array import array
+from .config import BASE_DIR
+from .demand import set_publisher as set_demand_publisher
+
+# Process-split mode (collector.process_split): the collectors run in a child
+# process and publish into mmap'd files; the HTTP process only reads them, so a
+# heavy scan (smartctl JSON, ircu regexes, 20 Hz diskstats) never holds the
+# server's GIL.
+#
+# Each channel is one file: a 64-byte header followed by the payload. The header
+# carries a seqlock counter: the single writer makes it odd, rewrites the payload
+# and makes it even again; readers copy the payload and retry if the counter moved.
+#   snapshot  JSON, one version per topology scan
+#   io        JSON {dev: active}, republished only when it changes
+#   pools     pool activity histories as packed float64, republished every sampler tick
+#   iostat    JSON, one zpool iostat sample per interval (the server keeps the history)
+#   arc       JSON, one arcstats sample per interval (likewise)
+#   datasets  JSON, objset kstat counters per interval (the server keeps the windows)
+#   txgs      JSON, txgs committed since the previous interval (likewise)
+# and one channel in the other direction, written by the server:
+#   demand    JSON {"last_view_ts": t}, at most once a second while dashboards poll
+# A writer that outgrows its file (or a restarted collector) replaces the file;
+# readers notice the new inode and remap.
+
+HEADER = struct.Struct('<8sQQQd')   # magic, seq, version, length, published_at
+HEADER_SIZE = 64
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 8
+MAGIC = b'DBAYSHM1'
+INITIAL_CAPACITY = 1 << 20
+READ_RETRIES = 50
+
+CHANNELS = ("snapshot", "io", "pools", "iostat", "arc", "datasets", "txgs")
+SERVER_CHANNELS = ("demand",)
+SMALL_CAPACITY = 4096
+POOL_ENTRY = struct.Struct('<HII')  # name length, read samples, write samples
+
+RESTART_BASE_SECS = 2.0
+RESTART_MAX_SECS = 60.0
+COLLECTOR_STATE_LOCK = threading.Lock()
+COLLECTOR_STATE = {"pid": None, "started_at": None, "restarts": 0, "last_exit_code": None}
+
+_ACTIVE_CHANNELS = None
+
+
+def process_split_enabled(config):
+    """collector.process_split, overridden by DASHBOARD_PROCESS_SPLIT=1|0."""
+    env = os.environ.get('DASHBOARD_PROCESS_SPLIT', '').strip().lower()
+    if env:
+        return env in ('1', 'true', 'yes', 'on')
+    return bool(((config or {}).get('collector') or {}).get('process_split', False))
+
+
+def channel_path(port, name):
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, f"drivebay-dashboard-{port}-{name}")
+
+
+class SegmentWriter:
+    """Single writer for one channel file."""
+
+    def __init__(self, path, capacity=INITIAL_CAPACITY):
+        self.path = path
+        self.seq = 0
+        self.version = 0
+        self.mm = None
+        self._open(capacity)
+
+    def _open(self, capacity, seq=0):
+        # Build the file under a temp name so a reader never maps a half-written header.
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, HEADER_SIZE + capacity)
+            mm = mmap.mmap(fd, HEADER_SIZE + capacity)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(mm, 0, MAGIC, seq, self.version, 0, 0.0)
+        os.replace(tmp, self.path)
+        if self.mm is not None:
+            self.mm.close()
+        self.mm, self.capacity, self.inode = mm, capacity, (st.st_dev, st.st_ino)
+
+    def relink(self):
+        """Recreate the file if someone else removed or replaced it (the demand channel after a collector exit)."""
+        try:
+            st = os.stat(self.path)
+            if (st.st_dev, st.st_ino) == self.inode:
+                return
+        except OSError:
+            pass
+        self._open(self.capacity, seq=self.seq)
+
+    def publish(self, payload):
+        """Replace the channel payload; returns the new version."""
+        if len(payload) > self.capacity:
+            # Grown file starts out mid-write (odd seq) and is completed below.
+            self._open(max(len(payload) * 2, self.capacity * 2), seq=self.seq + 1)
+        mm = self.mm
+        self.seq += 1
+        SEQ.pack_into(mm, SEQ_OFFSET, self.seq)
+        mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        self.version += 1
+        HEADER.pack_into(mm, 0, MAGIC, self.seq, self.version, len(payload), time.time())
+        self.seq += 1
+        SEQ.pack_into(mm, SEQ_OFFSET, self.seq)
+        return self.version
+
+    def close(self, unlink=False):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class SegmentReader:
+    """Lock-free reader for one channel file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mm = None
+        self.inode = None
+
+    def close(self, unlink=False):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _attach(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        inode = (st.st_dev, st.st_ino)
+        if self.mm is not None and inode == self.inode and len(self.mm) == st.st_size:
+            return True
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            size = os.fstat(fd).st_size
+            if size < HEADER_SIZE:
+                return False
+            mm = mmap.mmap(fd, size, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        if mm[:len(MAGIC)] != MAGIC:
+            mm.close()
+            return False
+        self.mm, self.inode = mm, inode
+        return True
+
+    def stamp(self):
+        """(inode, version) of the current payload without copying it, or None."""
+        if not self._attach():
+            return None
+        return self.inode, HEADER.unpack_from(self.mm, 0)[2]
+
+    def read(self):
+        """(stamp, published_at, payload) for a consistent copy, or None if nothing is published."""
+        if not self._attach():
+            return None
+        mm = self.mm
+        for _ in range(READ_RETRIES):
+            _, seq, version, length, published_at = HEADER.unpack_from(mm, 0)
+            if seq & 1 or HEADER_SIZE + length > len(mm):
+                time.sleep(0)
+                continue
+            if not length:
+                return None
+            payload = mm[HEADER_SIZE:HEADER_SIZE + length]
+            if SEQ.unpack_from(mm, SEQ_OFFSET)[0] == seq:
+                return (self.inode, version), published_at, payload
+        return None
+
+
+def encode_pool_histories(histories):
+    """{pool: {'r': seq, 'w': seq}} -> bytes (count, then name + two float64 series per pool)."""
+    parts = [struct.pack('<I', len(histories))]
+    for pool, history in histories.items():
+        name = str(pool).encode('utf-8')
+        r, w = array('d', history['r']), array('d', history['w'])
+        parts.append(POOL_ENTRY.pack(len(name), len(r), len(w)))
+        parts.append(name)
+        parts.append(r.tobytes())
+        parts.append(w.tobytes())
+    return b''.join(parts)
+
+
+def decode_pool_histories(payload):
+    out = {}
+    count = struct.unpack_from('<I', payload, 0)[0]
+    offset = 4
+    for _ in range(count):
+        name_len, r_len, w_len = POOL_ENTRY.unpack_from(payload, offset)
+        offset += POOL_ENTRY.size
+        name = payload[offset:offset + name_len].decode('utf-8')
+        offset += name_len
+        series = []
+        for samples in (r_len, w_len):
+            values = array('d')
+            values.frombytes(payload[offset:offset + samples * 8])
+            offset += samples * 8
+            series.append(values.tolist())
+        out[name] = {'r': series[0], 'w': series[1]}
+    return out
+
+
+class SplitChannels:
+    """The channels for one dashboard port, opened from the collector side (writer=True) or the server side.
+    Each side writes its own channels (CHANNELS / SERVER_CHANNELS) and reads the other's."""
+
+    def __init__(self, port, writer=False):
+        self.port = port
+        self.writer = writer
+        own, other = (CHANNELS, SERVER_CHANNELS) if writer else (SERVER_CHANNELS, CHANNELS)
+        self.writers = {name: SegmentWriter(channel_path(port, name),
+                                            SMALL_CAPACITY if name in SERVER_CHANNELS else INITIAL_CAPACITY)
+                        for name in own}
+        self.readers = {name: SegmentReader(channel_path(port, name)) for name in other}
+        self._lock = threading.Lock()
+        self._seen = {}             # channel -> (stamp, published_at) last returned by read_new_json()
+        self._pools_cache = (None, {})
+
+    def publish_json(self, name, payload):
+        if name in SERVER_CHANNELS:
+            self.writers[name].relink()
+        return self.writers[name].publish(json.dumps(payload, separators=(',', ':'), default=str).encode())
+
+    # collector side
+    def publish_pools(self, histories):
+        return self.writers["pools"].publish(encode_pool_histories(histories))
+
+    def close(self):
+        """Collector side: drop all channel files (the server re-creates demand on its next publish)."""
+        for segment in list(self.writers.values()) + list(self.readers.values()):
+            segment.close(unlink=True)
+
+    # server side
+    def read_new_json(self, name):
+        """Decoded payload if the channel changed since the last call, else None."""
+        segment = self.readers[name]
+        stamp = segment.stamp()
+        if stamp is None or stamp == self._seen.get(name, (None,))[0]:
+            return None
+        result = segment.read()
+        if result is None:
+            return None
+        self._seen[name] = result[:2]
+        return json.loads(result[2])
+
+    def published_at(self, name):
+        """Publish time of the payload last returned by read_new_json(name)."""
+        return self._seen.get(name, (None, None))[1]
+
+    def pool_histories(self):
+        """Latest pool activity histories, decoded once per published version."""
+        segment = self.readers["pools"]
+        with self._lock:
+            stamp = segment.stamp()
+            if stamp is not None and stamp != self._pools_cache[0]:
+                result = segment.read()
+                if result is not None:
+                    self._pools_cache = (result[0], decode_pool_histories(result[2]))
+            return self._pools_cache[1]
+
+
+def split_channels():
+    """Reader channels when this server runs in process-split mode, else None."""
+    return _ACTIVE_CHANNELS
+
+
+def collector_status():
+    with COLLECTOR_STATE_LOCK:
+        status = dict(COLLECTOR_STATE)
+    if _ACTIVE_CHANNELS is not None:
+        published = _ACTIVE_CHANNELS.published_at("snapshot")
+        status["snapshot_age_secs"] = round(time.time() - published, 2) if published else None
+    return status
+
+
+def collector_supervisor_thread(port, config_file):
+    """Run the collector process and restart it (with backoff) whenever it exits."""
+    backoff = RESTART_BASE_SECS
+    cmd = [sys.executable, '-m', 'py.splitmode', '--port', str(port),
+           '--config', config_file, '--parent', str(os.getpid())]
+    while True:
+        started = time.time()
+        try:
+            proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdin=subprocess.DEVNULL)
+        except Exception as e:
+            print(f"Collector process failed to start: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, RESTART_MAX_SECS)
+            continue
+        with COLLECTOR_STATE_LOCK:
+            COLLECTOR_STATE.update(pid=proc.pid, started_at=started)
+        print(f"Collector process started (pid {proc.pid})")
+        code = proc.wait()
+        if time.time() - started > RESTART_MAX_SECS:
+            backoff = RESTART_BASE_SECS
+        with COLLECTOR_STATE_LOCK:
+            COLLECTOR_STATE.update(pid=None, last_exit_code=code)
+            COLLECTOR_STATE["restarts"] += 1
+        print(f"Collector process exited with code {code}; restarting in {backoff:.0f}s")
+        time.sleep(backoff)
+        backoff = min(backoff * 2, RESTART_MAX_SECS)
+
+
+def start_split_mode(port, config_file):
+    """Server side: open the channels and start the supervised collector process."""
+    global _ACTIVE_CHANNELS
+    _ACTIVE_CHANNELS = SplitChannels(port)
+    set_demand_publisher(_ACTIVE_CHANNELS)
+    threading.Thread(target=collector_supervisor_thread, args=(port, config_file), daemon=True).start()
+    return _ACTIVE_CHANNELS
+
+
+def collector_main(argv=None):
+    """Collector process entry point: python3 -m py.splitmode --port P [--config FILE]."""
+    parser = argparse.ArgumentParser(description="Dashboard collector process (process-split mode).")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--config")
+    parser.add_argument("--parent", type=int, help="exit when this pid is no longer our parent")
+    args = parser.parse_args(argv)
+
+    if args.config:
+        import py.config
+        py.config.CONFIG_FILE = args.config
+        py.config.STYLE_CONFIG_FILE = args.config
+    from py.server import (io_monitor_thread, topology_scanner_thread, pool_activity_monitor_thread,
+                           collector_publisher_thread)
+    from py.governor import governor_thread
+    from py.demand import demand_watch_thread
+    from py.zpool_iostat import zpool_iostat_thread
+    from py.arcstats import arc_monitor_thread
+    from py.dataset_io import dataset_io_thread
+    from py.txg_stats import txg_monitor_thread
+    from py.config import load_config
+    for target in (io_monitor_thread, pool_activity_monitor_thread):
+        threading.Thread(target=target, daemon=True).start()
+    threading.Thread(target=topology_scanner_thread, args=(False,), daemon=True).start()
+    threading.Thread(target=governor_thread, args=(load_config,), daemon=True).start()
+    channels = SplitChannels(args.port, writer=True)
+    threading.Thread(target=demand_watch_thread, args=(channels,), daemon=True).start()
+    threading.Thread(target=zpool_iostat_thread, args=(load_config, lambda sample: channels.publish_json("iostat", sample)),
+                     daemon=True).start()
+    threading.Thread(target=arc_monitor_thread, args=(load_config, lambda sample: channels.publish_json("arc", sample)),
+                     daemon=True).start()
+    threading.Thread(target=dataset_io_thread, args=(load_config, lambda sample: channels.publish_json("datasets", sample)),
+                     daemon=True).start()
+    threading.Thread(target=txg_monitor_thread, args=(load_config, lambda sample: channels.publish_json("txgs", sample)),
+                     daemon=True).start()
+    # Service stop signals the whole process group; unwind so the channel files are removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        collector_publisher_thread(channels, args.parent)
+    finally:
+        channels.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(collector_main())
@@ -0,0 +1,206 @@
+import json, re, threading, time
+from .runner import command_output, find_tool
+
+# storcli (MegaRAID / Broadcom HBA) inventory with a per-refresh cache.
+#
+# Two queries cover every controller at once:
+#   storcli /call show J              controller PCI addresses and Enclosure LIST
+#                                     (cached CONTROLLER_TTL_SECS; hardware rarely changes)
+#   storcli /call/eall/sall show all  every drive: EID:Slt, state, model, serial,
+#                                     size, temperature (cached DRIVE_TTL_SECS, so one
+#                                     call serves all controllers of a topology scan)
+# Drives are indexed per controller by (enclosure, slot) and by serial, and handed
+# out in the _parse_ircu_display enclosure shape so build_ircu_chassis lays out
+# storcli bays exactly like sas2ircu/sas3ircu ones.
+
+STORCLI_TOOLS = ("storcli", "storcli64", "storcli2")
+CONTROLLER_TTL_SECS = 300.0
+DRIVE_TTL_SECS = 4.0            # just under the 5 s scan interval
+VIRTUAL_ENCLOSURE_PRODUCTS = ("sgpio", "virtualses", "virtual ses")
+
+CONTROLLER_QUERY = ["/call", "show", "J"]
+DRIVE_QUERY = ["/call/eall/sall", "show", "all", "J"]
+
+# MegaRAID drive states that make_disk_record should read as failed/missing.
+RAW_STATES = {"Failed": "Failed", "UBad": "Failed (UBad)", "Msng": "Missing", "Offln": "Offline"}
+
+STORCLI_LOCK = threading.Lock()
+_CACHE = {}     # query name -> (fetched_at, indexed result)
+
+
+def storcli_tool():
+    for tool in STORCLI_TOOLS:
+        if find_tool(tool):
+            return tool
+    return None
+
+
+def storcli_pci_address(value):
+    """storcli 'PCI Address' (segment:bus:device:function, e.g. 00:03:00:00) -> 0000:03:00.0."""
+    parts = str(value or "").strip().split(':')
+    if len(parts) != 4:
+        return ""
+    try:
+        seg, bus, dev, func = (int(part, 16) for part in parts)
+    except ValueError:
+        return ""
+    return f"{seg:04x}:{bus:02x}:{dev:02x}.{func:x}"
+
+
+def _query(name, args, ttl, index):
+    """Run storcli <args> once per ttl and keep index(parsed JSON or None); failures are cached too."""
+    now = time.monotonic()
+    with STORCLI_LOCK:
+        cached = _CACHE.get(name)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+    tool = storcli_tool()
+    payload = None
+    if tool:
+        try:
+            payload = json.loads(command_output([tool] + list(args), name=f"storcli {name}"))
+        except Exception:
+            payload = None
+    result = index(payload)
+    with STORCLI_LOCK:
+        _CACHE[name] = (now, result)
+    return result
+
+
+def _controllers(payload):
+    """[(controller index, Response Data)] from a storcli JSON payload."""
+    out = []
+    for controller in (payload or {}).get("Controllers", []) if isinstance(payload, dict) else []:
+        if not isinstance(controller, dict):
+            continue
+        status = controller.get("Command Status", {})
+        data = controller.get("Response Data")
+        if isinstance(status, dict) and isinstance(data, dict) and "Controller" in status:
+            out.append((str(status["Controller"]), data))
+    return out
+
+
+def controller_inventory():
+    """{controller index: {"pci", "response", "enclosures": {eid: {"slots", "virtual"}}}}."""
+    return _query("show", CONTROLLER_QUERY, CONTROLLER_TTL_SECS, _index_controllers)
+
+
+def _index_controllers(payload):
+    inventory = {}
+    for index, data in _controllers(payload):
+        basics = data.get("Basics", {}) if isinstance(data.get("Basics"), dict) else {}
+        enclosures = {}
+        for enc in data.get("Enclosure LIST", []) or []:
+            if not isinstance(enc, dict) or enc.get("EID") in (None, ""):
+                continue
+            product = str(enc.get("ProdID", "")).strip().lower()
+            enclosures[str(enc["EID"])] = {
+                "slots": int(enc.get("Slots") or 0),
+                "virtual": product in VIRTUAL_ENCLOSURE_PRODUCTS
+            }
+        inventory[index] = {
+            "pci": storcli_pci_address(basics.get("PCI Address")),
+            "response": data,
+            "enclosures": enclosures
+        }
+    return inventory
+
+
+def find_storcli_controller(pci_address):
+    """Controller index for a Linux PCI address (0000:03:00.0), or None."""
+    for index, info in controller_inventory().items():
+        if info["pci"] and info["pci"] == pci_address:
+            return index
+    return None
+
+
+def _size_bytes(summary, attributes):
+    # "Raw size": "3.638 TB [0x1d1c0beb0 Sectors]" with SeSz "512B" is exact; fall back to "Size".
+    sector_match = re.search(r'\[0x([0-9a-fA-F]+)\s+Sectors\]', str(attributes.get("Raw size", "")))
+    sector_size = re.match(r'(\d+)', str(summary.get("SeSz", "512")))
+    if sector_match:
+        return int(sector_match.group(1), 16) * (int(sector_size.group(1)) if sector_size else 512)
+    size_match = re.match(r'([\d.]+)\s*([KMGTP]B)', str(summary.get("Size", "")))
+    if size_match:
+        return int(float(size_match.group(1)) * 1024 ** ("KMGTP".index(size_match.group(2)[0]) + 1))
+    return 0
+
+
+def _drive_record(path, summary, detail):
+    attributes = detail.get(f"Drive {path} Device attributes", {}) if isinstance(detail, dict) else {}
+    state_info = detail.get(f"Drive {path} State", {}) if isinstance(detail, dict) else {}
+    temp_match = re.match(r'\s*(\d+)C', str(state_info.get("Drive Temperature", "")))
+    state = str(summary.get("State", "")).strip()
+    return {
+        "serial":        str(attributes.get("SN", "")).strip(),
+        "wwn":           str(attributes.get("WWN", "")).strip(),
+        "model":         str(summary.get("Model", "") or attributes.get("Model Number", "")).strip() or "Unknown",
+        "size_bytes":    _size_bytes(summary, attributes),
+        "raw_state":     RAW_STATES.get(state, state),
+        "temperature_c": int(temp_match.group(1)) if temp_match else None
+    }
+
+
+def drive_index():
+    """
+    {controller index: {"slots": {(eid, slot): drive}, "serials": {serial: (eid, slot)}}}
+    from one cached /call/eall/sall show all. Drives without an enclosure use eid "".
+    """
+    return _query("drives", DRIVE_QUERY, DRIVE_TTL_SECS, _index_drives)
+
+
+def _index_drives(payload):
+    index = {}
+    for ctrl, data in _controllers(payload):
+        entry = index.setdefault(ctrl, {"slots": {}, "serials": {}})
+        for key, value in data.items():
+            path_match = re.match(r'^Drive (/c\d+(?:/e(\d+))?/s(\d+))$', key)
+            if not path_match or not isinstance(value, list) or not value or not isinstance(value[0], dict):
+                continue
+            path, eid, slot = path_match.group(1), path_match.group(2) or "", path_match.group(3)
+            drive = _drive_record(path, value[0], data.get(f"Drive {path} - Detailed Information", {}))
+            if drive["serial"] and drive["serial"] in entry["serials"]:
+                continue
+            entry["slots"][(eid, slot)] = drive
+            if drive["serial"]:
+                entry["serials"][drive["serial"]] = (eid, slot)
+    return index
+
+
+def storcli_enclosures(pci_address):
+    """
+    Drives of the controller at pci_address in the _parse_ircu_display shape:
+      { eid: { "slots", "is_backplane", "array_address", "drives": { slot: drive } } }
+    SGPIO / virtual SES enclosures and enclosure-less drives count as direct-attach.
+    Returns {} when storcli is missing, the controller is unknown or has no drives.
+    """
+    ctrl = find_storcli_controller(pci_address)
+    if ctrl is None:
+        return {}
+    listed = controller_inventory().get(ctrl, {}).get("enclosures", {})
+    enclosures = {}
+    for (eid, slot), drive in sorted(drive_index().get(ctrl, {}).get("slots", {}).items()):
+        info = listed.get(eid, {})
+        key = eid or "0"
+        if key not in enclosures:
+            enclosures[key] = {
+                "slots": info.get("slots", 0),
+                "is_backplane": bool(eid) and not info.get("virtual", False),
+                "array_address": "",
+                "drives": {}
+            }
+        enclosures[key]["drives"][slot] = drive
+    for enc in enclosures.values():
+        # As with ircu, a backplane's bay count comes from its populated slots when
+        # storcli doesn't list the enclosure.
+        if enc["is_backplane"] and not enc["slots"]:
+            enc["slots"] = max(int(s) for s in enc["drives"]) + 1
+    return enclosures
+
+
+def storcli_phy_payload(pci_address):
+    """Response Data of the controller at pci_address from the cached /call show (for phy counting)."""
+    ctrl = find_storcli_controller(pci_address)
+    if ctrl is None:
+        return None
+    return controller_inventory()[ctrl]["response"]
@@ -0,0 +1,194 @@
+import cProfile, io, os, pstats, subprocess, tempfile, threading, time
+from collections import deque
+from contextlib import contextmanager
+
+# Duration stats for collector stages and external commands, served at
+# GET /debug/timings, plus the opt-in cProfile capture of whole scan cycles
+# (POST /debug/profile, GET /debug/profile.prof).
+
+TIMINGS_LOCK = threading.Lock()
+TIMINGS = {"stage": {}, "command": {}}
+SAMPLE_WINDOW = 200     # recent durations kept per name for percentiles
+
+PROFILE_LOCK = threading.Lock()
+PROFILE_STATE = {
+    "state": "idle",        # idle | armed | done
+    "cycles_requested": 0,
+    "cycles_done": 0,
+    "started_at": None,
+    "captured_at": None,
+    "profile": None,        # cProfile.Profile while capturing
+    "data": None            # marshalled pstats bytes once done
+}
+MAX_PROFILE_CYCLES = 50
+
+
+def _new_stats():
+    return {
+        "count": 0,
+        "last_s": None,
+        "last_ts": None,
+        "timeouts": 0,
+        "failures": 0,
+        "last_error": None,
+        "samples": deque(maxlen=SAMPLE_WINDOW)
+    }
+
+
+def record(kind, name, seconds, outcome="ok", error=None):
+    """Add one observation. kind is "stage" or "command"; outcome ok | timeout | error."""
+    with TIMINGS_LOCK:
+        stats = TIMINGS.setdefault(kind, {}).get(name)
+        if stats is None:
+            stats = TIMINGS[kind][name] = _new_stats()
+        stats["count"] += 1
+        stats["last_s"] = seconds
+        stats["last_ts"] = time.time()
+        stats["samples"].append(seconds)
+        if outcome == "timeout":
+            stats["timeouts"] += 1
+        elif outcome != "ok":
+            stats["failures"] += 1
+        if outcome != "ok":
+            stats["last_error"] = str(error or outcome)[:300]
+
+
+def _tag_stage(ex, kind, name):
+    if kind == "stage" and getattr(ex, "failed_stage", None) is None:
+        try:
+            ex.failed_stage = name
+        except AttributeError:
+            pass
+
+
+@contextmanager
+def timed(kind, name):
+    """
+    Time the block; TimeoutExpired counts as a timeout, any other exception as a failure.
+    An exception leaving a stage is tagged with the innermost stage name (ex.failed_stage)
+    so the scanner's error log can say where the cycle broke.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except subprocess.TimeoutExpired as ex:
+        record(kind, name, time.perf_counter() - started, "timeout", ex)
+        _tag_stage(ex, kind, name)
+        raise
+    except Exception as ex:
+        record(kind, name, time.perf_counter() - started, "error", ex)
+        _tag_stage(ex, kind, name)
+        raise
+    record(kind, name, time.perf_counter() - started)
+
+
+def percentile(sorted_values, pct):
+    """Linearly interpolated pct-th percentile of an ascending list (None when empty)."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 2)
+
+
+def timings_snapshot():
+    """JSON-ready {stages: {...}, commands: {...}} with p50/p95 over the recent window."""
+    with TIMINGS_LOCK:
+        copied = {kind: {name: dict(stats, samples=list(stats["samples"])) for name, stats in rows.items()}
+                  for kind, rows in TIMINGS.items()}
+    out = {}
+    for kind, rows in copied.items():
+        section = {}
+        for name, stats in sorted(rows.items()):
+            samples = sorted(stats["samples"])
+            section[name] = {
+                "count": stats["count"],
+                "last_ms": _ms(stats["last_s"]),
+                "p50_ms": _ms(percentile(samples, 50)),
+                "p95_ms": _ms(percentile(samples, 95)),
+                "max_ms": _ms(samples[-1] if samples else None),
+                "timeouts": stats["timeouts"],
+                "failures": stats["failures"],
+                "last_error": stats["last_error"],
+                "last_ts": stats["last_ts"]
+            }
+        out[kind + "s"] = section
+    return out
+
+
+# ── opt-in scan profiler ──────────────────────────────────────────────────────
+
+def arm_profiler(cycles):
+    """Capture the next N scan cycles with cProfile (replaces any previous capture)."""
+    cycles = max(1, min(int(cycles), MAX_PROFILE_CYCLES))
+    with PROFILE_LOCK:
+        PROFILE_STATE.update(state="armed", cycles_requested=cycles, cycles_done=0,
+                             started_at=time.time(), captured_at=None, profile=cProfile.Profile(), data=None)
+    return profiler_status()
+
+
+def profiler_status():
+    with PROFILE_LOCK:
+        return {k: v for k, v in PROFILE_STATE.items() if k not in ("profile", "data")} | {
+            "size_bytes": len(PROFILE_STATE["data"]) if PROFILE_STATE["data"] else 0
+        }
+
+
+@contextmanager
+def profile_cycle():
+    """Wrap one scan cycle; profiles it only while the profiler is armed."""
+    with PROFILE_LOCK:
+        profile = PROFILE_STATE["profile"] if PROFILE_STATE["state"] == "armed" else None
+    if profile is None:
+        yield
+        return
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        with PROFILE_LOCK:
+            if PROFILE_STATE["profile"] is profile:
+                PROFILE_STATE["cycles_done"] += 1
+                if PROFILE_STATE["cycles_done"] >= PROFILE_STATE["cycles_requested"]:
+                    PROFILE_STATE.update(state="done", captured_at=time.time(), profile=None,
+                                         data=_dump_profile(profile))
+
+
+def _dump_profile(profile):
+    # pstats only writes marshalled stats to a file; round-trip through a temp file.
+    fd, path = tempfile.mkstemp(suffix=".prof")
+    os.close(fd)
+    try:
+        profile.dump_stats(path)
+        with open(path, "rb") as fh:
+            return fh.read()
+    finally:
+        os.unlink(path)
+
+
+def profile_bytes():
+    """Captured .prof bytes (load with pstats / snakeviz), or None."""
+    with PROFILE_LOCK:
+        return PROFILE_STATE["data"]
+
+
+def profile_text(limit=40):
+    """Top functions by cumulative time as plain text, or None."""
+    data = profile_bytes()
+    if not data:
+        return None
+    fd, path = tempfile.mkstemp(suffix=".prof")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+    finally:
+        os.unlink(path)
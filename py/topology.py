@@ -1,5 +1,9 @@
-import json, os, re, shutil, subprocess
-from zfs_logic import _fetch_disk_temperatures_via_api, _lookup_temperature_for_disk
+import os, re
+from zfs_logic import _fetch_disk_temperatures_via_api, _lookup_temperature_for_disk, _strip_partition_suffix
+from .records import DiskRecord, EMPTY_BAY
+from .paths import host_path
+from .runner import run_command, command_output, find_tool
+from .storcli import storcli_tool, storcli_enclosures, storcli_phy_payload
 
 DEFAULT_TARGETS_PER_PORT = 4
 
@@ -25,7 +29,7 @@ def normalize_pci_address(pci_address):
 
 
 def find_enclosure_slot_count(pci_address):
-    enclosure_root = '/sys/class/enclosure'
+    enclosure_root = host_path('/sys/class/enclosure')
     if not os.path.exists(enclosure_root):
         return 0
 
@@ -59,7 +63,7 @@ def count_controller_ports(pci_address):
     pci_path = normalize_pci_address(pci_address)
     ports = 0
 
-    sas_host_root = '/sys/class/sas_host'
+    sas_host_root = host_path('/sys/class/sas_host')
     if os.path.exists(sas_host_root):
         for host in os.scandir(sas_host_root):
             device_link = os.path.join(host.path, 'device')
@@ -69,7 +73,7 @@ def count_controller_ports(pci_address):
         if ports > 0:
             return ports
 
-    scsi_host_root = '/sys/class/scsi_host'
+    scsi_host_root = host_path('/sys/class/scsi_host')
     if os.path.exists(scsi_host_root):
         for host in os.scandir(scsi_host_root):
             device_link = os.path.join(host.path, 'device')
@@ -85,7 +89,7 @@ def count_controller_phys(pci_address):
     entries that resolve to the given PCI address.
     """
     pci_path = normalize_pci_address(pci_address)
-    sas_phy_root = '/sys/class/sas_phy'
+    sas_phy_root = host_path('/sys/class/sas_phy')
     phys = 0
 
     if not os.path.exists(sas_phy_root):
@@ -162,7 +166,7 @@ def _find_ircu_adapter(ircu_tool, pci_address):
          Bus/Device/Function from its DISPLAY output.
     """
     try:
-        list_out = subprocess.check_output([ircu_tool, "LIST"], text=True, timeout=2)
+        list_out = command_output([ircu_tool, "LIST"], timeout=2, name=f"{ircu_tool} LIST")
     except Exception:
         return None
 
@@ -196,9 +200,7 @@ def _find_ircu_adapter(ircu_tool, pci_address):
     )
     for idx in indices:
         try:
-            disp = subprocess.check_output(
-                [ircu_tool, str(idx), "DISPLAY"], text=True, timeout=5
-            )
+            disp = command_output([ircu_tool, str(idx), "DISPLAY"], name=f"{ircu_tool} DISPLAY")
             bus_m  = re.search(r"^\s*Bus\s*:\s*(\d+)", disp, re.MULTILINE)
             dev_m  = re.search(r"^\s*Device\s*:\s*(\d+)", disp, re.MULTILINE)
             func_m = re.search(r"^\s*Function\s*:\s*(\d+)", disp, re.MULTILINE)
@@ -218,7 +220,7 @@ def _find_ircu_adapter(ircu_tool, pci_address):
 
 def _count_ircu_phys(ircu_tool, adapter_id):
     try:
-        output = subprocess.check_output([ircu_tool, str(adapter_id), "DISPLAY"], text=True, timeout=2)
+        output = command_output([ircu_tool, str(adapter_id), "DISPLAY"], timeout=2, name=f"{ircu_tool} DISPLAY")
     except Exception:
         return 0
 
@@ -242,30 +244,9 @@ def _find_max_phy_in_json(data):
     return max_phy
 
 def _storcli_phy_count(pci_address):
-    try:
-        output = subprocess.check_output(["storcli", "/cALL", "show", "J"], text=True, timeout=3)
-    except Exception:
-        return 0
-
-    try:
-        payload = json.loads(output)
-    except Exception:
-        return 0
-
-    target = normalize_pci_address(pci_address)
-    controllers = payload.get("Controllers", []) if isinstance(payload, dict) else []
-    for controller in controllers:
-        response_data = controller.get("Response Data", {}) if isinstance(controller, dict) else {}
-        sys_overview = response_data.get("System Overview", []) if isinstance(response_data, dict) else []
-        if isinstance(sys_overview, list):
-            for item in sys_overview:
-                if not isinstance(item, dict):
-                    continue
-                pci = item.get("PCI Address") or item.get("PCI Address ")
-                if pci and normalize_pci_address(str(pci)) == target:
-                    return _find_max_phy_in_json(response_data)
-
-    return _find_max_phy_in_json(payload)
+    # Walks only this controller's part of the cached `storcli /call show J` (py/storcli.py).
+    response_data = storcli_phy_payload(normalize_pci_address(pci_address))
+    return _find_max_phy_in_json(response_data) if response_data else 0
 
 def get_vendor_cli_phys(pci_address):
     """
@@ -274,14 +255,14 @@ def get_vendor_cli_phys(pci_address):
     Returns 0 if no data is available.
     """
     for tool in ("sas3ircu", "sas2ircu"):
-        if shutil.which(tool):
+        if find_tool(tool):
             adapter_id = _find_ircu_adapter(tool, pci_address)
             if adapter_id is not None:
                 phys = _count_ircu_phys(tool, adapter_id)
                 if phys > 0:
                     return phys
 
-    if shutil.which("storcli"):
+    if storcli_tool():
         phys = _storcli_phy_count(pci_address)
         if phys > 0:
             return phys
@@ -306,10 +287,7 @@ def _parse_ircu_display(ircu_tool, adapter_id):
                            computed from remaining PHYs in get_ircu_slot_topology.
     """
     try:
-        proc = subprocess.run(
-            [ircu_tool, str(adapter_id), "DISPLAY"],
-            capture_output=True, text=True, timeout=5
-        )
+        proc = run_command([ircu_tool, str(adapter_id), "DISPLAY"], check=False, name=f"{ircu_tool} DISPLAY")
         raw = proc.stdout
     except Exception:
         return {}, 0
@@ -432,9 +410,7 @@ def build_serial_to_dev_map():
     """
     mapping = {}
     try:
-        output = subprocess.check_output(
-            ["lsblk", "-dno", "NAME,SERIAL"], text=True, timeout=5
-        )
+        output = command_output(["lsblk", "-dno", "NAME,SERIAL"], name="lsblk serials")
         for line in output.splitlines():
             parts = line.split()
             if len(parts) >= 2:
@@ -450,7 +426,7 @@ def build_serial_to_dev_map():
     return mapping
 
 
-def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
+def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None, identity=None):
     """
     Build one chassis topology entry per physical enclosure on this HBA using sas3ircu/sas2ircu:
 
@@ -465,11 +441,14 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
     Returns {} when no ircu tool is available or the tool returns no useful data.
     Returns a dict { chassis_subkey: topology_dict } otherwise.
     Each topology_dict is compatible with new_topology entries used by topology_scanner_thread.
+
+    identity is the scan's DeviceIdentityIndex; without it serials are resolved
+    through a fresh lsblk serial map.
     """
     ircu_tool  = None
     adapter_id = None
     for tool in ("sas3ircu", "sas2ircu"):
-        if not shutil.which(tool):
+        if not find_tool(tool):
             continue
         aid = _find_ircu_adapter(tool, pci_address)
         if aid is not None:
@@ -484,7 +463,28 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
     if not enclosures:
         return {}
 
-    serial_to_dev  = build_serial_to_dev_map()
+    return build_ircu_chassis(pci_address, enclosures, phy_count, zfs_map, config, temp_map, identity)
+
+
+def get_storcli_slot_topology(pci_address, zfs_map, config, temp_map=None, identity=None):
+    """
+    Chassis entries for a storcli-managed controller (MegaRAID, Broadcom 9400/9500 HBAs),
+    in the same shape as get_ircu_slot_topology. One backplane chassis per enclosure,
+    SGPIO/virtual enclosures as the direct-attach chassis. Returns {} without storcli data.
+    """
+    enclosures = storcli_enclosures(normalize_pci_address(pci_address))
+    if not enclosures:
+        return {}
+    return build_ircu_chassis(pci_address, enclosures, 0, zfs_map, config, temp_map, identity)
+
+
+def build_ircu_chassis(pci_address, enclosures, phy_count, zfs_map, config, temp_map=None, identity=None):
+    """
+    Turn parsed ircu enclosures (the _parse_ircu_display shape) into chassis entries.
+    Split out of get_ircu_slot_topology so other slot sources (SES, storcli, the
+    simulator) share the same bay layout and record assembly.
+    """
+    serial_to_dev  = identity if identity is not None else build_serial_to_dev_map()
     temp_map       = temp_map if isinstance(temp_map, dict) else _fetch_disk_temperatures_via_api()
     pci_key        = pci_address.replace(':', '-').replace('.', '-')
     device_config  = config.get("devices", {}).get(pci_address, {}) if isinstance(config, dict) else {}
@@ -494,56 +494,21 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
     ports          = count_controller_ports(pci_address) or override_ports
     result         = {}
 
-    def _lookup_zfs_disk(dev_name):
-        if not isinstance(zfs_map, dict):
-            return {"pool": "", "idx": "", "state": "UNALLOCATED", "temperature_c": None}
-
-        direct = zfs_map.get(dev_name)
-        if direct:
-            return direct
-
-        base_name = re.sub(r'p?\d+$', '', str(dev_name or ''))
-        if base_name:
-            base_match = zfs_map.get(base_name)
-            if base_match:
-                return base_match
-
-            for candidate, info in zfs_map.items():
-                if candidate == base_name or str(candidate).startswith(base_name):
-                    return info
-
-        return {"pool": "", "idx": "", "state": "UNALLOCATED", "temperature_c": None}
-
-    def _lookup_smart_temp(dev_name):
-        if not dev_name:
-            return None
-        try:
-            disk_path = dev_name if str(dev_name).startswith('/dev/') else f'/dev/{dev_name}'
-            return _lookup_temperature_for_disk(disk_path, dev_name, temp_map)
-        except Exception:
-            return None
-
     def _make_disk(drive):
-        """Enrich an ircu drive record with ZFS state from zfs_map."""
-        serial    = drive["serial"]
-        dev_name  = serial_to_dev.get(serial, "")
-        z         = _lookup_zfs_disk(dev_name)
-        smart_temp = _lookup_smart_temp(dev_name)
-        zfs_state = z.get("state", "UNALLOCATED")
-        if zfs_state == "UNALLOCATED":
-            if any(x in drive["raw_state"] for x in ("Failed", "Missing", "Critical", "Degraded")):
-                zfs_state = "FAULTED"
-        return {
-            "status":     "PRESENT",
-            "sn":         serial,
-            "size_bytes": drive["size_bytes"],
-            "dev_name":   dev_name,
-            "pool_name":  z.get("pool", ""),
-            "pool_idx":   z.get("idx", ""),
-            "state":      zfs_state,
-            "temperature_c": smart_temp if smart_temp is not None else z.get("temperature_c"),
-            "model":      drive["model"]
-        }
+        """Enrich an ircu drive record with ZFS state from zfs_map (SES records already carry dev_name)."""
+        serial = drive["serial"]
+        dev_name = drive.get("dev_name") or serial_to_dev.get(serial, "")
+        if not dev_name and drive.get("wwn"):
+            dev_name = serial_to_dev.get(f"0x{drive['wwn'].lower()}", "")
+        record = make_disk_record(
+            zfs_map, dev_name, temp_map,
+            sn=serial, size_bytes=drive["size_bytes"], model=drive["model"],
+            raw_state=drive["raw_state"], identity=identity
+        )
+        # Controller-reported temperature (storcli) for drives smartctl can't reach.
+        if record.temperature_c is None and drive.get("temperature_c") is not None:
+            record.temperature_c = drive["temperature_c"]
+        return record
 
     # ÔöÇÔöÇ One chassis per backplane enclosure ÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇÔöÇ
     num_backplane_enclosures = 0
@@ -559,7 +524,7 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
         bays_per_row = num_slots
         rows         = 1
 
-        disks = [{"status": "EMPTY"}] * num_slots
+        disks = [EMPTY_BAY] * num_slots
         for sid, drive in enc["drives"].items():
             bay_idx = int(sid)
             if bay_idx < num_slots:
@@ -615,7 +580,7 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
         bays_per_row = da_capacity
         rows         = 1
 
-        disks = [{"status": "EMPTY"}] * da_capacity
+        disks = [EMPTY_BAY] * da_capacity
         for bay_idx, drive in da_drives.items():
             if bay_idx < da_capacity:
                 disks[bay_idx] = _make_disk(drive)
@@ -638,45 +603,81 @@ def get_ircu_slot_topology(pci_address, zfs_map, config, temp_map=None):
     return result
 
 
-def lookup_zfs_disk_entry(zfs_map, dev_name, temp_map=None):
-    def _lookup_smart_temp(name):
-        if not name or not temp_map:
-            return None
-        try:
-            disk_path = name if str(name).startswith('/dev/') else f'/dev/{name}'
-            return _lookup_temperature_for_disk(disk_path, name, temp_map)
-        except Exception:
-            return None
-
-    def _with_temp_fallback(info, name):
-        out = dict(info or {})
-        out.setdefault("pool", "")
-        out.setdefault("idx", "")
-        out.setdefault("state", "UNALLOCATED")
-        out.setdefault("temperature_c", None)
-        smart_temp = _lookup_smart_temp(name)
-        if out.get("temperature_c") is None and smart_temp is not None:
-            out["temperature_c"] = smart_temp
-        return out
-
-    if not isinstance(zfs_map, dict):
-        return _with_temp_fallback({"pool": "", "idx": "", "state": "UNALLOCATED", "temperature_c": None}, dev_name)
+_UNALLOCATED_ZFS_ENTRY = {"pool": "", "idx": "", "state": "UNALLOCATED", "temperature_c": None}
+
+
+def lookup_zfs_disk_entry(zfs_map, dev_name, identity=None):
+    """
+    Return the zfs_map entry for dev_name (or its base device).
+    With a DeviceIdentityIndex any alias resolves to the canonical disk key.
+    Lookups are exact; there is no prefix matching (sda must not match sdaa).
+    The entry is shared with zfs_map and must be treated as read-only; unknown
+    devices get a shared UNALLOCATED placeholder.
+    """
+    if not isinstance(zfs_map, dict) or not dev_name:
+        return _UNALLOCATED_ZFS_ENTRY
+
+    if identity is not None:
+        canonical = identity.resolve(dev_name)
+        if canonical is not None:
+            return zfs_map.get(canonical) or _UNALLOCATED_ZFS_ENTRY
 
     direct = zfs_map.get(dev_name)
     if direct:
-        return _with_temp_fallback(direct, dev_name)
+        return direct
+
+    base_match = zfs_map.get(_strip_partition_suffix(dev_name))
+    if base_match:
+        return base_match
+
+    return _UNALLOCATED_ZFS_ENTRY
 
-    base_name = re.sub(r'p?\d+$', '', str(dev_name or ''))
-    if base_name:
-        base_match = zfs_map.get(base_name)
-        if base_match:
-            return _with_temp_fallback(base_match, base_name)
 
-        for candidate, info in zfs_map.items():
-            if candidate == base_name or str(candidate).startswith(base_name):
-                return _with_temp_fallback(info, base_name)
+def _lookup_smart_temp(dev_name, temp_map):
+    if not dev_name or not temp_map:
+        return None
+    try:
+        disk_path = dev_name if str(dev_name).startswith('/dev/') else f'/dev/{dev_name}'
+        return _lookup_temperature_for_disk(disk_path, dev_name, temp_map)
+    except Exception:
+        return None
+
 
-    return _with_temp_fallback({"pool": "", "idx": "", "state": "UNALLOCATED", "temperature_c": None}, dev_name)
+def make_disk_record(zfs_map, dev_name, temp_map, sn="", size_bytes=0, model="", raw_state="",
+                     identity=None, prefer_smart=True):
+    """
+    Build the DiskRecord for a present drive.
+    With prefer_smart (controller slot maps) the smartctl temperature wins and the
+    ZFS/API value is the fallback; by-path bays pass prefer_smart=False to keep
+    the ZFS/API value first and smartctl as the fallback.
+    raw_state is the controller's drive state (ircu) and only promotes
+    unallocated drives to FAULTED.
+    """
+    z = lookup_zfs_disk_entry(zfs_map, dev_name, identity)
+    canonical = identity.resolve(dev_name) if identity is not None else None
+    smart_temp = _lookup_smart_temp(canonical or dev_name, temp_map)
+    zfs_temp = z.get("temperature_c")
+    if prefer_smart:
+        temperature_c = smart_temp if smart_temp is not None else zfs_temp
+    else:
+        temperature_c = zfs_temp if zfs_temp is not None else smart_temp
+    state = z.get("state", "UNALLOCATED")
+    if state == "UNALLOCATED" and raw_state:
+        if any(x in raw_state for x in ("Failed", "Missing", "Critical", "Degraded")):
+            state = "FAULTED"
+    return DiskRecord(
+        sn=sn,
+        size_bytes=size_bytes,
+        dev_name=dev_name,
+        pool_name=z.get("pool", ""),
+        pool_idx=z.get("idx", ""),
+        state=state,
+        temperature_c=temperature_c,
+        read_errors=z.get("read_errors", 0),
+        write_errors=z.get("write_errors", 0),
+        cksum_errors=z.get("cksum_errors", 0),
+        model=model
+    )
 
 
 def get_controller_capacity(pci_address, config=None):
@@ -744,7 +745,7 @@ def is_virtual_storage_controller(pci_address):
     else:
         pci_path = pci_address
     
-    sysfs_path = f"/sys/bus/pci/devices/{pci_path}"
+    sysfs_path = host_path(f"/sys/bus/pci/devices/{pci_path}")
     
     if not os.path.exists(sysfs_path):
         return True  # If can't verify, assume virtual to be safe
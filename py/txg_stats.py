@@ -0,0 +1,266 @@
+import os, threading, time
+from collections import deque
+from .paths import host_path
+from .timings import percentile
+
+# Transaction-group timings from /proc/spl/kstat/zfs/<pool>/txgs.
+#
+# The kstat is a ring of the last zfs_txg_history txgs (default 100), one row
+# each: txg, birth (hrtime ns), state (O open, Q quiescing, W waiting for sync,
+# S syncing, C committed), ndirty, nread, nwritten, reads, writes and the ns the
+# txg spent open, quiescing, waiting and syncing. txg_monitor_thread re-reads
+# it every collector.txg_interval_secs but walks the rows from the end and stops
+# at the last committed txg it has already seen, so each tick parses only the
+# txgs committed since the previous one. Rows still in flight are skipped until
+# they commit. If the ring wrapped past the last seen txg, the gap is counted in
+# "missed".
+#
+# record_sample keeps each pool's committed txgs for the longest of WINDOWS and
+# txg_status() gives p50/p95/p99/max of the phase durations and dirty bytes per
+# window (GET /txg-stats). slow_sync_pools() backs the "TXG Sync Time Alert":
+# a pool whose p95 sync time over the last minute exceeds
+# collector.txg_sync_alert_ms. In process-split mode the collector publishes new
+# txgs on the "txgs" channel and the server keeps the windows.
+
+KSTAT_ROOT = '/proc/spl/kstat/zfs'
+DEFAULT_INTERVAL_SECS = 1
+DEFAULT_SYNC_ALERT_MS = 5000
+WINDOWS = (60, 300, 900)
+ALERT_WINDOW = 60
+TXG_HISTORY_LIMIT = 5000            # per pool; sync-heavy pools commit several txgs a second
+RECENT_TXGS = 20
+DISCOVERY_SECS = 30.0
+IDLE_CHECK_SECS = 30.0
+INITIAL_BUFFER = 32768
+
+# Committed txg record: (commit_ts, txg, ndirty, nread, nwritten, open_ms, quiesce_ms, wait_ms, sync_ms)
+RECORD_FIELDS = ("commit_ts", "txg", "dirty_bytes", "read_bytes", "written_bytes",
+                 "open_ms", "quiesce_ms", "wait_ms", "sync_ms")
+PERCENTILE_FIELDS = ("open_ms", "quiesce_ms", "wait_ms", "sync_ms", "dirty_bytes")
+
+TXG_LOCK = threading.Lock()
+TXG_HISTORY = {}                    # pool -> deque of records
+TXG_STATE = {
+    "available": False,
+    "interval_secs": DEFAULT_INTERVAL_SECS,
+    "sync_alert_ms": DEFAULT_SYNC_ALERT_MS,
+    "pools": {},                    # pool -> {"last_txg", "missed"}
+    "samples": 0,
+    "last_sample_ts": None,
+    "last_error": None
+}
+
+
+def _read(path, buf):
+    """Whole kstat into buf (grown as needed); returns (buf, length)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        length = 0
+        while True:
+            if length == len(buf):
+                buf = buf + bytearray(len(buf))
+            with memoryview(buf) as view:
+                count = os.preadv(fd, [view[length:]], length)
+            if count <= 0:
+                return buf, length
+            length += count
+    finally:
+        os.close(fd)
+
+
+def _commit_clock():
+    """(wall now, hrtime now in ns); txg birth times are on the SPL hrtime clock (CLOCK_MONOTONIC_RAW)."""
+    try:
+        return time.time(), time.clock_gettime_ns(time.CLOCK_MONOTONIC_RAW)
+    except (AttributeError, OSError):
+        return time.time(), None
+
+
+def parse_new_txgs(buf, length, last_txg, clock=None):
+    """Committed txgs newer than last_txg, oldest first, walking the ring from its end.
+    Returns (records, oldest txg number seen) — the latter tells whether the ring wrapped past last_txg."""
+    wall_now, hr_now = clock or _commit_clock()
+    records = []
+    oldest = None
+    end = length
+    while end > 0:
+        start = buf.rfind(b'\n', 0, end - 1) + 1 if end > 1 else 0
+        fields = buf[start:end].split()
+        end = start
+        if not fields:
+            continue
+        if len(fields) != 12 or not fields[0].isdigit():
+            break                   # column header: the whole ring has been walked
+        txg = int(fields[0])
+        if last_txg is not None and txg <= last_txg:
+            oldest = txg
+            break
+        oldest = txg
+        if fields[2] != b'C':
+            continue                # still open/quiescing/syncing; picked up once committed
+        birth, otime, qtime, wtime, stime = (int(fields[i]) for i in (1, 8, 9, 10, 11))
+        commit_ts = wall_now
+        if hr_now is not None:
+            age = (hr_now - (birth + otime + qtime + wtime + stime)) / 1e9
+            if 0 <= age < 86400:
+                commit_ts = wall_now - age
+        records.append((round(commit_ts, 3), txg, int(fields[3]), int(fields[4]), int(fields[5]),
+                        otime / 1e6, qtime / 1e6, wtime / 1e6, stime / 1e6))
+    records.reverse()
+    return records, oldest
+
+
+def discover_pools(root=None):
+    """{pool: txgs path} for every pool kstat directory with a txgs ring."""
+    root = root or host_path(KSTAT_ROOT)
+    found = {}
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return found
+    for entry in entries:
+        path = os.path.join(entry.path, 'txgs')
+        if entry.is_dir() and os.path.exists(path):
+            found[entry.name] = path
+    return found
+
+
+def record_sample(sample):
+    """Add newly committed txgs ({"ts", "pools": {pool: [record, ...]}, "missed": {pool: n}}).
+    Pools absent from "pools" were exported and are dropped."""
+    ts = sample.get("ts") or time.time()
+    pools = sample.get("pools") or {}
+    missed = sample.get("missed") or {}
+    with TXG_LOCK:
+        for pool in [p for p in TXG_HISTORY if p not in pools]:
+            del TXG_HISTORY[pool]
+            TXG_STATE["pools"].pop(pool, None)
+        for pool, records in pools.items():
+            history = TXG_HISTORY.setdefault(pool, deque(maxlen=TXG_HISTORY_LIMIT))
+            state = TXG_STATE["pools"].setdefault(pool, {"last_txg": None, "missed": 0})
+            history.extend(tuple(record) for record in records)
+            while history and ts - history[0][0] > WINDOWS[-1]:
+                history.popleft()
+            if records:
+                state["last_txg"] = records[-1][1]
+            state["missed"] += int(missed.get(pool, 0))
+        TXG_STATE.update(available=True, samples=TXG_STATE["samples"] + 1, last_sample_ts=ts)
+
+
+def _summary(values):
+    values = sorted(values)
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(values[-1], 2)
+    }
+
+
+def _window_stats(records):
+    if not records:
+        return {"count": 0}
+    stats = {"count": len(records)}
+    for field in PERCENTILE_FIELDS:
+        index = RECORD_FIELDS.index(field)
+        stats[field] = _summary(record[index] for record in records)
+    return stats
+
+
+def _recent(history, now, window):
+    """Records committed in the last window seconds (history is in commit order)."""
+    records = []
+    for record in reversed(history):
+        if now - record[0] > window:
+            break
+        records.append(record)
+    return records
+
+
+def txg_status():
+    """Payload of GET /txg-stats: per pool, phase-duration and dirty-bytes percentiles per window plus the latest txgs."""
+    now = time.time()
+    with TXG_LOCK:
+        pools = {}
+        for pool, history in TXG_HISTORY.items():
+            state = TXG_STATE["pools"].get(pool, {})
+            pools[pool] = {
+                "last_txg": state.get("last_txg"),
+                "missed": state.get("missed", 0),
+                "windows": {str(window): _window_stats(_recent(history, now, window)) for window in WINDOWS},
+                "recent": [dict(zip(RECORD_FIELDS, record)) for record in list(history)[-RECENT_TXGS:]]
+            }
+        return dict(TXG_STATE, pools=pools)
+
+
+def sync_alert_ms(config):
+    try:
+        return max(0, float(((config or {}).get('collector') or {}).get('txg_sync_alert_ms', DEFAULT_SYNC_ALERT_MS)))
+    except (TypeError, ValueError):
+        return DEFAULT_SYNC_ALERT_MS
+
+
+def slow_sync_pools(threshold_ms):
+    """Pools whose p95 txg sync time over the last ALERT_WINDOW seconds exceeds threshold_ms (0 disables)."""
+    if threshold_ms <= 0:
+        return []
+    now = time.time()
+    slow = []
+    with TXG_LOCK:
+        TXG_STATE["sync_alert_ms"] = threshold_ms
+        for pool, history in TXG_HISTORY.items():
+            syncs = sorted(record[8] for record in _recent(history, now, ALERT_WINDOW))
+            if syncs and percentile(syncs, 95) > threshold_ms:
+                slow.append(pool)
+    return sorted(slow)
+
+
+def _interval(config):
+    try:
+        return max(0, float(((config or {}).get('collector') or {}).get('txg_interval_secs', DEFAULT_INTERVAL_SECS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECS
+
+
+def txg_monitor_thread(load_config, publish=None):
+    """Tail every pool's txgs ring each collector.txg_interval_secs and feed new txgs to publish (default record_sample)."""
+    publish = publish or record_sample
+    buf = bytearray(INITIAL_BUFFER)
+    pools = {}                      # pool -> [path, last committed txg]
+    last_discovery = None
+    while True:
+        interval = _interval(load_config())
+        with TXG_LOCK:
+            TXG_STATE["interval_secs"] = interval
+        if interval <= 0:
+            time.sleep(IDLE_CHECK_SECS)
+            continue
+        now = time.monotonic()
+        if last_discovery is None or now - last_discovery >= DISCOVERY_SECS:
+            last_discovery = now
+            pools = {pool: pools.get(pool, [path, None]) for pool, path in discover_pools().items()}
+            if not pools:
+                with TXG_LOCK:
+                    TXG_STATE.update(available=False, last_error="no txgs kstats")
+                last_discovery = None
+                time.sleep(IDLE_CHECK_SECS)
+                continue
+        new, missed = {}, {}
+        clock = _commit_clock()
+        for pool, info in list(pools.items()):
+            path, last_txg = info
+            try:
+                buf, length = _read(path, buf)
+            except OSError:
+                del pools[pool]     # exported since the last discovery
+                continue
+            records, oldest = parse_new_txgs(buf, length, last_txg, clock)
+            if last_txg is not None and oldest is not None and oldest > last_txg + 1:
+                missed[pool] = oldest - last_txg - 1
+            if records:
+                info[1] = records[-1][1]
+            new[pool] = records
+        try:
+            publish({"ts": time.time(), "pools": new, "missed": missed})
+        except Exception as e: print(f"TXG stats publish error: {e}")
+        time.sleep(interval)
@@ -0,0 +1,261 @@
+import os, re, select, signal, subprocess, threading, time
+from collections import deque
+from .runner import find_tool
+
+# Per-pool / per-vdev performance from one long-running `zpool iostat -vlHp N`.
+#
+# The child prints a block every N seconds: one tab-separated row per pool,
+# top-level vdev, class (logs, cache, special, ...) and disk, with ops, bytes/s
+# and total/disk/syncq/asyncq wait latencies in ns. IostatStreamParser turns the
+# stream into samples incrementally: a block ends when a pool row repeats, or
+# when the stream goes quiet for BLOCK_GAP_SECS. -H drops the tree indentation,
+# so a leaf's parent is the last vdev group or class row seen in its pool; rows
+# with an alloc value are top-level vdevs (leaves print "-").
+#
+# Samples land in IOSTAT_HISTORY (IOSTAT_HISTORY_LIMIT per row), served at
+# GET /pool-iostat. In process-split mode the collector publishes each sample on
+# the "iostat" channel and the server keeps the history. The child is restarted
+# when the scanner sees pools imported or exported, when the interval changes and,
+# with backoff, when it exits. collector.iostat_interval_secs = 0 turns it off.
+
+DEFAULT_INTERVAL_SECS = 1
+IOSTAT_HISTORY_LIMIT = 60
+BLOCK_GAP_SECS = 0.2
+IDLE_CHECK_SECS = 5.0
+RESTART_BASE_SECS = 2.0
+RESTART_MAX_SECS = 60.0
+
+# -l columns after name, alloc and free; OpenZFS 2.x appends scrub, trim and rebuild waits.
+METRICS = ("ops_r", "ops_w", "bw_r", "bw_w",
+           "total_wait_r_ms", "total_wait_w_ms", "disk_wait_r_ms", "disk_wait_w_ms",
+           "syncq_wait_r_ms", "syncq_wait_w_ms", "asyncq_wait_r_ms", "asyncq_wait_w_ms")
+LATENCY_START = 4
+CLASS_ROWS = ("logs", "cache", "spares", "special", "dedup")
+VDEV_GROUP = re.compile(r'^(mirror|raidz\d?|draid\d?(?::\S+)?|replacing|spare)-\d+$')
+
+IOSTAT_LOCK = threading.Lock()
+IOSTAT_HISTORY = {}                 # pool -> {row name: {"kind", "parent", "metrics": {metric: deque}}}
+IOSTAT_STATE = {
+    "interval_secs": DEFAULT_INTERVAL_SECS,
+    "pid": None,
+    "started_at": None,
+    "restarts": 0,
+    "samples": 0,
+    "last_sample_ts": None,
+    "last_error": None
+}
+_POOLS = {"names": frozenset()}
+_POOLS_CHANGED = threading.Event()
+
+
+def _value(field):
+    try:
+        return float(field)
+    except ValueError:
+        return None                 # "-" (not applicable)
+
+
+def parse_row(fields):
+    """Tab-separated fields of one row -> {metric: value}; latencies in ms."""
+    values = [_value(field) for field in fields[3:3 + len(METRICS)]]
+    values += [None] * (len(METRICS) - len(values))
+    metrics = {}
+    for index, (name, value) in enumerate(zip(METRICS, values)):
+        if value is not None and index >= LATENCY_START:
+            value = round(value / 1e6, 3)
+        metrics[name] = value
+    return metrics
+
+
+class IostatStreamParser:
+    """Incremental parser for `zpool iostat -vlHp N` output; pools is the set of pool names."""
+
+    def __init__(self, pools):
+        self.pools = frozenset(pools)
+        self.block = {}             # pool -> [(name, kind, parent, metrics)]
+        self.pool = None
+        self.parent = None
+
+    def feed(self, line):
+        """Consume one line; returns the completed sample {pool: rows} when this line starts the next block."""
+        fields = line.rstrip('\n').split('\t')
+        name = fields[0].strip()
+        if not name or len(fields) < 7:
+            return None
+        completed = None
+        if name in self.pools:
+            if name in self.block:
+                completed = self.flush()
+            self.pool, self.parent = name, None
+            self.block[name] = [(name, "pool", None, parse_row(fields))]
+            return completed
+        if self.pool is None:
+            return None             # tail of a block that started before we attached
+        if name in CLASS_ROWS:
+            kind, parent = "class", None
+            self.parent = name
+        elif VDEV_GROUP.match(name):
+            kind, parent = "vdev", self.parent if self.parent in CLASS_ROWS else None
+            self.parent = name
+        elif _value(fields[1]) is not None:
+            # Single-disk top-level vdev (or cache device): sits directly under the pool/class.
+            kind = "disk"
+            if self.parent not in CLASS_ROWS:
+                self.parent = None
+            parent = self.parent
+        else:
+            kind, parent = "disk", self.parent
+        self.block[self.pool].append((name, kind, parent, parse_row(fields)))
+        return None
+
+    def flush(self):
+        """Return the block collected so far (or None) and start a new one."""
+        block, self.block, self.pool, self.parent = self.block, {}, None, None
+        return block or None
+
+
+def record_sample(sample, ts=None):
+    """Append one parsed sample ({pool: [(name, kind, parent, metrics)]}) to IOSTAT_HISTORY."""
+    with IOSTAT_LOCK:
+        for pool in [p for p in IOSTAT_HISTORY if p not in sample]:
+            del IOSTAT_HISTORY[pool]
+        for pool, rows in sample.items():
+            history = IOSTAT_HISTORY.setdefault(pool, {})
+            names = set()
+            for name, kind, parent, metrics in rows:
+                names.add(name)
+                row = history.get(name)
+                if row is None:
+                    row = history[name] = {
+                        "kind": kind, "parent": parent,
+                        "metrics": {metric: deque(maxlen=IOSTAT_HISTORY_LIMIT) for metric in METRICS}
+                    }
+                row["kind"], row["parent"] = kind, parent
+                for metric in METRICS:
+                    row["metrics"][metric].append(metrics.get(metric))
+            for name in [n for n in history if n not in names]:
+                del history[name]       # vdev removed / disk replaced
+        IOSTAT_STATE["samples"] += 1
+        IOSTAT_STATE["last_sample_ts"] = time.time() if ts is None else ts
+
+
+def iostat_status():
+    """Payload of GET /pool-iostat: state of the child plus per-pool and per-vdev histories."""
+    with IOSTAT_LOCK:
+        pools = {}
+        for pool, history in IOSTAT_HISTORY.items():
+            rows = {
+                name: {"kind": row["kind"], "parent": row["parent"],
+                       "metrics": {metric: list(values) for metric, values in row["metrics"].items()}}
+                for name, row in history.items()
+            }
+            pool_row = rows.pop(pool, {"metrics": {}})
+            pools[pool] = {"metrics": pool_row["metrics"], "vdevs": rows}
+        return dict(IOSTAT_STATE, pools=pools)
+
+
+def note_pools(pool_names):
+    """Called after each topology scan; an import/export restarts the iostat child."""
+    names = frozenset(pool_names)
+    if names != _POOLS["names"]:
+        _POOLS["names"] = names
+        _POOLS_CHANGED.set()
+
+
+def _interval(config):
+    try:
+        return max(0, int(((config or {}).get('collector') or {}).get('iostat_interval_secs', DEFAULT_INTERVAL_SECS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECS
+
+
+def _stop(proc):
+    if proc.poll() is None:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=2)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+    proc.stdout.close()
+
+
+def _stream(proc, pools, interval, load_config, publish):
+    """Read one child until it exits, the pool set changes or the interval setting changes."""
+    parser = IostatStreamParser(pools)
+    fd = proc.stdout.fileno()
+    pending = b''
+    first = True                    # the first block covers the time since import; skip it
+    last_config_check = time.monotonic()
+
+    def emit(sample):
+        nonlocal first
+        if sample and not first:
+            publish(sample)
+        first = first and not sample
+
+    while True:
+        if _POOLS_CHANGED.is_set():
+            return "pools changed"
+        if time.monotonic() - last_config_check >= IDLE_CHECK_SECS:
+            last_config_check = time.monotonic()
+            if _interval(load_config()) != interval:
+                return "interval changed"
+        readable, _, _ = select.select([fd], [], [], BLOCK_GAP_SECS)
+        if not readable:
+            emit(parser.flush())
+            continue
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            emit(parser.flush())
+            return "exited"
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            emit(parser.feed(line.decode('utf-8', 'replace')))
+
+
+def zpool_iostat_thread(load_config, publish=None):
+    """Keep one `zpool iostat -vlHp <interval>` child running and feed its samples to publish (default record_sample)."""
+    publish = publish or record_sample
+    backoff = RESTART_BASE_SECS
+    while True:
+        interval = _interval(load_config())
+        with IOSTAT_LOCK:
+            IOSTAT_STATE["interval_secs"] = interval
+        # Cleared before reading the pool set, so a change noted from here on wakes the idle wait.
+        _POOLS_CHANGED.clear()
+        pools = _POOLS["names"]
+        if interval <= 0 or not pools or not find_tool('zpool'):
+            _POOLS_CHANGED.wait(IDLE_CHECK_SECS)
+            continue
+        started = time.monotonic()
+        reason = None
+        try:
+            proc = subprocess.Popen(['zpool', 'iostat', '-vlHp', str(interval)], stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            reason = f"start failed: {e}"
+        else:
+            with IOSTAT_LOCK:
+                IOSTAT_STATE.update(pid=proc.pid, started_at=time.time())
+            try:
+                reason = _stream(proc, pools, interval, load_config, publish)
+            except Exception as e:
+                reason = f"stream error: {e}"
+            finally:
+                _stop(proc)
+        with IOSTAT_LOCK:
+            IOSTAT_STATE.update(pid=None, restarts=IOSTAT_STATE["restarts"] + 1, last_error=reason)
+        if reason in ("pools changed", "interval changed"):
+            backoff = RESTART_BASE_SECS
+            continue
+        # Exited or failed: back off, unless it had been streaming for a while.
+        if time.monotonic() - started > RESTART_MAX_SECS:
+            backoff = RESTART_BASE_SECS
+        print(f"zpool iostat stream {reason}; restarting in {backoff:.0f}s")
+        _POOLS_CHANGED.wait(backoff)
+        backoff = min(backoff * 2, RESTART_MAX_SECS)
@@ -4,19 +4,21 @@ import threading
 from py.server import (
     FastHandler,
     get_port,
-    io_monitor_thread,
-    topology_scanner_thread,
-    alert_monitor_thread,
-    pool_activity_monitor_thread,
+    start_collector_threads,
 )
+from py.config import load_config
+from py.federation import federation_monitor_thread
 
 if __name__ == "__main__":
-    threading.Thread(target=io_monitor_thread, daemon=True).start()
-    threading.Thread(target=topology_scanner_thread, daemon=True).start()
-    threading.Thread(target=alert_monitor_thread, daemon=True).start()
-    threading.Thread(target=pool_activity_monitor_thread, daemon=True).start()
-    socketserver.TCPServer.allow_reuse_address = True
     port = get_port()
+    # In-process samplers/scanner, or a supervised collector process when
+    # collector.process_split is on (see py/splitmode.py).
+    start_collector_threads(port)
+    threading.Thread(target=federation_monitor_thread, args=(load_config,), daemon=True).start()
+    # Threaded server: keep-alive connections (browsers, federation peers) must not
+    # block each other.
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    socketserver.ThreadingTCPServer.daemon_threads = True
     print(f"Starting server on port {port}")
-    with socketserver.TCPServer(("0.0.0.0", port), FastHandler) as httpd:
-        httpd.serve_forever()
\ No newline at end of file
+    with socketserver.ThreadingTCPServer(("0.0.0.0", port), FastHandler) as httpd:
+        httpd.serve_forever()
@@ -3,15 +3,45 @@ import json
 import re
 import os
 import glob
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from py.paths import host_path
+from py.runner import run_command, command_output, find_tool, carry_prefetch, MAX_CONCURRENT_COMMANDS
+from py.hwmon import read_hwmon_temperatures, nvme_namespaces
+from py.scan_progress import update_pools as update_scan_progress, from_pool_query, from_zpool_status
 
 # Global flag to track API availability
 API_AVAILABLE = True
 API_ERROR_MESSAGE = ""
 
+# API health state machine. healthy: pool.query every scan. degraded: midclt is
+# not called from the scan at all (one zpool status per scan); a background
+# `midclt call core.ping` probe runs when the backoff expires and flips the
+# state back to healthy. missing: midclt not installed (cached lookup only).
+# The backoff returns to its base only after a pool.query succeeds: if the
+# middleware answers ping but pool.query keeps failing, every healthy ->
+# degraded flap doubles it instead of starting again at 15 s.
+API_HEALTH_LOCK = threading.Lock()
+API_HEALTH = {
+    "state": "healthy",
+    "failures": 0,
+    "backoff": 15.0,
+    "next_probe_at": 0.0,
+    "probing": False,
+    "confirmed": True,      # a pool.query has succeeded since the last degrade
+    "since": time.time()
+}
+API_BACKOFF_BASE_SECS = 15.0
+API_BACKOFF_MAX_SECS = 300.0
+API_PROBE_TIMEOUT_SECS = 2
+
 
 def _normalize_temp_device_name(name):
     value = str(name or '').strip().lower()
-    if value.startswith('/dev/'):
+    # Any path (/dev/..., or a realpath under DASHBOARD_HOST_ROOT) keys by its basename.
+    if '/' in value:
         value = value.split('/')[-1]
     return value
 
@@ -30,93 +60,209 @@ def _strip_partition_suffix(name):
     return value
 
 
-def _fetch_disk_temperatures_via_api():
-    """Return disk temperatures from smartctl as {dev_name: temp_c}.
+# Temperature sweep device discovery. One `smartctl --scan-open -j` lists every
+# disk smartctl can open (ATA, SAS/SCSI, NVMe) with its device type; the result is
+# cached for SMART_SCAN_TTL_SECS and refreshed early when /sys/block changes
+# (hot-plug). Probes then run on a thread pool capped at the runner's command limit.
+SMART_SCAN_TTL_SECS = 300.0
+SMART_MAX_WORKERS = MAX_CONCURRENT_COMMANDS
+SMART_SCAN_LOCK = threading.Lock()
+_SMART_SCAN = {"fetched_at": 0.0, "block_devices": None, "devices": []}
 
-    Queries S.M.A.R.T. data for all ATA devices in /dev/disk/by-id/.
-    Temperatures are optional metadata: errors are swallowed so topology still updates.
-    """
+
+def smart_disk_paths():
+    """/dev/disk/by-id ATA whole-disk links (discovery fallback when --scan-open fails)."""
+    return [
+        disk_path for disk_path in sorted(glob.glob(host_path('/dev/disk/by-id/ata-*')))
+        if not re.search(r'-part\d+$', os.path.basename(disk_path))
+    ]
+
+def smart_command(disk_path, dev_type=None):
+    return ['smartctl', '-a', '-j'] + (['-d', dev_type] if dev_type else []) + [disk_path]
+
+def _block_devices():
     try:
-        temps = {}
-        disk_paths = sorted(glob.glob('/dev/disk/by-id/ata-*'))
+        return frozenset(os.listdir(host_path('/sys/block')))
+    except OSError:
+        return frozenset()
+
+def _by_id_aliases():
+    """{kernel name: [by-id whole-disk link names]} (ata-*, scsi-*, wwn-*, nvme-*)."""
+    aliases = {}
+    by_id_dir = host_path('/dev/disk/by-id')
+    if not os.path.isdir(by_id_dir):
+        return aliases
+    for entry in os.scandir(by_id_dir):
+        if re.search(r'-part\d+$', entry.name) or not entry.is_symlink():
+            continue
+        target = os.path.basename(os.readlink(entry.path))
+        aliases.setdefault(target, []).append(entry.name)
+    return aliases
+
+def _scan_open_devices(block_devices):
+    """[(path, type, kernel names)] from smartctl --scan-open, or None when it is unavailable."""
+    try:
+        proc = run_command(['smartctl', '--scan-open', '-j'], check=False,
+                           name="smartctl scan-open", stderr=subprocess.DEVNULL)
+        payload = json.loads(proc.stdout or '')
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get('devices'), list):
+        return None
+    devices = []
+    seen = set()
+    for device in payload['devices']:
+        name = str((device or {}).get('name') or '') if isinstance(device, dict) else ''
+        kernel_name = os.path.basename(name)
+        if re.match(r'^nvme\d+$', kernel_name):
+            names = nvme_namespaces(kernel_name) or [kernel_name]
+        elif kernel_name in block_devices:
+            names = [kernel_name]
+        else:
+            # RAID passthrough (/dev/bus/0 -d megaraid,N) has no kernel disk to key by.
+            continue
+        if name in seen:
+            continue
+        seen.add(name)
+        devices.append((host_path(name), device.get('type') or None, names))
+    return devices
+
+def smart_devices():
+    """[(path, type, kernel names)] the temperature sweep probes; cached discovery."""
+    now = time.monotonic()
+    block_devices = _block_devices()
+    with SMART_SCAN_LOCK:
+        if (_SMART_SCAN["block_devices"] == block_devices
+                and now - _SMART_SCAN["fetched_at"] < SMART_SCAN_TTL_SECS):
+            return list(_SMART_SCAN["devices"])
+    devices = _scan_open_devices(block_devices)
+    if devices is None:
+        devices = [
+            (disk_path, None, [_normalize_temp_device_name(os.path.realpath(disk_path))])
+            for disk_path in smart_disk_paths()
+        ]
+    with SMART_SCAN_LOCK:
+        _SMART_SCAN.update(fetched_at=now, block_devices=block_devices, devices=devices)
+    return list(devices)
+
+def smart_probe_devices(hwmon_temps=None):
+    """(path, type) of the devices that still need a smartctl call: those without a hwmon temperature."""
+    if hwmon_temps is None:
+        hwmon_temps = read_hwmon_temperatures()
+    return [
+        (path, dev_type) for path, dev_type, names in smart_devices()
+        if not all(name in hwmon_temps for name in names)
+    ]
+
+def _smart_payload_temperature(payload):
+    """Current temperature from smartctl -j output, or None.
+
+    All device types report temperature.current on smartctl 7.x; older builds leave
+    it out, so NVMe falls back to the health log and ATA to attributes 190/194.
+    """
+    temp_value = None
+    temp_obj = payload.get('temperature')
+    if isinstance(temp_obj, dict):
+        try:
+            current = temp_obj.get('current')
+            if current is not None:
+                temp_value = int(round(float(current)))
+        except Exception:
+            temp_value = None
 
-        for disk_path in disk_paths:
-            device_id = os.path.basename(disk_path)
-            if re.search(r'-part\d+$', device_id):
-                continue
+    if temp_value is None:
+        health_log = payload.get('nvme_smart_health_information_log')
+        if isinstance(health_log, dict):
+            try:
+                if health_log.get('temperature') is not None:
+                    temp_value = int(round(float(health_log['temperature'])))
+            except Exception:
+                temp_value = None
 
+    if temp_value is None:
+        table = payload.get('ata_smart_attributes', {}).get('table', [])
+        for attr in table:
+            if attr.get('id') not in (190, 194):
+                continue
+            raw = attr.get('raw', {})
+            raw_val = raw.get('value')
+            raw_text = str(raw.get('string') or '')
+            candidate = raw_val
+            if candidate is None:
+                match = re.search(r'(-?\d+)', raw_text)
+                if match:
+                    candidate = match.group(1)
             try:
-                proc = subprocess.run(
-                    ['smartctl', '-a', '-j', disk_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                    text=True,
-                    timeout=5,
-                    check=False
-                )
-                smart_out = proc.stdout or ''
-                if not smart_out.strip():
-                    continue
-                payload = json.loads(smart_out)
+                if candidate is not None:
+                    temp_value = int(round(float(candidate)))
+                    break
             except Exception:
                 continue
 
-            temp_value = None
-            temp_obj = payload.get('temperature')
-            if isinstance(temp_obj, dict):
-                try:
-                    current = temp_obj.get('current')
-                    if current is not None:
-                        temp_value = int(round(float(current)))
-                except Exception:
-                    temp_value = None
-
-            if temp_value is None:
-                table = payload.get('ata_smart_attributes', {}).get('table', [])
-                for attr in table:
-                    if attr.get('id') not in (190, 194):
-                        continue
-                    raw = attr.get('raw', {})
-                    raw_val = raw.get('value')
-                    raw_text = str(raw.get('string') or '')
-                    candidate = raw_val
-                    if candidate is None:
-                        match = re.search(r'(-?\d+)', raw_text)
-                        if match:
-                            candidate = match.group(1)
-                    try:
-                        if candidate is not None:
-                            temp_value = int(round(float(candidate)))
-                            break
-                    except Exception:
-                        continue
-
-            if temp_value is None or not (0 <= temp_value <= 150):
-                continue
+    if temp_value is None or not (0 <= temp_value <= 150):
+        return None
+    return temp_value
+
+def _probe_smart_temperature(disk_path, dev_type):
+    try:
+        proc = run_command(smart_command(disk_path, dev_type), check=False, stderr=subprocess.DEVNULL)
+        smart_out = proc.stdout or ''
+        if not smart_out.strip():
+            return None
+        return _smart_payload_temperature(json.loads(smart_out))
+    except Exception:
+        return None
 
-            by_id_name = _normalize_temp_device_name(device_id)
-            if by_id_name:
-                temps[by_id_name] = temp_value
-                by_id_base = _strip_partition_suffix(by_id_name)
-                if by_id_base:
-                    temps[by_id_base] = temp_value
-                if by_id_name.startswith('ata-'):
-                    temps[by_id_name[4:]] = temp_value
-
-            # Runtime alias only: lets matching succeed if pool topology currently reports
-            # /dev/sdX style paths; this is recalculated each scan and not persisted.
-            resolved_name = _normalize_temp_device_name(os.path.realpath(disk_path))
-            if resolved_name:
-                temps[resolved_name] = temp_value
-                resolved_base = _strip_partition_suffix(resolved_name)
-                if resolved_base:
-                    temps[resolved_base] = temp_value
+def _store_disk_temperature(temps, kernel_name, temp_value, aliases):
+    """Key one disk's temperature by its kernel name and by-id names (ata- ones also without the prefix)."""
+    temps[kernel_name] = temp_value
+    for by_id_name in aliases.get(kernel_name, []):
+        by_id_name = _normalize_temp_device_name(by_id_name)
+        temps[by_id_name] = temp_value
+        if by_id_name.startswith('ata-'):
+            temps[by_id_name[4:]] = temp_value
+
+def _fetch_disk_temperatures_via_api(max_workers=SMART_MAX_WORKERS):
+    """Return disk temperatures as {dev_name: temp_c}.
+
+    Source chain: kernel hwmon sensors (drivetemp, NVMe) first, then smartctl for the
+    ATA, SAS and NVMe devices from the cached --scan-open discovery that have no hwmon
+    reading, at most max_workers at a time.
+    Temperatures are optional metadata: errors are swallowed so topology still updates.
+    """
+    try:
+        hwmon_temps = read_hwmon_temperatures()
+        devices = smart_devices()
+        # Runtime aliases only: let matching succeed whether pool topology reports
+        # /dev/sdX or by-id paths; recalculated each scan and not persisted.
+        aliases = _by_id_aliases()
+        temps = {}
+        pending = []
+        for path, dev_type, names in devices:
+            if all(name in hwmon_temps for name in names):
+                for name in names:
+                    _store_disk_temperature(temps, name, hwmon_temps[name], aliases)
+            else:
+                pending.append((path, dev_type, names))
+        for name, value in hwmon_temps.items():
+            if name not in temps:
+                _store_disk_temperature(temps, name, value, aliases)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+                # Probes read the asyncio engine's prefetched results, which belong to this (the scanning) thread.
+                probe = carry_prefetch(lambda device: _probe_smart_temperature(device[0], device[1]))
+                results = list(pool.map(probe, pending))
+            for (path, dev_type, names), temp_value in zip(pending, results):
+                if temp_value is None:
+                    continue
+                for name in names:
+                    _store_disk_temperature(temps, name, temp_value, aliases)
 
         return temps
     except Exception:
         return {}
 
-
 def _lookup_temperature_for_disk(device_path, dev_base, temp_map):
     if not temp_map:
         return None
@@ -134,122 +280,170 @@ def _lookup_temperature_for_disk(device_path, dev_base, temp_map):
     if dev_base_norm in temp_map:
         return temp_map[dev_base_norm]
 
-    # Partition-suffixed names (e.g. sda1, nvme0n1p2) still map to base device temps.
-    if path_base:
-        base = _strip_partition_suffix(path_base)
-        if base in temp_map:
-            return temp_map[base]
-
-    if dev_base_norm:
-        for dev_name, temp_c in temp_map.items():
-            if dev_name.startswith(dev_base_norm):
-                return temp_c
-
     return None
 
 def check_truenas_api():
     """Check if TrueNAS Scale API (midclt) is available"""
     global API_AVAILABLE, API_ERROR_MESSAGE
-    try:
-        subprocess.check_output(['which', 'midclt'], stderr=subprocess.DEVNULL, text=True)
-        return True
-    except Exception as e:
+    if find_tool('midclt') is None:
         API_AVAILABLE = False
         API_ERROR_MESSAGE = "TrueNAS Scale API (midclt) not found"
+        with API_HEALTH_LOCK:
+            if API_HEALTH["state"] != "missing":
+                API_HEALTH.update(state="missing", since=time.time())
         return False
+    with API_HEALTH_LOCK:
+        if API_HEALTH["state"] == "missing":
+            API_HEALTH.update(state="healthy", failures=0, backoff=API_BACKOFF_BASE_SECS, since=time.time())
+    return True
+
+def api_is_healthy():
+    """True when scans should call midclt (no recent failure, or a probe succeeded)."""
+    with API_HEALTH_LOCK:
+        return API_HEALTH["state"] == "healthy"
+
+def _mark_api_failed(message):
+    global API_AVAILABLE, API_ERROR_MESSAGE
+    API_AVAILABLE = False
+    API_ERROR_MESSAGE = message
+    with API_HEALTH_LOCK:
+        if API_HEALTH["state"] == "healthy":
+            # Only ping recovered it last time: keep growing the backoff across flaps.
+            backoff = API_BACKOFF_BASE_SECS
+            if not API_HEALTH["confirmed"]:
+                backoff = min(API_HEALTH["backoff"] * 2, API_BACKOFF_MAX_SECS)
+            API_HEALTH.update(state="degraded", since=time.time(), backoff=backoff, confirmed=False)
+        API_HEALTH["failures"] += 1
+        API_HEALTH["next_probe_at"] = time.time() + API_HEALTH["backoff"]
+        backoff = API_HEALTH["backoff"]
+    print(f"API Error: {message} (using zpool status; next API probe in {backoff:.0f}s)")
+
+def _mark_api_ok():
+    with API_HEALTH_LOCK:
+        if not API_HEALTH["confirmed"]:
+            API_HEALTH.update(confirmed=True, failures=0, backoff=API_BACKOFF_BASE_SECS)
+
+def _api_probe_worker():
+    global API_AVAILABLE, API_ERROR_MESSAGE
+    try:
+        command_output(['midclt', 'call', 'core.ping'], timeout=API_PROBE_TIMEOUT_SECS, name="midclt core.ping")
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, e
+    with API_HEALTH_LOCK:
+        API_HEALTH["probing"] = False
+        if ok:
+            # backoff and failures are reset by the next successful pool.query (_mark_api_ok).
+            API_HEALTH.update(state="healthy", since=time.time())
+        else:
+            API_HEALTH["failures"] += 1
+            API_HEALTH["backoff"] = min(API_HEALTH["backoff"] * 2, API_BACKOFF_MAX_SECS)
+            API_HEALTH["next_probe_at"] = time.time() + API_HEALTH["backoff"]
+    if ok:
+        API_AVAILABLE = True
+        API_ERROR_MESSAGE = ""
+        print("TrueNAS API recovered; resuming pool.query")
+    else:
+        API_ERROR_MESSAGE = f"TrueNAS API unavailable: {error}"
+
+def _maybe_probe_api():
+    """While degraded, start one background core.ping once the backoff has expired."""
+    with API_HEALTH_LOCK:
+        if API_HEALTH["state"] != "degraded" or API_HEALTH["probing"] or time.time() < API_HEALTH["next_probe_at"]:
+            return
+        API_HEALTH["probing"] = True
+    threading.Thread(target=_api_probe_worker, daemon=True).start()
+
+def process_pool_query(pools, uuid_to_dev_map, temp_map=None):
+    """Build (zfs_map, pool_states) from pool.query-shaped pool dicts."""
+    zfs_map = {}
+    pool_states = {}
+    pool_scans = {}
+    for pool in pools:
+        pool_name = pool.get('name', 'unknown')
+        pool_status = pool.get('status', 'UNKNOWN')
+        pool_healthy = pool.get('healthy', True)
+        
+        # Determine pool state
+        if not pool_healthy:
+            if pool_status in ['FAULTED', 'UNAVAIL']:
+                pool_state = 'FAULTED'
+            elif pool_status == 'DEGRADED':
+                pool_state = 'DEGRADED'
+            elif pool_status == 'SUSPENDED':
+                pool_state = 'SUSPENDED'
+            else:
+                pool_state = pool_status
+        else:
+            pool_state = 'ONLINE'
+        
+        pool_states[pool_name] = pool_state
+        
+        # Check for active resilver/scrub/repair operation at pool level
+        scan = pool.get('scan') or {}
+        pool_scans[pool_name] = from_pool_query(scan)
+        scan_function = scan.get('function', '')
+        scan_state = scan.get('state', 'FINISHED')
+        is_active_resilver = scan_function == 'RESILVER' and scan_state != 'FINISHED'
+        is_active_rebuild = scan_function == 'REBUILD' and scan_state != 'FINISHED'
+        is_active_repair = scan_function == 'REPAIR' and scan_state != 'FINISHED'
+        has_active_scan = is_active_resilver or is_active_rebuild or is_active_repair
+        
+        if has_active_scan:
+            print(f"ZFS API: Pool {pool_name} has active {scan_function} (state: {scan_state})")
+        
+        # Process topology
+        topology = pool.get('topology', {})
+        disk_idx = 0
+        
+        # Check data vdevs
+        for vdev_type in ['data', 'cache', 'log', 'spare']:
+            vdevs = topology.get(vdev_type, [])
+            for vdev in vdevs:
+                disk_idx = process_vdev(vdev, pool_name, pool_state, disk_idx, uuid_to_dev_map, zfs_map, temp_map)
+        
+        # If there's an active resilver/rebuild/repair, mark all disks in this pool as RESILVERING
+        if has_active_scan:
+            for dev_base, info in zfs_map.items():
+                if info['pool'] == pool_name:
+                    info['state'] = 'RESILVERING'
+                    print(f"ZFS API: Disk {dev_base} marked as RESILVERING due to active pool {scan_function}")
+    
+    # Store pool states in first disk of each pool for frontend access
+    for dev_base, info in zfs_map.items():
+        info['pool_state'] = pool_states.get(info['pool'], 'UNKNOWN')
+
+    update_scan_progress(pool_scans)
+    return zfs_map, pool_states
 
-def get_zfs_topology_via_api(uuid_to_dev_map):
+def get_zfs_topology_via_api(uuid_to_dev_map, temp_map=None):
     """Get ZFS topology using TrueNAS Scale API (preferred method)"""
     global API_AVAILABLE, API_ERROR_MESSAGE
     zfs_map = {}
     pool_states = {}
     
     try:
-        temp_map = _fetch_disk_temperatures_via_api()
+        if not isinstance(temp_map, dict):
+            temp_map = _fetch_disk_temperatures_via_api()
         # Query pool data via TrueNAS middleware
-        output = subprocess.check_output(
-            ['midclt', 'call', 'pool.query'],
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=5
-        )
+        output = command_output(['midclt', 'call', 'pool.query'], name="midclt pool.query")
         pools = json.loads(output)
-        
-        for pool in pools:
-            pool_name = pool.get('name', 'unknown')
-            pool_status = pool.get('status', 'UNKNOWN')
-            pool_healthy = pool.get('healthy', True)
-            
-            # Determine pool state
-            if not pool_healthy:
-                if pool_status in ['FAULTED', 'UNAVAIL']:
-                    pool_state = 'FAULTED'
-                elif pool_status == 'DEGRADED':
-                    pool_state = 'DEGRADED'
-                elif pool_status == 'SUSPENDED':
-                    pool_state = 'SUSPENDED'
-                else:
-                    pool_state = pool_status
-            else:
-                pool_state = 'ONLINE'
-            
-            pool_states[pool_name] = pool_state
-            
-            # Check for active resilver/scrub/repair operation at pool level
-            scan = pool.get('scan', {})
-            scan_function = scan.get('function', '')
-            scan_state = scan.get('state', 'FINISHED')
-            is_active_resilver = scan_function == 'RESILVER' and scan_state != 'FINISHED'
-            is_active_rebuild = scan_function == 'REBUILD' and scan_state != 'FINISHED'
-            is_active_repair = scan_function == 'REPAIR' and scan_state != 'FINISHED'
-            has_active_scan = is_active_resilver or is_active_rebuild or is_active_repair
-            
-            if has_active_scan:
-                print(f"ZFS API: Pool {pool_name} has active {scan_function} (state: {scan_state})")
-            
-            # Process topology
-            topology = pool.get('topology', {})
-            disk_idx = 0
-            
-            # Check data vdevs
-            for vdev_type in ['data', 'cache', 'log', 'spare']:
-                vdevs = topology.get(vdev_type, [])
-                for vdev in vdevs:
-                    disk_idx = process_vdev(vdev, pool_name, pool_state, disk_idx, uuid_to_dev_map, zfs_map, temp_map)
-            
-            # If there's an active resilver/rebuild/repair, mark all disks in this pool as RESILVERING
-            if has_active_scan:
-                for dev_base, info in zfs_map.items():
-                    if info['pool'] == pool_name:
-                        info['state'] = 'RESILVERING'
-                        print(f"ZFS API: Disk {dev_base} marked as RESILVERING due to active pool {scan_function}")
-        
-        # Store pool states in first disk of each pool for frontend access
-        for dev_base, info in zfs_map.items():
-            info['pool_state'] = pool_states.get(info['pool'], 'UNKNOWN')
-        
+        zfs_map, pool_states = process_pool_query(pools, uuid_to_dev_map, temp_map)
         API_AVAILABLE = True
+        _mark_api_ok()
         return zfs_map, pool_states
         
     except subprocess.TimeoutExpired:
-        API_AVAILABLE = False
-        API_ERROR_MESSAGE = "TrueNAS API timeout"
-        print(f"API Error: {API_ERROR_MESSAGE}")
+        _mark_api_failed("TrueNAS API timeout")
         return fallback_to_zpool_status(uuid_to_dev_map)
     except subprocess.CalledProcessError as e:
-        API_AVAILABLE = False
-        API_ERROR_MESSAGE = f"TrueNAS API call failed: {e.returncode}"
-        print(f"API Error: {API_ERROR_MESSAGE}")
+        _mark_api_failed(f"TrueNAS API call failed: {e.returncode}")
         return fallback_to_zpool_status(uuid_to_dev_map)
     except json.JSONDecodeError as e:
-        API_AVAILABLE = False
-        API_ERROR_MESSAGE = "TrueNAS API response invalid (API may have changed)"
-        print(f"API Error: {API_ERROR_MESSAGE}")
+        _mark_api_failed("TrueNAS API response invalid (API may have changed)")
         return fallback_to_zpool_status(uuid_to_dev_map)
     except Exception as e:
-        API_AVAILABLE = False
-        API_ERROR_MESSAGE = f"TrueNAS API error: {str(e)}"
-        print(f"API Error: {API_ERROR_MESSAGE}")
+        _mark_api_failed(f"TrueNAS API error: {str(e)}")
         return fallback_to_zpool_status(uuid_to_dev_map)
 
 def process_vdev(vdev, pool_name, pool_state, disk_idx, uuid_to_dev_map, zfs_map, temp_map):
@@ -328,6 +522,7 @@ def process_vdev(vdev, pool_name, pool_state, disk_idx, uuid_to_dev_map, zfs_map
                 "cksum_errors": checksum_errors,
                 "pool_state": pool_state,
                 "vdev_status": vdev_status,
+                "guid": str(device_guid or ''),
                 "temperature_c": temp_c
             }
     
@@ -339,9 +534,10 @@ def fallback_to_zpool_status(uuid_to_dev_map):
     zfs_map = {}
     pool_states = {}
     pool_active_resilver = {}  # Track which pools have active resilver operations
+    pool_scan_text = {}  # pool -> scan: line plus its continuation lines
     
     try:
-        z_out = subprocess.check_output(['zpool', 'status', '-v', '-p'], text=True)
+        z_out = command_output(['zpool', 'status', '-v', '-p'], name="zpool status")
         current_pool = None
         disk_idx = 0
         current_pool_state = 'ONLINE'
@@ -358,14 +554,22 @@ def fallback_to_zpool_status(uuid_to_dev_map):
             re.IGNORECASE
         )
         
+        scan_pool = None
         for line in z_out.split('\n'):
             line_stripped = line.strip()
             
+            # Continuation lines of "scan:" are indented with no "key:" of their own.
+            if scan_pool and not re.match(r'^[a-z]+:', line_stripped):
+                pool_scan_text[scan_pool] += ' ' + line_stripped
+            else:
+                scan_pool = None
+            
             if line_stripped.startswith('pool:'):
                 current_pool = line_stripped.split(':')[1].strip()
                 disk_idx = 0
                 current_pool_state = 'ONLINE'
                 pool_active_resilver[current_pool] = False
+                pool_scan_text[current_pool] = ''
             
             if line_stripped.startswith('state:') and current_pool:
                 current_pool_state = line_stripped.split(':')[1].strip()
@@ -374,6 +578,8 @@ def fallback_to_zpool_status(uuid_to_dev_map):
             
             # Check for active resilver/rebuild/repair/scrub operation
             if line_stripped.startswith('scan:') and current_pool:
+                scan_pool = current_pool
+                pool_scan_text[current_pool] = line_stripped
                 if SCAN_ACTIVE.search(line_stripped):
                     pool_active_resilver[current_pool] = True
                     print(f"ZFS: Pool {current_pool} has active resilver/repair operation")
@@ -436,23 +642,33 @@ def fallback_to_zpool_status(uuid_to_dev_map):
                     if info['pool'] == pool_name:
                         info['state'] = 'RESILVERING'
                         print(f"ZFS: Disk {dev_base} marked as RESILVERING due to active pool operation")
+        
+        update_scan_progress({pool: from_zpool_status(text) for pool, text in pool_scan_text.items()})
     
     except Exception as e:
         print(f"Fallback ZFS Logic Error: {e}")
     
     return zfs_map, pool_states
 
-def get_zfs_topology(uuid_to_dev_map):
+def get_zfs_topology(uuid_to_dev_map, temp_map=None):
     """Main entry point - tries API first, falls back to zpool status"""
-    if check_truenas_api():
-        return get_zfs_topology_via_api(uuid_to_dev_map)
-    else:
+    if not check_truenas_api():
         print("TrueNAS API not available, using zpool status fallback")
         return fallback_to_zpool_status(uuid_to_dev_map)
+    if not api_is_healthy():
+        # Degraded: no midclt call in the scan path, just the backoff-gated probe.
+        _maybe_probe_api()
+        return fallback_to_zpool_status(uuid_to_dev_map)
+    return get_zfs_topology_via_api(uuid_to_dev_map, temp_map=temp_map)
 
 def get_api_status():
     """Return API availability status for frontend"""
+    with API_HEALTH_LOCK:
+        state = API_HEALTH["state"]
+        retry_in = max(0.0, API_HEALTH["next_probe_at"] - time.time()) if state == "degraded" else 0.0
     return {
         "available": API_AVAILABLE,
-        "error_message": API_ERROR_MESSAGE if not API_AVAILABLE else ""
+        "error_message": API_ERROR_MESSAGE if not API_AVAILABLE else "",
+        "state": state,
+        "next_probe_secs": round(retry_in, 1)
     }
\ No newline at end of file